@@ -0,0 +1,111 @@
+import random
+
+# Share of each kind of site in a generated corpus
+SITE_KINDS = (
+    ('fast', 0.50),
+    ('slow', 0.15),
+    ('not_found', 0.08),  # 404 with the company's details on the error page
+    ('server_error', 0.07),  # 500
+    ('unavailable', 0.03),  # 503
+    ('huge', 0.05),  # Multi-megabyte home page
+    ('timeout', 0.02),  # Never answers within the fetch timeout
+    ('refused', 0.10),  # Nothing listening
+)
+
+# Kinds that the broken website collector should report as broken
+BROKEN_KINDS = {'not_found', 'server_error', 'unavailable', 'timeout', 'refused'}
+
+# Where a site publishes its contact details
+CONTACT_LAYOUTS = ('home', 'subpages', 'links', 'none')
+
+STATUS_CODES = {'not_found': 404, 'server_error': 500, 'unavailable': 503}
+
+SLOW_DELAY = (0.3, 2.0)  # Seconds
+TIMEOUT_DELAY = 12  # Longer than the collectors' 10 second fetch timeout
+HUGE_BODY_SIZE = 6 * 1024 * 1024
+
+WORDS = (
+    "quality", "service", "solutions", "trusted", "local", "business", "customers", "since",
+    "experience", "team", "professional", "support", "products", "delivery", "years",
+)
+
+def site_host(index):
+    """Loopback address of the index-th site (every site gets its own host)."""
+    return f"127.0.{1 + index // 250}.{1 + index % 250}"
+
+def _filler(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def _page(title, body):
+    return f"<html><head><title>{title}</title></head><body>{body}</body></html>"
+
+def _phone(rng):
+    number = f"{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}"
+    style = rng.choice(('+1 {}', '({}) {}-{}', '{}'))
+    if style == '({}) {}-{}':
+        area, exchange, line = number.split('-')
+        return style.format(area, exchange, line)
+    return style.format(number)
+
+def generate_corpus(num_sites, port, refused_port, seed=1):
+    """Generate num_sites sites as dicts with their pages and the contact details a collector should find.
+
+    Each site has url, kind, pages ({path: (status code, html)}), delay
+    (seconds before every response), expected_email, expected_phone and
+    broken. The same arguments always give the same corpus.
+    """
+    rng = random.Random(seed)
+    kinds = [kind for kind, _ in SITE_KINDS]
+    weights = [weight for _, weight in SITE_KINDS]
+    sites = []
+    for index in range(num_sites):
+        kind = rng.choices(kinds, weights)[0]
+        host = site_host(index)
+        name = f"{rng.choice(WORDS).title()} {rng.choice(('Ltd', 'Inc', 'Co', 'Group'))} {index}"
+        email = f"info{index}@company{index}.example.com"
+        phone = _phone(rng)
+        layout = rng.choice(CONTACT_LAYOUTS)
+        status = STATUS_CODES.get(kind, 200)
+
+        site = {
+            'url': f"http://{host}:{refused_port if kind == 'refused' else port}/",
+            'host': host,
+            'kind': kind,
+            'pages': {},
+            'delay': 0,
+            'expected_email': email if layout != 'none' else None,
+            'expected_phone': phone if layout != 'none' else None,
+            'broken': kind in BROKEN_KINDS,
+        }
+        if kind in ('timeout', 'refused'):
+            # Nothing can be read from these sites
+            site['expected_email'] = site['expected_phone'] = None
+            site['delay'] = TIMEOUT_DELAY if kind == 'timeout' else 0
+            sites.append(site)
+            continue
+        if kind == 'slow':
+            site['delay'] = rng.uniform(*SLOW_DELAY)
+
+        # Things that look like contacts but aren't, e.g. retina image names
+        decoy = f'<img src="logo@2x.png" alt="logo@2x.png"> {_filler(rng, 20)}'
+        nav = '<nav><a href="/products">Products</a> <a href="/about-us">About us</a></nav>'
+        if layout == 'home':
+            home = f"{nav}<p>{_filler(rng, 40)}</p>{decoy}<p>Email {email} or call {phone}</p>"
+        elif layout == 'subpages':
+            home = f'{nav}<p>{_filler(rng, 60)}</p>{decoy}<footer><a href="/contact-us">Contact us</a></footer>'
+            site['pages']['/contact-us'] = (200, _page("Contact", f"<p>Write to us at {email}</p>"))
+            site['pages']['/about-us'] = (200, _page("About", f"<p>{_filler(rng, 30)} Phone: {phone}</p>"))
+        elif layout == 'links':
+            home = f'{nav}<p>{_filler(rng, 60)}</p><a href="mailto:{email}">Email us</a> <a href="tel:{phone}">Call</a>'
+        else:
+            home = f"{nav}<p>{_filler(rng, 80)}</p>{decoy}"
+        site['pages'].setdefault('/about-us', (200, _page("About", f"<p>{_filler(rng, 30)}</p>")))
+        site['pages']['/products'] = (200, _page("Products", f"<p>{_filler(rng, 50)}</p>"))
+
+        if kind == 'huge':
+            # Contacts near the top, then megabytes of filler
+            padding = f"<p>{_filler(rng, 200)}</p>"
+            home += padding * (HUGE_BODY_SIZE // len(padding))
+        site['pages']['/'] = (status, _page(f"{name} | Home", home))
+        sites.append(site)
+    return sites
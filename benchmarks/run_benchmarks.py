@@ -0,0 +1,224 @@
+"""Offline benchmark of both collectors against a generated corpus on a local HTTP server.
+
+    python benchmarks/run_benchmarks.py --sites 200 --output results.json
+    python benchmarks/run_benchmarks.py --baseline results.json   # exit code 1 on a regression
+
+Each collector runs in its own process (so peak RSS is its own) with the
+search engine replaced by StubSearch, and reports URLs/sec, per-site latency
+percentiles, bytes sent by the server, peak RSS and extraction precision/recall.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import generate_corpus
+from server import CorpusServer, unused_port
+from stubs import StubSearch
+
+TARGETS = ('scraper', 'broken')
+
+# Allowed change against a baseline before it counts as a regression
+DEFAULT_TOLERANCE = 0.2  # Relative, for speed, latency, bytes and memory
+QUALITY_TOLERANCE = 0.01  # Absolute, for precision and recall
+
+def _normalize_email(email):
+    return email.strip().lower() if email else None
+
+def _normalize_phone(phone):
+    digits = re.sub(r'\D', '', phone) if phone else ''
+    return digits[-10:] or None
+
+def precision_recall(pairs):
+    """Precision and recall of (expected, extracted) pairs, where None means nothing."""
+    true_positives = false_positives = false_negatives = 0
+    for expected, extracted in pairs:
+        if extracted is not None and extracted == expected:
+            true_positives += 1
+            continue
+        if extracted is not None:
+            false_positives += 1
+        if expected is not None:
+            false_negatives += 1
+    precision = true_positives / (true_positives + false_positives) if true_positives + false_positives else 1.0
+    recall = true_positives / (true_positives + false_negatives) if true_positives + false_negatives else 1.0
+    return round(precision, 4), round(recall, 4)
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(math.ceil(fraction * len(values))) - 1)]
+
+def run_target(target, corpus, workers, parse_processes):
+    """Run one collector over the corpus in this process and return its metrics."""
+    urls = [site['url'] for site in corpus]
+    timings = {}  # url -> seconds spent checking the site
+    outputs = {}  # url -> (reported broken, email, phone)
+
+    def timed(check, record):
+        def timed_check(url):
+            start = time.perf_counter()
+            result = check(url)
+            timings[url] = time.perf_counter() - start
+            outputs[url] = record(result)
+            return result
+        return timed_check
+
+    # The collectors write their logs and databases to the working directory
+    os.chdir(tempfile.mkdtemp(prefix=f"benchmark-{target}-"))
+    start = time.perf_counter()
+    if target == 'scraper':
+        import scraper
+        zones = list(scraper.ENGLISH_SPEAKING_REGIONS)
+        locations = {scraper.get_location_name(zone) for zone in zones} - {"United Kingdom"}
+        scraper.search = StubSearch(urls)
+        scraper.SEARCH_INTERVAL = 0
+        scraper.get_time_zones_in_range = lambda **kwargs: zones
+        scraper.check_business_website = timed(
+            scraper.check_business_website, lambda result: (None, result[1].email, result[1].phone)
+        )
+        scraper.collect_business_contacts(
+            num_results=math.ceil(len(urls) / (3 + len(locations))),  # The UK gets three times as many
+            max_contacts=len(urls), workers=workers, resume=False, parse_processes=parse_processes,
+        )
+    else:
+        import broken_website_collector as broken
+        broken.search = StubSearch(urls, per_query=math.ceil(len(urls) / len(broken.COMPANY_SEARCH_QUERIES)))
+        broken.SEARCH_INTERVAL = 0
+        broken.check_broken_website = timed(
+            broken.check_broken_website,
+            lambda result: (
+                result[0].broken,
+                result[1].email if result[1] else None,
+                result[1].phone if result[1] else None,
+            )
+        )
+        broken.find_broken_websites_with_contacts(
+            max_websites=len(urls), max_contacts=len(urls), workers=workers, resume=False,
+            parse_processes=parse_processes,
+        )
+    elapsed = time.perf_counter() - start
+
+    # Sites the broken collector should report are only the broken ones
+    sites = [site for site in corpus if target == 'scraper' or site['broken']]
+    emails = []
+    phones = []
+    for site in sites:
+        _, email, phone = outputs.get(site['url'], (None, None, None))
+        emails.append((_normalize_email(site['expected_email']), _normalize_email(email)))
+        phones.append((_normalize_phone(site['expected_phone']), _normalize_phone(phone)))
+
+    latencies = list(timings.values())
+    metrics = {
+        'sites': len(urls),
+        'checked': len(timings),
+        'elapsed': round(elapsed, 3),
+        'urls_per_sec': round(len(timings) / elapsed, 3) if elapsed else None,
+        'p50_latency': round(percentile(latencies, 0.50), 4) if latencies else None,
+        'p99_latency': round(percentile(latencies, 0.99), 4) if latencies else None,
+        # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    metrics['email_precision'], metrics['email_recall'] = precision_recall(emails)
+    metrics['phone_precision'], metrics['phone_recall'] = precision_recall(phones)
+    if target == 'broken':
+        metrics['broken_precision'], metrics['broken_recall'] = precision_recall(
+            (True if site['broken'] else None, True if outputs.get(site['url'], (None,))[0] else None)
+            for site in corpus
+        )
+    return metrics
+
+# Metrics where a higher value is a regression, and where a lower one is
+HIGHER_IS_WORSE = ('p50_latency', 'p99_latency', 'peak_rss_mb', 'bytes_sent')
+LOWER_IS_WORSE = ('urls_per_sec',)
+
+def find_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compare results to a baseline and return a description of every regression."""
+    regressions = []
+    for target, metrics in results.items():
+        old = baseline.get(target)
+        if not old:
+            continue
+        for name, value in metrics.items():
+            previous = old.get(name)
+            if value is None or previous is None:
+                continue
+            if name in HIGHER_IS_WORSE and value > previous * (1 + tolerance):
+                regressions.append(f"{target} {name}: {previous} -> {value}")
+            elif name in LOWER_IS_WORSE and value < previous * (1 - tolerance):
+                regressions.append(f"{target} {name}: {previous} -> {value}")
+            elif name.endswith(('_precision', '_recall')) and value < previous - QUALITY_TOLERANCE:
+                regressions.append(f"{target} {name}: {previous} -> {value}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the collectors against a local generated corpus.")
+    parser.add_argument("--sites", type=int, default=200, help="number of sites in the corpus")
+    parser.add_argument("--seed", type=int, default=1, help="corpus random seed")
+    parser.add_argument("--workers", type=int, default=10, help="concurrent website checks")
+    parser.add_argument("--parse-processes", type=int, default=0, help="parse processes (0 = parse in threads)")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against; exit code 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed relative slowdown")
+    # Internal: run one target in this process against an already running server
+    parser.add_argument("--child", choices=TARGETS, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--refused-port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        corpus = generate_corpus(args.sites, args.port, args.refused_port, args.seed)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            metrics = run_target(args.child, corpus, args.workers, args.parse_processes)
+        print(json.dumps(metrics))
+        return
+
+    server = CorpusServer().start()
+    refused_port = unused_port()
+    corpus = generate_corpus(args.sites, server.port, refused_port, args.seed)
+    server.load(corpus)
+
+    results = {}
+    for target in args.targets:
+        print(f"Running {target} over {args.sites} sites...")
+        server.reset_counters()
+        process = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", target,
+             "--port", str(server.port), "--refused-port", str(refused_port),
+             "--sites", str(args.sites), "--seed", str(args.seed),
+             "--workers", str(args.workers), "--parse-processes", str(args.parse_processes)],
+            stdout=subprocess.PIPE, text=True, check=True,
+        )
+        metrics = json.loads(process.stdout.strip().splitlines()[-1])
+        metrics['bytes_sent'] = server.bytes_sent
+        results[target] = metrics
+        for name, value in metrics.items():
+            print(f"  {name}: {value}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+if __name__ == "__main__":
+    main()
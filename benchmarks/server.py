@@ -0,0 +1,96 @@
+import http.server
+import socket
+import socketserver
+import threading
+import time
+
+WRITE_CHUNK_SIZE = 64 * 1024
+
+class CorpusRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the pages of the corpus site named by the request's Host header."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _site(self):
+        host = (self.headers.get('Host') or '').rsplit(':', 1)[0]
+        return self.server.sites.get(host)
+
+    def _respond(self, include_body):
+        site = self._site()
+        if site is not None and site['delay']:
+            time.sleep(site['delay'])
+        path = self.path.split('?')[0]
+        if site is None or path not in site['pages']:
+            status, html = 404, "<html><body>Not found</body></html>"
+        else:
+            status, html = site['pages'][path]
+        body = html.encode('utf-8')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if include_body:
+                # Written in chunks so a client that stops reading early is only charged for what it got
+                for start in range(0, len(body), WRITE_CHUNK_SIZE):
+                    chunk = body[start:start + WRITE_CHUNK_SIZE]
+                    self.wfile.write(chunk)
+                    self.server.count_bytes(len(chunk))
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up (timeouts, early stop on huge pages)
+
+    def do_GET(self):
+        self._respond(include_body=True)
+
+    def do_HEAD(self):
+        self._respond(include_body=False)
+
+    def flush_headers(self):
+        if hasattr(self, '_headers_buffer'):
+            self.server.count_bytes(sum(len(line) for line in self._headers_buffer))
+        super().flush_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+class CorpusServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """Local HTTP server for a generated corpus, counting the bytes it sends.
+
+    Every site has its own loopback address, so the server listens on all
+    interfaces and tells sites apart by the Host header.
+    """
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, port=0):
+        self.sites = {}
+        self.bytes_sent = 0
+        self._bytes_lock = threading.Lock()
+        super().__init__(('0.0.0.0', port), CorpusRequestHandler)
+
+    def load(self, corpus):
+        """Serve the sites of a corpus (generated for this server's port)."""
+        self.sites = {site['host']: site for site in corpus}
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def count_bytes(self, count):
+        with self._bytes_lock:
+            self.bytes_sent += count
+
+    def reset_counters(self):
+        with self._bytes_lock:
+            self.bytes_sent = 0
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+def unused_port():
+    """Return a local port that nothing is listening on (used for 'connection refused' sites)."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
@@ -0,0 +1,26 @@
+import threading
+
+class StubSearch:
+    """Drop-in replacement for googlesearch.search that hands out URLs from a corpus.
+
+    Every new query gets the next slice of the corpus (of per_query URLs, or
+    the number of results asked for), and repeating a query returns the same
+    slice, so a collector sees each site once and no network is needed.
+    """
+
+    def __init__(self, urls, per_query=None):
+        self.urls = list(urls)
+        self.per_query = per_query
+        self.queries = []
+        self._next = 0
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, query, num=10, stop=None, pause=2.0, **kwargs):
+        with self._lock:
+            self.queries.append(query)
+            if query not in self._results:
+                count = self.per_query or stop or num
+                self._results[query] = self.urls[self._next:self._next + count]
+                self._next += count
+            return iter(self._results[query])
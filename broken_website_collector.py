@@ -1,17 +1,52 @@
-import requests
 from googlesearch import search
 import pytz
 from datetime import datetime
 import re
-from bs4 import BeautifulSoup
-import os
 import random
+import argparse
 import time
 import csv
+import io
+import itertools
+from extractor import first_email, first_phone
+from parse_pool import parse_page, configure_parse_pool, close_parse_pool
+from contact_crawler import crawl_contact_pages
+from fetcher import fetch_page, get_scheduler, configure_cache
+from scheduler import SEARCH_URL
+from url_utils import url_host
+from probe import probe_website, status_from_result
+from worker_pool import imap_ordered, DEFAULT_WORKERS
+from search_cache import get_search_cache, configure_search_cache
+from seen_index import SeenIndex
+from run_state import RunState
+from dns_cache import configure_resolver, get_resolver, DEFAULT_DNS_CACHE_FILE
+from result_writer import get_writer, close_writer
+from task_queue import Coordinator, open_task_queue
+from result_store import ResultStore, SinkGroup, StoredResults, DEFAULT_RESULTS_FILE
+from logger import get_logger
+from metrics import configure_metrics, get_metrics, timer
+from timeout_policy import reset_timeout_policy
+from seed_list import iter_seed_urls
+from site_status import SiteStatusStore, Site, status_change, BROKEN, NEWLY_BROKEN, STILL_BROKEN, RECOVERED, STILL_WORKING
+from records import BROKEN_WEBSITE, ContactInfo, ResultRecord, Status, make_record
+
+logger = get_logger("broken_websites")
+# Per-website lines - silence them with configure_logging(site_level="WARNING")
+site_logger = get_logger("sites")
 
 # File to log broken websites with contact info
 BROKEN_WEBSITES_LOG = "broken_websites_contacts.csv"
+CSV_FIELDNAMES = ['URL', 'Company', 'Status Code', 'Reason', 'Email', 'Phone', 'Timestamp']
 BROKEN_WEBSITES_SUMMARY = "broken_websites_summary.txt"
+# Changes found by the last re-check of known broken websites
+BROKEN_WEBSITES_CHANGES = "broken_websites_changes.csv"
+CHANGE_FIELDNAMES = ['URL', 'Company', 'Change', 'Status Code', 'Reason', 'Email', 'Phone', 'Timestamp']
+# Index of domains already checked in earlier runs (used with skip_seen=True)
+SEEN_INDEX_FILE = "broken_websites_seen.sqlite"
+# Work queue and progress of the current run, used to resume after a crash
+RUN_STATE_FILE = "broken_websites_state.sqlite"
+# Name of this collector's queue when websites are checked by worker processes
+TASK_QUEUE_NAME = "broken_websites"
 
 # Updated list to focus on small to medium companies in Singapore, Philippines, and Malaysia
 COMPANY_SEARCH_QUERIES = [
@@ -32,65 +67,59 @@ COMPANY_SEARCH_QUERIES = [
     "local business Malaysia"
 ]
 
+# Minimum seconds between two search queries, and how long to back off after a search error
+SEARCH_INTERVAL = 10
+SEARCH_ERROR_BACKOFF = 60
+
+def search_company_websites(query, num_results):
+    """Run a single search query, spacing queries out to avoid rate limiting"""
+    # The scheduler only sleeps for whatever part of the interval hasn't already passed
+    scheduler = get_scheduler()
+    scheduler.set_interval(url_host(SEARCH_URL), SEARCH_INTERVAL)
+    scheduler.wait_for_host(SEARCH_URL)
+    with timer("search"):
+        return list(search(query, num=num_results, stop=num_results, pause=3.0))
+
 def get_company_websites(num_results=20):
-    """Get a list of small to medium company websites from Singapore, Philippines, and Malaysia"""
+    """Get a list of small to medium company websites from Singapore, Philippines, and Malaysia
+
+    Each query is searched at most once per run (and not at all while it is in the search cache).
+    """
     all_websites = []
+    search_cache = get_search_cache()
     
     for query in COMPANY_SEARCH_QUERIES:
         try:
-            print(f"\nSearching for: {query}")
-            results = []
-            for result in search(query, num=num_results, stop=num_results, pause=3.0):
-                results.append(result)
-                print(f"Found: {result}")
-                # Increased delay between searches to avoid rate limiting
-                time.sleep(1.5)
+            logger.info(f"\nSearching for: {query}")
+            results = search_cache.search(query, num_results, lambda: search_company_websites(query, num_results))
+            for result in results:
+                site_logger.info("Found: %s", result)
                 
             all_websites.extend(results)
-            print(f"Found {len(results)} websites for query: {query}")
-            
-            # Take a longer break between queries to avoid rate limiting
-            time.sleep(10)
+            logger.info(f"Found {len(results)} websites for query: {query}")
                 
         except Exception as e:
-            print(f"Error searching for {query}: {e}")
-            print("Waiting 60 seconds before continuing...")
-            time.sleep(60)  # Wait longer if we hit an error
+            logger.warning(f"Error searching for {query}: {e}")
+            logger.warning(f"Backing off searches for {SEARCH_ERROR_BACKOFF} seconds...")
+            get_scheduler().defer(SEARCH_URL, SEARCH_ERROR_BACKOFF)  # Wait longer if we hit an error
             
-    print(f"\nTotal websites collected: {len(all_websites)}")
+    logger.info(f"\nTotal websites collected: {len(all_websites)}")
     return all_websites
 
-def check_website_status(url):
-    """Check if a website is broken and return status details"""
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, timeout=10, headers=headers, allow_redirects=True)
-        
-        # Consider 4xx and 5xx as broken
-        if 400 <= response.status_code < 600:
-            return {
-                "status": "Broken", 
-                "code": response.status_code, 
-                "reason": response.reason
-            }
-        else:
-            return {
-                "status": "Working", 
-                "code": response.status_code, 
-                "reason": response.reason
-            }
-    except requests.exceptions.RequestException as e:
-        # Connection errors, timeouts, etc.
-        return {
-            "status": "Broken", 
-            "code": "Connection Error", 
-            "reason": str(e)
-        }
+def check_website_status(url, result=None):
+    """Check if a website is broken and return status details
+
+    If a FetchResult for the URL is passed in, it is used instead of fetching again.
+    """
+    if result is None:
+        result = fetch_page(url)
+    return status_from_result(result)
 
-def extract_contact_info(url):
-    """Extract contact information from a website or WHOIS data"""
+def extract_contact_info(url, result=None):
+    """Extract contact information from a website or WHOIS data, as ContactInfo
+
+    If a FetchResult for the URL is passed in, its body is reused instead of fetching again.
+    """
     email = None
     phone = None
     company_name = None
@@ -101,234 +130,484 @@ def extract_contact_info(url):
         company_name = url_parts[-2].capitalize()  # Use domain name as company name
     
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
         # Try to access the site even if broken - sometimes we can still get the HTML
         try:
-            response = requests.get(url, timeout=10, headers=headers)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            if result is None:
+                result = fetch_page(url)
+            if result.error is not None:
+                raise result.error
+            page_info = parse_page(result.text, result.final_url)
             
             # Try to extract company name from title if available
-            if soup.title and soup.title.string:
-                company_name = soup.title.string.strip()
+            if page_info["title"]:
+                company_name = page_info["title"].strip()
                 # Clean up common title patterns
                 company_name = re.sub(r' - Home$| - Official Website$| - Official Site$', '', company_name)
                 company_name = re.sub(r' \| .*$', '', company_name)
             
-            # Extract text content
-            text = soup.get_text()
-            
-            # Find emails using regex
-            email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-            emails = re.findall(email_pattern, text)
-            if emails:
-                # Filter out common false positives
-                filtered_emails = [e for e in emails if not (e.endswith('.png') or e.endswith('.jpg') or e.endswith('.gif'))]
-                if filtered_emails:
-                    email = filtered_emails[0]  # Take the first valid email found
-            
-            # Find phone numbers using regex (improved pattern)
-            phone_pattern = r'(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
-            phones = re.findall(phone_pattern, text)
-            if phones:
-                phone = phones[0]  # Take the first phone found
+            email = first_email(page_info)  # Take the first valid email found
+            phone = first_phone(page_info)  # Take the first phone found
                 
             # Try to look specifically in contact-related pages if we didn't find info
-            if not email or not phone:
-                contact_links = []
-                for link in soup.find_all('a', href=True):
-                    href = link['href'].lower()
-                    if 'contact' in href or 'about' in href:
-                        if href.startswith('http'):
-                            contact_links.append(href)
-                        elif href.startswith('/'):
-                            # Handle relative URLs
-                            base_url = '/'.join(url.split('/')[:3])  # Get domain part
-                            contact_links.append(base_url + href)
-                
-                # Visit up to 2 contact-related pages
-                for contact_url in contact_links[:2]:
-                    try:
-                        contact_response = requests.get(contact_url, timeout=5, headers=headers)
-                        contact_soup = BeautifulSoup(contact_response.text, 'html.parser')
-                        contact_text = contact_soup.get_text()
-                        
-                        # Look for email
-                        if not email:
-                            contact_emails = re.findall(email_pattern, contact_text)
-                            filtered_contact_emails = [e for e in contact_emails if not (e.endswith('.png') or e.endswith('.jpg') or e.endswith('.gif'))]
-                            if filtered_contact_emails:
-                                email = filtered_contact_emails[0]
-                                
-                        # Look for phone
-                        if not phone:
-                            contact_phones = re.findall(phone_pattern, contact_text)
-                            if contact_phones:
-                                phone = contact_phones[0]
-                                
-                        # If we found both, we can stop
-                        if email and phone:
-                            break
-                    except:
-                        continue
+            email, phone = crawl_contact_pages(page_info, email, phone)
         except:
             # If we can't access the site, we'll try other methods
             pass
             
     except Exception as e:
-        print(f"Error extracting contact info from {url}: {str(e)}")
+        site_logger.warning("Error extracting contact info from %s: %s", url, e)
     
-    return {
-        "company_name": company_name,
-        "email": email,
-        "phone": phone
-    }
+    return ContactInfo(company_name, email, phone)
 
-def log_broken_website(url, status, contact_info):
-    """Log broken website information to a CSV file"""
-    file_exists = os.path.isfile(BROKEN_WEBSITES_LOG)
-    
-    with open(BROKEN_WEBSITES_LOG, 'a', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['URL', 'Company', 'Status Code', 'Reason', 'Email', 'Phone', 'Timestamp']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        
-        if not file_exists:
-            writer.writeheader()
-        
-        writer.writerow({
-            'URL': url,
-            'Company': contact_info["company_name"] if contact_info["company_name"] else "Unknown",
-            'Status Code': status["code"],
-            'Reason': status["reason"],
-            'Email': contact_info["email"] if contact_info["email"] else "Not found",
-            'Phone': contact_info["phone"] if contact_info["phone"] else "Not found",
-            'Timestamp': datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
-        })
+def csv_line(row=None, fieldnames=CSV_FIELDNAMES):
+    """Format one CSV row (or the header row if none is given) as a line of text."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    if row is None:
+        writer.writeheader()
+    else:
+        writer.writerow(row)
+    return buffer.getvalue()
+
+def broken_website_line(url, company, status_code, reason, email, phone, timestamp):
+    """Format one row of the broken websites CSV log."""
+    return csv_line({
+        'URL': url,
+        'Company': company if company else "Unknown",
+        'Status Code': status_code,
+        'Reason': reason,
+        'Email': email if email else "Not found",
+        'Phone': phone if phone else "Not found",
+        'Timestamp': timestamp
+    })
+
+def log_broken_website(url, status, contact_info, timestamp=None):
+    """Log broken website information to a CSV file (written in batches by a background writer)"""
+    if timestamp is None:
+        timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+    with timer("log"):
+        get_writer(BROKEN_WEBSITES_LOG, header=csv_line()).write(broken_website_line(
+            url, contact_info.company_name, status.code, status.reason, contact_info.email, contact_info.phone, timestamp
+        ))
+
+def restore_broken_websites_log(records):
+    """Log the broken websites of a resumed run that never reached the CSV log before it was interrupted.
 
-def create_summary(broken_websites):
-    """Create a summary of broken websites with contact information"""
+    The log is started again by every fresh run, so each row in it belongs
+    to this run; a record whose URL has no row is written again.
+    """
+    writer = get_writer(BROKEN_WEBSITES_LOG, header=csv_line())
+    writer.checkpoint()
+    with open(BROKEN_WEBSITES_LOG, newline='', encoding='utf-8') as csvfile:
+        logged = {row['URL'] for row in csv.DictReader(csvfile)}
+    for record in records:
+        if record.url not in logged:
+            writer.write(broken_website_line(
+                record.url, record.company, record.status_code, record.reason, record.email, record.phone,
+                record.timestamp
+            ))
+
+def create_summary(broken_websites, store, run_id):
+    """Create a summary of broken websites with contact information from the run's records in the store"""
+    summary = store.summary(BROKEN_WEBSITE, run_id)
     with open(BROKEN_WEBSITES_SUMMARY, 'w', encoding='utf-8') as f:
         f.write(f"# Broken Websites Summary - Generated {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}\n\n")
         
         f.write(f"Total websites checked: {broken_websites['total_checked']}\n")
         f.write(f"Total broken websites found: {broken_websites['total_broken']}\n")
-        f.write(f"Broken websites with contact information: {broken_websites['with_contact']}\n\n")
+        f.write(f"Broken websites with contact information: {summary['total']}\n")
+        f.write(f"- With email: {summary['with_email']}\n")
+        f.write(f"- With phone: {summary['with_phone']}\n\n")
+        
+        if summary['by_status']:
+            f.write("## Broken Websites by Status\n\n")
+            for code, reason, count in summary['by_status']:
+                f.write(f"- {code} {reason}: {count}\n")
+            f.write("\n")
         
         f.write("## Broken Websites with Contact Information\n\n")
         
-        for website in broken_websites['websites']:
-            f.write(f"### {website['company_name'] if website['company_name'] else 'Unknown Company'}\n")
-            f.write(f"- URL: {website['url']}\n")
-            f.write(f"- Status: {website['status']['code']} {website['status']['reason']}\n")
+        for record in store.records(BROKEN_WEBSITE, run_id):
+            f.write(f"### {record.company if record.company else 'Unknown Company'}\n")
+            f.write(f"- URL: {record.url}\n")
+            f.write(f"- Status: {record.status_code} {record.reason}\n")
             
-            if website['contact_info']['email']:
-                f.write(f"- Email: {website['contact_info']['email']}\n")
+            if record.email:
+                f.write(f"- Email: {record.email}\n")
             else:
                 f.write("- Email: Not found\n")
                 
-            if website['contact_info']['phone']:
-                f.write(f"- Phone: {website['contact_info']['phone']}\n")
+            if record.phone:
+                f.write(f"- Phone: {record.phone}\n")
             else:
                 f.write("- Phone: Not found\n")
                 
             f.write("\n")
 
-def find_broken_websites_with_contacts(max_websites=100, max_contacts=15):
-    """Find broken websites and collect their contact information"""
-    print(f"Collecting company websites... This may take some time.")
-    
-    # Initialize empty CSV file
-    with open(BROKEN_WEBSITES_LOG, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['URL', 'Company', 'Status Code', 'Reason', 'Email', 'Phone', 'Timestamp']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
+def check_broken_website(url):
+    """Probe a website and extract contact info if it is broken"""
+    # DNS, connect and HEAD first - the page is only downloaded if the site looks broken,
+    # and that download is reused for contact extraction
+    with timer("website", url_host(url)):
+        status, result = probe_website(url)
+        
+        contact_info = None
+        if status.broken:
+            contact_info = extract_contact_info(url, result)
+    
+    return status, contact_info
+
+def decode_broken_check(result):
+    """Rebuild a check_broken_website (or recheck_website) result read back from the task queue."""
+    status, contact_info = result
+    return Status.from_json(status), ContactInfo.from_json(contact_info)
+
+def find_broken_websites_with_contacts(max_websites=100, max_contacts=15, workers=DEFAULT_WORKERS, use_cache=False, skip_seen=False, resume=True, sinks=(), task_queue=None, parse_processes=0, metrics_file=None, profile_stages=(), seeds=None, seed_column=None):
+    """Find broken websites and collect their contact information
+
+    Websites are checked concurrently by up to `workers` threads; results are
+    processed in list order, so stopping at max_contacts behaves like a sequential run.
+    Repeat requests to the same host are spaced out by the shared HostScheduler.
+    With use_cache=True, responses, search results and DNS lookups are kept on disk between runs.
+    A website whose domain was already checked is skipped; with skip_seen=True
+    this also covers domains checked in earlier runs.
+    Progress is checkpointed to RUN_STATE_FILE after every website; with resume=True
+    an interrupted run continues where it stopped instead of searching again.
+    Broken websites with contact information are streamed to the result store
+    (DEFAULT_RESULTS_FILE) and to any extra sinks (paths ending in .jsonl,
+    .parquet, .sqlite or sink objects); the returned 'websites' reads them back
+    from the store.
+    With task_queue (a SQLite queue file or redis:// URL), websites are checked
+    by worker processes (see worker.py) instead of local threads; this process
+    coordinates them, logs every result once and stops them at max_contacts.
+    With parse_processes > 0, pages are parsed in that many processes instead
+    of in the fetching threads.
+    With metrics_file, per-stage latency and byte histograms (overall and per
+    host) are written to it at the end, as JSON if it ends with .json and in
+    the Prometheus text format otherwise; stages in profile_stages (e.g.
+    "parse") are also profiled with cProfile next to it.
+    With seeds (a seed file path or a list of them: .txt, .csv, .jsonl, any
+    of them gzipped), websites are streamed from the files in file order
+    instead of searched for and shuffled; seed_column names the CSV column or
+    JSON key holding the URL. See seed_list.iter_seed_urls.
+    """
+    if metrics_file:
+        configure_metrics(profile_stages=profile_stages)
+    # Timeouts adapt to this run's latencies and failing domains are remembered for this run only
+    reset_timeout_policy()
+    
+    if use_cache:
+        configure_cache()
+        configure_search_cache()
+        configure_resolver(path=DEFAULT_DNS_CACHE_FILE)
     
-    # Get company websites
-    websites = get_company_websites(num_results=20)
+    if parse_processes:
+        configure_parse_pool(processes=parse_processes)
+    
+    run_state = RunState(RUN_STATE_FILE, resume=resume)
+    # A seed list can be any length, so its claimed sites are kept in the state file rather than in memory
+    seen_index = SeenIndex(SEEN_INDEX_FILE if skip_seen else None, claims=run_state if seeds is not None else None)
+    store = ResultStore(DEFAULT_RESULTS_FILE)
+    output = SinkGroup([store] + list(sinks))
+    coordinator = None
+    if task_queue is not None:
+        coordinator = Coordinator(open_task_queue(task_queue, TASK_QUEUE_NAME))
+        # A fresh run empties the queue; a resumed one keeps its tasks and results
+        coordinator.start(run_state.run_id)
     
     # Check website status and collect contact information
-    broken_websites_data = {
+    broken_websites_data = run_state.load_counters({
         'total_checked': 0,
         'total_broken': 0,
         'with_contact': 0,
-        'websites': []
-    }
+    })
+    
+    if run_state.resumed:
+        logger.info(f"Resuming interrupted run: {broken_websites_data['total_checked']} websites already checked.")
+        # Records and CSV rows are written in batches, so restore any that were lost with the interrupted run
+        records = [ResultRecord.from_json(record) for record in run_state.results()]
+        output.restore(records)
+        restore_broken_websites_log(records)
+    else:
+        # Initialize empty CSV file
+        close_writer(BROKEN_WEBSITES_LOG)
+        with open(BROKEN_WEBSITES_LOG, 'w', newline='', encoding='utf-8') as csvfile:
+            csvfile.write(csv_line())
+    
+    # A run interrupted before its websites were queued searches (or reads the seeds) again on resume
+    if seeds is not None:
+        if not run_state.step_done("seeds"):
+            # Stream the seed list straight into the work queue (deduped there) - no search, no shuffle
+            logger.info("Reading websites from the seed list...")
+            run_state.enqueue(iter_seed_urls(seeds, column=seed_column), step="seeds")
+    elif not run_state.step_done("search"):
+        logger.info(f"Collecting company websites... This may take some time.")
+        
+        # Get company websites
+        websites = get_company_websites(num_results=20)
+        
+        # Shuffle the websites list to get a random sample
+        random.shuffle(websites)
+        
+        # Save the shuffled order so a resumed run checks the same websites
+        run_state.enqueue(websites, step="search")
+    
+    remaining_websites = max(0, max_websites - broken_websites_data['total_checked'])
+    if broken_websites_data['with_contact'] >= max_contacts:
+        remaining_websites = 0
+    
+    logger.info("\nChecking website status and collecting contact information...")
+    
+    if seeds is not None:
+        # Read the queue a page at a time; hosts are resolved as their sites are checked
+        websites = run_state.iter_pending()
+    else:
+        websites = run_state.pending()
+        # Resolve every host in parallel up front; dead domains are then classified instantly
+        get_resolver().prefetch(url_host(url) for url in websites[:remaining_websites])
     
-    print("\nChecking website status and collecting contact information...")
+    # Only new sites count towards max_websites
+    new_websites = itertools.islice(seen_index.filter_new(websites), remaining_websites)
     
-    # Shuffle the websites list to get a random sample
-    random.shuffle(websites)
+    def check_queued_website(url):
+        run_state.mark_in_flight(url)
+        return check_broken_website(url)
     
-    for url in websites[:max_websites]:
+    if coordinator is not None:
+        # Keep no more websites queued than there are contacts still wanted
+        results = coordinator.imap(
+            new_websites, decode=decode_broken_check,
+            budget=lambda: max_contacts - broken_websites_data['with_contact'],
+        )
+    else:
+        results = imap_ordered(check_queued_website, new_websites, workers)
+    
+    for url, (status, contact_info) in results:
         broken_websites_data['total_checked'] += 1
+        seen_index.mark(url)
+        record = None
         
-        print(f"\nChecking: {url}")
-        status = check_website_status(url)
+        site_logger.info("\nChecking: %s", url)
         
-        if status["status"] == "Broken":
+        if status.broken:
             broken_websites_data['total_broken'] += 1
-            print(f"❌ Broken website found: {url} - {status['code']} {status['reason']}")
+            site_logger.info("❌ Broken website found: %s - %s %s", url, status.code, status.reason)
             
-            # Extract contact information
-            print(f"Attempting to extract contact information...")
-            contact_info = extract_contact_info(url)
-            
-            if contact_info["email"] or contact_info["phone"]:
+            if contact_info.found:
                 broken_websites_data['with_contact'] += 1
-                print(f"✅ Contact information found!")
-                if contact_info["email"]:
-                    print(f"   Email: {contact_info['email']}")
-                if contact_info["phone"]:
-                    print(f"   Phone: {contact_info['phone']}")
+                site_logger.info("✅ Contact information found!")
+                if contact_info.email:
+                    site_logger.info("   Email: %s", contact_info.email)
+                if contact_info.phone:
+                    site_logger.info("   Phone: %s", contact_info.phone)
                 
                 # Log to CSV
-                log_broken_website(url, status, contact_info)
-                
-                # Add to list for summary
-                broken_websites_data['websites'].append({
-                    'url': url,
-                    'company_name': contact_info["company_name"],
-                    'status': status,
-                    'contact_info': contact_info
-                })
+                timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+                log_broken_website(url, status, contact_info, timestamp)
                 
-                # Stop if we've collected enough contacts
-                if broken_websites_data['with_contact'] >= max_contacts:
-                    print(f"\nReached the maximum of {max_contacts} broken websites with contact information. Stopping.")
-                    break
+                # Stream to the result store and sinks
+                record = make_record(
+                    BROKEN_WEBSITE, run_state.run_id, url,
+                    timestamp=timestamp,
+                    company=contact_info.company_name,
+                    status_code=status.code,
+                    reason=status.reason,
+                    email=contact_info.email,
+                    phone=contact_info.phone,
+                )
+                output.write(record)
             else:
-                print(f"❌ No contact information found.")
+                site_logger.info("❌ No contact information found.")
         else:
-            print(f"✓ Website working: {url} - {status['code']} {status['reason']}")
+            site_logger.info("✓ Website working: %s - %s %s", url, status.code, status.reason)
         
-        # Small delay between checks
-        time.sleep(1)
+        # Checkpoint the website, its result and the counters together
+        # (a CSV row still waiting in its batch is rebuilt from the record on resume)
+        run_state.mark_done(url, record, counters=broken_websites_data)
+        
+        # Stop if we've collected enough contacts
+        if broken_websites_data['with_contact'] >= max_contacts:
+            logger.info(f"\nReached the maximum of {max_contacts} broken websites with contact information. Stopping.")
+            break
+    
+    # Everything logged has to be on disk before the run counts as finished
+    close_writer(BROKEN_WEBSITES_LOG)
+    output.flush()
+    if coordinator is not None:
+        coordinator.stop()
+        coordinator.task_queue.close()
+    run_state.finish()
+    run_id = run_state.run_id
+    run_state.close()
+    seen_index.close()
+    if parse_processes:
+        close_parse_pool()
     
     # Create summary
-    create_summary(broken_websites_data)
+    create_summary(broken_websites_data, store, run_id)
+    output.close()
+    if metrics_file:
+        get_metrics().export(metrics_file)
     
     # Print summary
-    print("\n--- SUMMARY ---")
-    print(f"Total websites checked: {broken_websites_data['total_checked']}")
-    print(f"Total broken websites found: {broken_websites_data['total_broken']}")
-    print(f"Broken websites with contact information: {broken_websites_data['with_contact']}")
+    logger.info("\n--- SUMMARY ---")
+    logger.info(f"Total websites checked: {broken_websites_data['total_checked']}")
+    logger.info(f"Total broken websites found: {broken_websites_data['total_broken']}")
+    logger.info(f"Broken websites with contact information: {broken_websites_data['with_contact']}")
     
     if broken_websites_data['with_contact'] > 0:
-        print(f"\nResults have been saved to {BROKEN_WEBSITES_LOG} and {BROKEN_WEBSITES_SUMMARY}")
+        logger.info(f"\nResults have been saved to {BROKEN_WEBSITES_LOG} and {BROKEN_WEBSITES_SUMMARY}")
     else:
-        print("\nNo broken websites with contact information found.")
+        logger.info("\nNo broken websites with contact information found.")
+    if metrics_file:
+        logger.info(f"Run metrics have been written to {metrics_file}")
     
+    broken_websites_data['websites'] = StoredResults(DEFAULT_RESULTS_FILE, BROKEN_WEBSITE, run_id)
     return broken_websites_data
 
+def load_known_broken_websites(source=BROKEN_WEBSITES_LOG):
+    """Yield the broken websites found by earlier runs, from their CSV log or a results database.
+
+    Each site is a Site record (its domain is filled in when it is tracked);
+    a URL logged more than once is yielded once per row.
+    """
+    if source.endswith('.csv'):
+        with open(source, newline='', encoding='utf-8') as csvfile:
+            for row in csv.DictReader(csvfile):
+                code = row['Status Code']
+                yield Site(
+                    url=row['URL'],
+                    status=BROKEN,
+                    status_code=int(code) if code.isdigit() else code,
+                    reason=row['Reason'],
+                    company=row['Company'] if row['Company'] != "Unknown" else None,
+                    email=row['Email'] if row['Email'] != "Not found" else None,
+                    phone=row['Phone'] if row['Phone'] != "Not found" else None,
+                    checked_at=row['Timestamp'],
+                )
+    else:
+        store = ResultStore(source)
+        try:
+            for record in store.records(BROKEN_WEBSITE):
+                yield Site(
+                    url=record.url,
+                    status=BROKEN,
+                    status_code=record.status_code,
+                    reason=record.reason,
+                    company=record.company,
+                    email=record.email,
+                    phone=record.phone,
+                    checked_at=record.timestamp,
+                )
+        finally:
+            store.close()
+
+def recheck_website(site):
+    """Probe a known website again, extracting contact info only if it is broken and none is cached"""
+    status, result = probe_website(site.url)
+    
+    contact_info = None
+    if status.broken and not (site.email or site.phone):
+        contact_info = extract_contact_info(site.url, result)
+    
+    return status, contact_info
+
+def recheck_broken_websites(source=BROKEN_WEBSITES_LOG, workers=DEFAULT_WORKERS, sinks=(), metrics_file=None):
+    """Re-probe the websites earlier runs found broken and report only what changed
+
+    Known sites are loaded from source (the CSV log, or a results database
+    such as DEFAULT_RESULTS_FILE) into the site status table, which keeps
+    every site's current status and is updated in place. Every tracked site,
+    including ones that recovered on an earlier re-check, is probed again
+    without searching or crawling; contacts are only extracted for broken
+    sites that have none cached. The changes (newly broken, recovered, still
+    broken) are written to BROKEN_WEBSITES_CHANGES, and the broken sites with
+    contact information are streamed to the result store and sinks as usual.
+    """
+    if metrics_file:
+        configure_metrics()
+    reset_timeout_policy()
+    
+    statuses = SiteStatusStore(DEFAULT_RESULTS_FILE)
+    statuses.add(load_known_broken_websites(source))
+    sites = statuses.sites()
+    run_id = str(time.time())
+    store = ResultStore(DEFAULT_RESULTS_FILE)
+    output = SinkGroup([store] + list(sinks))
+    counters = {'total_checked': 0, NEWLY_BROKEN: 0, STILL_BROKEN: 0, RECOVERED: 0, STILL_WORKING: 0}
+    
+    close_writer(BROKEN_WEBSITES_CHANGES)
+    with open(BROKEN_WEBSITES_CHANGES, 'w', newline='', encoding='utf-8') as csvfile:
+        csvfile.write(csv_line(fieldnames=CHANGE_FIELDNAMES))
+    changes = get_writer(BROKEN_WEBSITES_CHANGES)
+    
+    logger.info(f"Re-checking {len(sites)} known websites...")
+    get_resolver().prefetch(url_host(site.url) for site in sites)
+    
+    for site, (status, contact_info) in imap_ordered(recheck_website, sites, workers):
+        timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+        change = status_change(site.status, status.status)
+        counters['total_checked'] += 1
+        counters[change] += 1
+        
+        contact_info = contact_info or ContactInfo()
+        statuses.update(
+            site.url, status.status, status.code, status.reason, timestamp,
+            company=contact_info.company_name, email=contact_info.email, phone=contact_info.phone,
+        )
+        company = contact_info.company_name or site.company
+        email = contact_info.email or site.email
+        phone = contact_info.phone or site.phone
+        
+        if change == STILL_WORKING:
+            continue
+        site_logger.info("%s: %s - %s %s", change.capitalize(), site.url, status.code, status.reason)
+        changes.write(csv_line({
+            'URL': site.url,
+            'Company': company or "Unknown",
+            'Change': change,
+            'Status Code': status.code,
+            'Reason': status.reason,
+            'Email': email or "Not found",
+            'Phone': phone or "Not found",
+            'Timestamp': timestamp,
+        }, fieldnames=CHANGE_FIELDNAMES))
+        if status.broken and (email or phone):
+            output.write(make_record(
+                BROKEN_WEBSITE, run_id, site.url, timestamp=timestamp, company=company,
+                status_code=status.code, reason=status.reason, email=email, phone=phone,
+            ))
+    
+    close_writer(BROKEN_WEBSITES_CHANGES)
+    statuses.close()
+    output.close()
+    if metrics_file:
+        get_metrics().export(metrics_file)
+    
+    logger.info("\n--- RE-CHECK SUMMARY ---")
+    logger.info(f"Total websites re-checked: {counters['total_checked']}")
+    logger.info(f"Newly broken: {counters[NEWLY_BROKEN]}")
+    logger.info(f"Still broken: {counters[STILL_BROKEN]}")
+    logger.info(f"Recovered: {counters[RECOVERED]}")
+    logger.info(f"\nChanges have been saved to {BROKEN_WEBSITES_CHANGES}")
+    
+    counters['websites'] = StoredResults(DEFAULT_RESULTS_FILE, BROKEN_WEBSITE, run_id)
+    return counters
+
 if __name__ == "__main__":
-    print("Starting broken website collector for small to medium companies in Southeast Asia...")
-    print("This script will:")
-    print("1. Search for small to medium businesses in Singapore, Philippines, and Malaysia")
-    print("2. Check if the websites are broken")
-    print("3. Extract contact information from broken websites")
-    print("4. Stop after collecting information for 15 companies")
+    parser = argparse.ArgumentParser(description="Find broken company websites and their contact details.")
+    parser.add_argument("--use-cache", action="store_true", help="keep responses, search results and DNS lookups on disk")
+    parser.add_argument("--skip-seen", action="store_true", help="skip sites checked in earlier runs")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run instead of starting over")
+    args = parser.parse_args()
+    
+    logger.info("Starting broken website collector for small to medium companies in Southeast Asia...")
+    logger.info("This script will:")
+    logger.info("1. Search for small to medium businesses in Singapore, Philippines, and Malaysia")
+    logger.info("2. Check if the websites are broken")
+    logger.info("3. Extract contact information from broken websites")
+    logger.info("4. Stop after collecting information for 15 companies")
     
     # Start the search
-    find_broken_websites_with_contacts(max_websites=200, max_contacts=15) 
\ No newline at end of file
+    find_broken_websites_with_contacts(max_websites=200, max_contacts=15, workers=DEFAULT_WORKERS,
+                                       use_cache=args.use_cache, skip_seen=args.skip_seen, resume=args.resume) 
\ No newline at end of file
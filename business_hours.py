@@ -0,0 +1,192 @@
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+import pytz
+from logger import get_logger
+
+logger = get_logger("business_hours")
+
+DAY = 24 * 60 * 60
+EPOCH = datetime(1970, 1, 1)
+
+# How far ahead the schedule is precomputed; it is rebuilt when a lookup falls outside it
+DEFAULT_HORIZON = 2 * DAY
+# Zones without transition data are checked by the clock; their local hour can change at any quarter hour
+UNSCHEDULED_CHECK_INTERVAL = 15 * 60
+
+_transition_cache = {}
+
+def has_transitions(tz):
+    """True if a pytz zone exposes the UTC transition data its schedule is precomputed from."""
+    return bool(getattr(tz, '_utc_transition_times', None)) and bool(getattr(tz, '_transition_info', None))
+
+def is_business_hours(tz, start_hour, end_hour, when):
+    """Check a zone's local hour at a UTC timestamp directly (start_hour and end_hour inclusive)."""
+    return start_hour <= datetime.fromtimestamp(when, tz).hour <= end_hour
+
+def _utc_offset_segments(tz, start, end):
+    """Return (segment start, segment end, UTC offset in seconds) tuples covering [start, end) for a zone."""
+    transitions = getattr(tz, '_utc_transition_times', None)
+    if not transitions:
+        # Fixed-offset zone (UTC, Etc/GMT+5, ...)
+        return [(start, end, tz.utcoffset(EPOCH).total_seconds())]
+
+    times = _transition_cache.get(tz.zone)
+    if times is None:
+        times = [(transition - EPOCH).total_seconds() for transition in transitions]
+        _transition_cache[tz.zone] = times
+
+    segments = []
+    i = max(bisect_right(times, start) - 1, 0)
+    segment_start = start
+    while segment_start < end:
+        segment_end = min(times[i + 1], end) if i + 1 < len(times) else end
+        offset = tz._transition_info[i][0].total_seconds()
+        segments.append((segment_start, segment_end, offset))
+        segment_start = segment_end
+        i += 1
+    return segments
+
+def business_hours_intervals(tz, start_hour, end_hour, start, end):
+    """Return the merged UTC (enter, leave) intervals in [start, end) where a zone's local hour is in the window."""
+    open_seconds = start_hour * 60 * 60
+    close_seconds = (end_hour + 1) * 60 * 60  # end_hour itself still counts as business hours
+    intervals = []
+    for segment_start, segment_end, offset in _utc_offset_segments(tz, start, end):
+        local_midnight = (segment_start + offset) // DAY * DAY
+        while True:
+            enter = local_midnight + open_seconds - offset
+            if enter >= segment_end:
+                break
+            leave = local_midnight + close_seconds - offset
+            enter, leave = max(enter, segment_start), min(leave, segment_end)
+            if enter < leave:
+                if intervals and intervals[-1][1] >= enter:
+                    # Window continues across a DST change
+                    intervals[-1] = (intervals[-1][0], leave)
+                else:
+                    intervals.append((enter, leave))
+            local_midnight += DAY
+    return intervals
+
+class BusinessHoursIndex:
+    """Precomputed schedule of when each time zone is in business hours.
+
+    For the next `horizon` seconds the UTC offset transitions of every zone are
+    turned into UTC intervals when its local hour is between start_hour and
+    end_hour (inclusive), and merged into one sorted timeline of the moments
+    the set of zones in business hours changes. "Which zones are in business
+    hours" and "when does a zone next enter or leave the window" are then
+    binary searches instead of a pytz lookup per zone. Times are UTC Unix
+    timestamps. The schedule is rebuilt when a lookup falls outside it.
+    Zones without pytz transition data (fixed-offset ones such as UTC or
+    Etc/GMT-8) aren't scheduled; their local hour is checked directly on
+    each lookup (see is_business_hours).
+    """
+
+    def __init__(self, zones, start_hour=7, end_hour=14, horizon=DEFAULT_HORIZON):
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.horizon = horizon
+        self._lock = threading.Lock()
+        self.zones = []
+        self._timezones = []
+        self._unscheduled = {}  # zone -> tz of the zones checked on each lookup
+        for zone in zones:
+            try:
+                tz = pytz.timezone(zone)
+            except pytz.UnknownTimeZoneError as e:
+                # Skip any timezone that causes errors
+                logger.warning(f"! Error with timezone {zone}: {str(e)}")
+                continue
+            self.zones.append(zone)
+            if has_transitions(tz):
+                self._timezones.append(tz)
+            else:
+                self._unscheduled[zone] = tz
+        self._order = {zone: i for i, zone in enumerate(self.zones)}
+        self._build(time.time())
+
+    def _build(self, now):
+        """Compute the schedule from one day before now until the horizon."""
+        start = now - DAY
+        end = now + self.horizon
+        intervals = {}
+        events = []
+        scheduled = [zone for zone in self.zones if zone not in self._unscheduled]
+        for zone, tz in zip(scheduled, self._timezones):
+            zone_intervals = business_hours_intervals(tz, self.start_hour, self.end_hour, start, end)
+            intervals[zone] = ([enter for enter, _ in zone_intervals], [leave for _, leave in zone_intervals])
+            for enter, leave in zone_intervals:
+                events.append((enter, 1, zone))
+                events.append((leave, -1, zone))
+        events.sort(key=lambda event: (event[0], event[1]))
+
+        # Sweep the events into (time, zones in business hours from then on) steps
+        order = self._order
+        active = set(zone for zone in scheduled if intervals[zone][0] and intervals[zone][0][0] <= start)
+        change_times = [start]
+        active_zones = [tuple(sorted(active, key=order.get))]
+        for when, change, zone in events:
+            if when <= start:
+                continue
+            if change > 0:
+                active.add(zone)
+            else:
+                active.discard(zone)
+            if change_times[-1] == when:
+                active_zones[-1] = tuple(sorted(active, key=order.get))
+            else:
+                change_times.append(when)
+                active_zones.append(tuple(sorted(active, key=order.get)))
+
+        self._schedule = (start, end, intervals, change_times, active_zones)
+
+    def _current_schedule(self, when):
+        with self._lock:
+            start, end = self._schedule[0], self._schedule[1]
+            if not start <= when < end - DAY:
+                # Keep at least a day of lookahead so next-change lookups stay inside the schedule
+                self._build(when)
+            return self._schedule
+
+    def zones_in_hours(self, when=None):
+        """Return the zones in business hours at a UTC timestamp (default now), in the order they were given."""
+        when = time.time() if when is None else when
+        _, _, _, change_times, active_zones = self._current_schedule(when)
+        zones = list(active_zones[bisect_right(change_times, when) - 1])
+        if self._unscheduled:
+            zones.extend(zone for zone, tz in self._unscheduled.items()
+                         if is_business_hours(tz, self.start_hour, self.end_hour, when))
+            zones.sort(key=self._order.get)
+        return zones
+
+    def _next_check(self, when):
+        return (when // UNSCHEDULED_CHECK_INTERVAL + 1) * UNSCHEDULED_CHECK_INTERVAL
+
+    def next_change(self, zone, when=None):
+        """Return (in business hours now, UTC timestamp when that next changes or None) for a zone.
+
+        For an unscheduled zone the timestamp is only when to check it again.
+        """
+        when = time.time() if when is None else when
+        if zone in self._unscheduled:
+            return is_business_hours(self._unscheduled[zone], self.start_hour, self.end_hour, when), self._next_check(when)
+        _, _, intervals, _, _ = self._current_schedule(when)
+        enters, leaves = intervals[zone]
+        i = bisect_right(enters, when) - 1
+        if i >= 0 and when < leaves[i]:
+            return True, leaves[i]
+        return False, enters[i + 1] if i + 1 < len(enters) else None
+
+    def next_event(self, when=None):
+        """Return the UTC timestamp of the next time any zone enters or leaves business hours (None if none soon)."""
+        when = time.time() if when is None else when
+        _, _, _, change_times, _ = self._current_schedule(when)
+        i = bisect_right(change_times, when)
+        next_event = change_times[i] if i < len(change_times) else None
+        if self._unscheduled:
+            next_check = self._next_check(when)
+            next_event = next_check if next_event is None else min(next_event, next_check)
+        return next_event
@@ -0,0 +1,59 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from extractor import first_email, first_phone
+from parse_pool import parse_page
+from fetcher import fetch_page
+from timeout_policy import get_timeout_policy
+from worker_pool import imap_ordered, DEFAULT_WORKERS
+
+# How many of the best contact/about links to fetch per site, and the longest read timeout for them
+DEFAULT_CONTACT_PAGES = 3
+CONTACT_PAGE_TIMEOUT = 5
+
+# Threads shared by the contact page fetches of every site, enough for each default worker's pages at once
+CONTACT_POOL_SIZE = DEFAULT_WORKERS * DEFAULT_CONTACT_PAGES
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_contact_executor():
+    """Return the thread pool shared by the contact page fetches of every site."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=CONTACT_POOL_SIZE, thread_name_prefix="contact")
+    return _executor
+
+def _fetch_contact_page(contact_url):
+    timeout = get_timeout_policy().timeouts(read_limit=CONTACT_PAGE_TIMEOUT)
+    result = fetch_page(contact_url, timeout=timeout, stop_on_contacts=True)
+    return parse_page(result.text, result.final_url)
+
+def crawl_contact_pages(page_info, email=None, phone=None, max_pages=DEFAULT_CONTACT_PAGES):
+    """Fill in a missing email/phone from a site's best-scoring contact and about pages.
+
+    The top max_pages links from page_info["contact_links"] are fetched
+    concurrently and read in priority order, so the result is the same as
+    visiting them one by one; pages that haven't started yet are dropped as
+    soon as both an email and a phone are known. Returns (email, phone).
+    """
+    if email and phone:
+        return email, phone
+
+    links = page_info["contact_links"][:max_pages]
+    pages = imap_ordered(_fetch_contact_page, links, workers=len(links), executor=get_contact_executor())
+    for contact_url, contact_info in pages:
+        # Look for email
+        if not email:
+            email = first_email(contact_info)
+
+        # Look for phone
+        if not phone:
+            phone = first_phone(contact_info)
+
+        # If we found both, we can stop
+        if email and phone:
+            break
+
+    return email, phone
@@ -0,0 +1,165 @@
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from metrics import get_metrics
+
+# Default location and lifetimes of the DNS cache
+DEFAULT_DNS_CACHE_FILE = "dns_cache.sqlite"
+DEFAULT_POSITIVE_TTL = 60 * 60  # Seconds to remember a successful lookup
+DEFAULT_NEGATIVE_TTL = 6 * 60 * 60  # Seconds to remember that a domain doesn't exist
+DEFAULT_LOOKUP_WORKERS = 32  # Parallel lookups when prefetching
+
+# getaddrinfo errors that mean the name doesn't exist (as opposed to a temporary failure)
+NEGATIVE_ERRORS = {
+    getattr(socket, name) for name in ('EAI_NONAME', 'EAI_NODATA') if hasattr(socket, name)
+}
+
+class ResolutionError(OSError):
+    """Raised when a host name can't be resolved (possibly from the negative cache)."""
+
+def system_lookup(host):
+    """Resolve a host name with the system resolver, returning a list of IP addresses."""
+    infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+class Resolver:
+    """Caching DNS resolver with negative caching and parallel prefetching.
+
+    Lookups run on a thread pool, concurrent lookups of the same host share one
+    query, and both answers and "no such domain" results are cached in memory
+    and (if a path is given) in SQLite for later runs. The lookup function can
+    be replaced, e.g. with a stub resolver in tests or benchmarks.
+    """
+
+    def __init__(self, path=None, positive_ttl=DEFAULT_POSITIVE_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL,
+                 lookup=system_lookup, workers=DEFAULT_LOOKUP_WORKERS):
+        self.path = path
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.lookup = lookup
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.RLock()  # Re-entrant: done callbacks may run while it is held
+        self._cache = {}  # host -> (addresses or None, error message or None, expires_at)
+        self._in_flight = {}  # host -> Future of a lookup that is running
+        self._conn = None
+        if path is not None:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._lock, self._conn:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS dns (
+                        host TEXT PRIMARY KEY,
+                        addresses TEXT,
+                        error TEXT,
+                        expires_at REAL
+                    )
+                """)
+
+    def _cached(self, host):
+        """Return the unexpired cache entry for a host, loading it from disk if needed. Caller holds the lock."""
+        entry = self._cache.get(host)
+        if entry is None and self._conn is not None:
+            row = self._conn.execute("SELECT addresses, error, expires_at FROM dns WHERE host = ?", (host,)).fetchone()
+            if row is not None:
+                addresses = row[0].split(",") if row[0] else None
+                entry = (addresses, row[1], row[2])
+                self._cache[host] = entry
+        if entry is not None and entry[2] > time.time():
+            return entry
+        return None
+
+    def _store(self, host, addresses, error, ttl):
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._cache[host] = (addresses, error, expires_at)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO dns VALUES (?, ?, ?, ?)",
+                        (host, ",".join(addresses) if addresses else None, error, expires_at)
+                    )
+
+    def _run_lookup(self, host):
+        try:
+            with get_metrics().timer("dns", host):
+                addresses = self.lookup(host)
+        except socket.gaierror as e:
+            if e.errno in NEGATIVE_ERRORS:
+                self._store(host, None, str(e), self.negative_ttl)
+            raise ResolutionError(f"DNS resolution failed for {host}: {e}") from e
+        except OSError as e:
+            # Temporary failures (timeouts, SERVFAIL) are not cached
+            raise ResolutionError(f"DNS resolution failed for {host}: {e}") from e
+        if not addresses:
+            self._store(host, None, "no addresses", self.negative_ttl)
+            raise ResolutionError(f"DNS resolution failed for {host}: no addresses")
+        self._store(host, addresses, None, self.positive_ttl)
+        return addresses
+
+    def resolve_async(self, host):
+        """Start resolving a host (or join a lookup already running) and return a Future of its addresses."""
+        host = host.lower().rstrip('.')
+        with self._lock:
+            entry = self._cached(host)
+            if entry is not None:
+                get_metrics().count("dns_cache_hits")
+                future = Future()
+                if entry[0] is None:
+                    future.set_exception(ResolutionError(f"DNS resolution failed for {host}: {entry[1]} (cached)"))
+                else:
+                    future.set_result(entry[0])
+                return future
+            future = self._in_flight.get(host)
+            if future is None:
+                future = self._executor.submit(self._run_lookup, host)
+                self._in_flight[host] = future
+                future.add_done_callback(lambda _: self._forget_in_flight(host))
+            return future
+
+    def _forget_in_flight(self, host):
+        with self._lock:
+            self._in_flight.pop(host, None)
+
+    def resolve(self, host):
+        """Resolve a host, returning its addresses or raising ResolutionError."""
+        return self.resolve_async(host).result()
+
+    def prefetch(self, hosts):
+        """Start resolving many hosts in parallel without waiting for the answers."""
+        for host in hosts:
+            if host:
+                self.resolve_async(host)
+
+    def known_unresolvable(self, host):
+        """True if the host is in the negative cache (never triggers a lookup)."""
+        with self._lock:
+            entry = self._cached(host.lower().rstrip('.'))
+        return entry is not None and entry[0] is None
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+def configure_resolver(**kwargs):
+    """Replace the shared resolver (see Resolver for the options)."""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is not None:
+            _resolver.close()
+        _resolver = Resolver(**kwargs)
+    return _resolver
+
+def get_resolver():
+    """Return the resolver shared by every fetch in the process (in-memory only until configured)."""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = Resolver()
+    return _resolver
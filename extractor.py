@@ -0,0 +1,207 @@
+import codecs
+import re
+from urllib.parse import unquote, urljoin, urlsplit, urldefrag
+from bs4 import BeautifulSoup
+from url_utils import registrable_domain
+from metrics import get_metrics
+
+# lxml is optional - it is much faster than BeautifulSoup's html.parser, which is used otherwise
+try:
+    import lxml.html
+    from lxml.etree import ParserError
+except ImportError:
+    lxml = None
+
+# Emails and phone numbers are found in a single pass with one combined pattern
+EMAIL_PATTERN = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+PHONE_PATTERN = r'(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
+CONTACT_PATTERN = re.compile(f'(?P<email>{EMAIL_PATTERN})|(?P<phone>{PHONE_PATTERN})')
+
+# Markup stripped before the incremental scan so attribute values aren't mistaken for contacts
+TAG_PATTERN = re.compile(r'<[^>]*>')
+
+# Common false positives that look like emails (e.g. image@2x.png)
+IGNORED_EMAIL_SUFFIXES = ('.png', '.jpg', '.gif')
+
+# Scores for links that are likely to lead to contact details, checked against the lower-cased
+# URL path and link text. The first matching path keyword counts, plus the first matching text keyword.
+CONTACT_PATH_SCORES = (
+    ('contact-us', 10), ('contact_us', 10), ('contactus', 10), ('contact', 9),
+    ('about-us', 6), ('about_us', 6), ('aboutus', 6), ('about', 5),
+    ('get-in-touch', 5), ('reach-us', 5), ('support', 2), ('location', 2),
+)
+CONTACT_TEXT_SCORES = (('contact', 3), ('get in touch', 3), ('about', 2), ('reach us', 2), ('call', 1))
+FOOTER_LINK_SCORE = 1  # Contact links in the footer are usually the real ones
+
+# Links to files that never contain contact details
+IGNORED_LINK_SUFFIXES = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.zip', '.doc', '.docx', '.mp4')
+
+def empty_page_info():
+    """Return the page info dict for a page with nothing in it."""
+    return {
+        "title": None,
+        "emails": [],
+        "phones": [],
+        "mailto_emails": [],
+        "tel_phones": [],
+        "contact_links": [],
+    }
+
+def _parse_with_lxml(html):
+    """Return (title, text, links) using lxml, where links are (href, link text, in footer) tuples."""
+    try:
+        doc = lxml.html.document_fromstring(html.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+    except ParserError:
+        # Empty or whitespace-only document
+        return None, "", []
+    title_element = doc.find('.//title')
+    title = title_element.text if title_element is not None else None
+    footer_links = set(doc.xpath(
+        '//footer//a | //*[contains(@id, "footer") or contains(@class, "footer")]//a'
+    ))
+    links = [
+        (link.get('href'), link.text_content(), link in footer_links)
+        for link in doc.iter('a') if link.get('href') is not None
+    ]
+    return title, doc.text_content(), links
+
+def _in_soup_footer(link):
+    for parent in link.parents:
+        if parent.name == 'footer':
+            return True
+        if 'footer' in (parent.get('id') or '') or 'footer' in ' '.join(parent.get('class') or []):
+            return True
+    return False
+
+def _parse_with_soup(html):
+    """Return (title, text, links) using BeautifulSoup, where links are (href, link text, in footer) tuples."""
+    soup = BeautifulSoup(html, 'html.parser')
+    title = soup.title.string if soup.title else None
+    links = [
+        (link['href'], link.get_text(), _in_soup_footer(link))
+        for link in soup.find_all('a', href=True)
+    ]
+    return title, soup.get_text(), links
+
+def score_contact_link(link_url, link_text, in_footer):
+    """Score how likely a link is to lead to a page with contact details (0 = not at all)."""
+    path = urlsplit(link_url).path.lower()
+    if path.endswith(IGNORED_LINK_SUFFIXES):
+        return 0
+    score = next((points for keyword, points in CONTACT_PATH_SCORES if keyword in path), 0)
+    text = " ".join(link_text.lower().split())
+    score += next((points for keyword, points in CONTACT_TEXT_SCORES if keyword in text), 0)
+    if score and in_footer:
+        score += FOOTER_LINK_SCORE
+    return score
+
+def extract_page_info(html, url):
+    """Extract the title, emails, phones, mailto:/tel: links and contact/about links from a page.
+
+    Emails and phones are found in one pass over the page text; links are
+    collected in the same parse, so the page is only parsed once. url should be
+    the final URL of the page, since relative links are resolved against it.
+    contact_links holds same-site links ordered by how likely they are to lead
+    to contact details.
+    """
+    page_info = empty_page_info()
+    if not html:
+        return page_info
+
+    metrics = get_metrics()
+    with metrics.timer("parse"):
+        if lxml is not None:
+            title, text, links = _parse_with_lxml(html)
+        else:
+            title, text, links = _parse_with_soup(html)
+    page_info["title"] = title
+
+    # Regular expressions over the text, then the links
+    with metrics.timer("extract"):
+        for match in CONTACT_PATTERN.finditer(text):
+            email = match.group('email')
+            if email is not None:
+                if not email.endswith(IGNORED_EMAIL_SUFFIXES):
+                    page_info["emails"].append(email)
+            else:
+                page_info["phones"].append(match.group('phone'))
+
+        site_domain = registrable_domain(url)
+        page_url = urldefrag(url)[0]
+        scored_links = {}
+        for href, link_text, in_footer in links:
+            href = href.strip()
+            lower_href = href.lower()
+            if lower_href.startswith('mailto:'):
+                address = unquote(href[7:].split('?')[0]).strip()
+                if address:
+                    page_info["mailto_emails"].append(address)
+            elif lower_href.startswith('tel:'):
+                number = unquote(href[4:]).strip()
+                if number:
+                    page_info["tel_phones"].append(number)
+            else:
+                # Resolve relative links against the page and only follow links within the same site
+                link_url = urldefrag(urljoin(url, href))[0]
+                if not link_url.startswith(('http://', 'https://')) or link_url == page_url:
+                    continue
+                if registrable_domain(link_url) != site_domain:
+                    continue
+                score = score_contact_link(link_url, link_text, in_footer)
+                if score > scored_links.get(link_url, 0):
+                    scored_links[link_url] = score
+
+    # Best links first; ties keep document order
+    page_info["contact_links"] = sorted(scored_links, key=scored_links.get, reverse=True)
+
+    return page_info
+
+def first_email(page_info):
+    """Return the first email on the page, preferring visible text over mailto: links."""
+    emails = page_info["emails"] or page_info["mailto_emails"]
+    return emails[0] if emails else None
+
+def first_phone(page_info):
+    """Return the first phone number on the page, preferring visible text over tel: links."""
+    phones = page_info["phones"] or page_info["tel_phones"]
+    return phones[0] if phones else None
+
+class ContactScanner:
+    """Cheap incremental check for whether a page being downloaded already has an email and a phone.
+
+    Used to stop reading a response body early; the full extraction still runs
+    on whatever was downloaded. Bytes are decoded incrementally, so a character
+    split across two chunks is decoded whole, and a tag cut off at the end of
+    a chunk is held back until it is complete, so its attributes are never
+    scanned as text.
+    """
+
+    OVERLAP = 256  # Characters of text kept between chunks so matches spanning two chunks are found
+    MAX_TAG = 4096  # Longest unterminated tag held back; a longer "<" is scanned as text
+
+    def __init__(self):
+        self.found_email = False
+        self.found_phone = False
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        self._open_tag = ""  # Start of a tag cut off at the end of the last chunk
+        self._tail = ""
+
+    def feed(self, chunk):
+        """Scan the next chunk of raw bytes. Returns True once both an email and a phone were seen."""
+        markup = self._open_tag + self._decoder.decode(chunk)
+        self._open_tag = ""
+        tag_start = markup.rfind('<')
+        if tag_start > markup.rfind('>') and len(markup) - tag_start <= self.MAX_TAG:
+            markup, self._open_tag = markup[:tag_start], markup[tag_start:]
+        text = self._tail + TAG_PATTERN.sub(' ', markup)
+        self._tail = text[-self.OVERLAP:]
+        for match in CONTACT_PATTERN.finditer(text):
+            email = match.group('email')
+            if email is not None:
+                if not email.endswith(IGNORED_EMAIL_SUFFIXES):
+                    self.found_email = True
+            else:
+                self.found_phone = True
+            if self.found_email and self.found_phone:
+                return True
+        return False
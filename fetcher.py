@@ -0,0 +1,414 @@
+import heapq
+import itertools
+import re
+import socket
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from scheduler import HostScheduler
+from url_utils import url_host
+from http_cache import HttpCache
+from extractor import ContactScanner
+from dns_cache import get_resolver
+from metrics import get_metrics
+from timeout_policy import get_timeout_policy
+
+# Default headers sent with every request
+# (ACCEPT_ENCODING includes br when the brotli package is installed)
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Encoding': ACCEPT_ENCODING,
+}
+
+# Response bodies are streamed and never read past this many (decoded) bytes
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+CHUNK_SIZE = 16 * 1024
+
+# Content types whose bodies are worth downloading; anything else (PDFs, images, video...) is skipped
+HTML_CONTENT_TYPES = ('html', 'xml', 'text/plain')
+
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset=["\']?([a-zA-Z0-9_-]+)', re.IGNORECASE)
+
+# Connection pool sizing for the shared session
+DEFAULT_POOL_CONNECTIONS = 100  # Number of hosts to keep a connection pool for
+DEFAULT_POOL_MAXSIZE = 10  # Maximum kept-alive connections per host
+
+_session = None
+_session_lock = threading.Lock()
+
+def create_session(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE):
+    """Create a requests session with per-host connection pooling and the default headers."""
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def configure_session(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE):
+    """Replace the shared session with one using the given pool sizes."""
+    global _session
+    with _session_lock:
+        old_session = _session
+        _session = create_session(pool_connections, pool_maxsize)
+    if old_session is not None:
+        old_session.close()
+    return _session
+
+def get_session():
+    """Return the keep-alive session shared by every fetch in the process."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+def fetch_robots_txt(robots_url, timeout=5):
+    """Return the text of a robots.txt file, or None if it can't be fetched."""
+    try:
+        response = get_session().get(robots_url, timeout=timeout)
+    except requests.exceptions.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    return response.text
+
+_scheduler = None
+
+def configure_scheduler(**kwargs):
+    """Replace the shared politeness scheduler (see HostScheduler for the options)."""
+    global _scheduler
+    kwargs.setdefault('robots_fetcher', fetch_robots_txt)
+    with _session_lock:
+        _scheduler = HostScheduler(**kwargs)
+    return _scheduler
+
+def get_scheduler():
+    """Return the per-host politeness scheduler shared by every fetch in the process."""
+    global _scheduler
+    if _scheduler is None:
+        with _session_lock:
+            if _scheduler is None:
+                _scheduler = HostScheduler(robots_fetcher=fetch_robots_txt)
+    return _scheduler
+
+_cache = None
+
+def configure_cache(**kwargs):
+    """Enable the on-disk response cache (see HttpCache for the options)."""
+    global _cache
+    with _session_lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = HttpCache(**kwargs)
+    return _cache
+
+def disable_cache():
+    """Turn the on-disk response cache off again."""
+    global _cache
+    with _session_lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = None
+
+def get_cache():
+    """Return the shared response cache, or None if caching is disabled."""
+    return _cache
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised when a response body is still arriving after the total deadline of the fetch."""
+
+class DeadlineWatchdog:
+    """Shuts down the sockets of responses still being read at their deadline, from one background thread.
+
+    A read timeout only limits the wait for each packet, so a server that
+    trickles a byte at a time would keep a fetch going for ever; shutting the
+    socket down wakes up the blocked read however slowly data arrives.
+    """
+
+    def __init__(self):
+        self._lock = threading.Condition()
+        self._heap = []  # (deadline, seq, alarm)
+        self._seq = itertools.count()
+        self._thread = None
+
+    def arm(self, deadline, sock):
+        """Shut sock down at deadline (a time.monotonic() value) unless disarmed first; returns the alarm."""
+        alarm = {'sock': sock, 'fired': False}
+        with self._lock:
+            heapq.heappush(self._heap, (deadline, next(self._seq), alarm))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="DeadlineWatchdog", daemon=True)
+                self._thread.start()
+            self._lock.notify()
+        return alarm
+
+    def disarm(self, alarm):
+        """Cancel an alarm. Returns True if it had already fired."""
+        with self._lock:
+            alarm['sock'] = None
+            return alarm['fired']
+
+    def _run(self):
+        with self._lock:
+            while True:
+                # Disarmed alarms stay in the heap until they are due; they are just skipped
+                while self._heap and (self._heap[0][2]['sock'] is None or self._heap[0][0] <= time.monotonic()):
+                    _, _, alarm = heapq.heappop(self._heap)
+                    if alarm['sock'] is not None:
+                        alarm['fired'] = True
+                        try:
+                            alarm['sock'].shutdown(socket.SHUT_RDWR)
+                        except OSError:
+                            pass
+                        alarm['sock'] = None
+                self._lock.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+
+_watchdog = DeadlineWatchdog()
+
+def _response_socket(response):
+    """The socket a streamed response is read from, or None if it can't be found."""
+    # The http.client response's file wraps the socket; the connection drops its
+    # reference to it early when the server closes the connection after the body
+    fp = getattr(getattr(response.raw, '_fp', None), 'fp', None)
+    sock = getattr(getattr(fp, 'raw', None), '_sock', None)
+    if sock is None:
+        connection = getattr(response.raw, 'connection', None) or getattr(response.raw, '_connection', None)
+        sock = getattr(connection, 'sock', None)
+    return sock
+
+class FetchResult:
+    """The outcome of a single HTTP fetch, shared by the status check and contact extraction."""
+
+    __slots__ = ('url', 'final_url', 'status_code', 'reason', 'headers', 'text', 'error', 'truncated', 'skipped')
+
+    def __init__(self, url, final_url=None, status_code=None, reason=None, headers=None, text="", error=None,
+                 truncated=False, skipped=False):
+        self.url = url
+        self.final_url = final_url or url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers or {}
+        self.text = text
+        self.error = error  # The exception raised while fetching, if any
+        self.truncated = truncated  # Body was cut off at the byte cap or once contacts were found
+        self.skipped = skipped  # Body was not downloaded because it isn't HTML
+
+    @property
+    def ok(self):
+        """True if the request completed (regardless of HTTP status code)."""
+        return self.error is None
+
+    def __repr__(self):
+        if self.error is not None:
+            return f"FetchResult({self.url!r}, error={self.error!r})"
+        return f"FetchResult({self.url!r}, status_code={self.status_code})"
+
+def is_html_content_type(content_type):
+    """True if a Content-Type header looks like a page we can extract contacts from."""
+    if not content_type:
+        return True  # Many servers don't send one - assume HTML
+    content_type = content_type.lower()
+    return any(kind in content_type for kind in HTML_CONTENT_TYPES)
+
+def _decode_body(response, body):
+    """Decode a body using the charset from the headers or <meta> tag, falling back to UTF-8."""
+    encoding = None
+    if 'charset' in response.headers.get('Content-Type', '').lower():
+        encoding = response.encoding
+    if encoding is None:
+        match = META_CHARSET_PATTERN.search(body[:4096])
+        if match:
+            encoding = match.group(1).decode('ascii')
+    try:
+        return body.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+def _read_body(response, max_bytes, stop_on_contacts, deadline=None):
+    """Stream a response body up to max_bytes. Returns (bytes, truncated, skipped).
+
+    Raises DeadlineExceeded if the body is still arriving at deadline (a time.monotonic() value);
+    the socket is shut down then, so even a body that trickles in is cut off on time.
+    """
+    if not is_html_content_type(response.headers.get('Content-Type')):
+        return b"", False, True
+
+    sock = _response_socket(response) if deadline is not None else None
+    alarm = _watchdog.arm(deadline, sock) if sock is not None else None
+    try:
+        body = _read_chunks(response, max_bytes, stop_on_contacts, deadline)
+    except requests.exceptions.RequestException as e:
+        if alarm is not None and _watchdog.disarm(alarm):
+            raise DeadlineExceeded(f"Read of {response.url} did not finish within the total timeout") from e
+        raise
+    finally:
+        # Disarm in any case - the connection goes back to the pool
+        fired = alarm is not None and _watchdog.disarm(alarm)
+    # A shut down socket can also look like the end of the body
+    if fired:
+        raise DeadlineExceeded(f"Read of {response.url} did not finish within the total timeout")
+    return body
+
+def _read_chunks(response, max_bytes, stop_on_contacts, deadline):
+    scanner = ContactScanner() if stop_on_contacts else None
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        if deadline is not None and time.monotonic() > deadline:
+            raise DeadlineExceeded(f"Read of {response.url} did not finish within the total timeout")
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_bytes:
+            return b"".join(chunks)[:max_bytes], True, False
+        if scanner is not None and scanner.feed(chunk):
+            # Both an email and a phone were seen - the rest of the page isn't needed
+            return b"".join(chunks), True, False
+    return b"".join(chunks), False, False
+
+def fetch_page(url, timeout=None, max_bytes=DEFAULT_MAX_BYTES, stop_on_contacts=False):
+    """Fetch a URL once and return a FetchResult. Request errors are captured, not raised.
+
+    The body is streamed: non-HTML responses are not downloaded, at most
+    max_bytes are read, and with stop_on_contacts=True reading stops as soon
+    as both an email and a phone number have gone past.
+
+    timeout is a number or (connect, read) pair; by default the shared
+    TimeoutPolicy's adaptive timeouts are used. The whole fetch is also cut
+    off at the policy's total timeout, and hosts whose circuit is open
+    fail at once with the error that opened it.
+
+    When the response cache is enabled, fresh entries are served from disk and
+    stale ones are revalidated with a conditional request. A cached body that
+    was cut off early only serves callers that also stop early
+    (stop_on_contacts=True); anyone else fetches the page again.
+    """
+    metrics = get_metrics()
+    cache = get_cache()
+    entry = cache.lookup(url) if cache is not None else None
+    if entry is not None and entry['truncated'] and not stop_on_contacts:
+        entry = None  # Only part of the page was kept, and a 304 would not bring back the rest
+    if entry is not None and entry['fresh']:
+        metrics.count("http_cache_hits")
+        return _result_from_cache(url, entry)
+    if cache is not None:
+        metrics.count("http_cache_misses")
+
+    # Hosts that are known not to exist or keep failing fail instantly instead of waiting
+    dead_result = _dead_host_result(url)
+    if dead_result is not None:
+        return dead_result
+
+    request_headers = cache.validators(entry) if entry is not None else {}
+    scheduler = get_scheduler()
+    policy = get_timeout_policy()
+    if timeout is None:
+        timeout = policy.timeouts()
+    host = url_host(url)
+    try:
+        with scheduler.slot(url):
+            # The total deadline starts once it's our turn - politeness delays aren't the host's fault
+            start = time.monotonic()
+            # Headers only (stream=True), so this is connect + TLS + time to first byte on a new connection
+            with metrics.timer("ttfb", host):
+                response = get_session().get(url, timeout=timeout, headers=request_headers, allow_redirects=True, stream=True)
+            policy.observe_response(time.monotonic() - start)
+            try:
+                with metrics.timer("download", host):
+                    body, truncated, skipped = _read_body(
+                        response, max_bytes, stop_on_contacts, deadline=start + policy.total_timeout
+                    )
+                metrics.observe_bytes("download", len(body), host)
+            finally:
+                response.close()
+        scheduler.note_response(url, response.status_code, response.headers)
+    except requests.exceptions.RequestException as e:
+        _note_failure(url, e)
+        return FetchResult(url, error=e)
+    policy.breaker.record_success(url)
+
+    if entry is not None and response.status_code == 304:
+        # Not modified - the cached copy is good for another TTL
+        cache.refresh(url)
+        return _result_from_cache(url, entry)
+
+    result = FetchResult(
+        url,
+        final_url=response.url,
+        status_code=response.status_code,
+        reason=response.reason,
+        headers=response.headers,
+        text=_decode_body(response, body),
+        truncated=truncated,
+        skipped=skipped,
+    )
+    if cache is not None:
+        cache.store(
+            url, result.final_url, result.status_code, result.reason, result.headers, result.text,
+            truncated=truncated, skipped=skipped,
+        )
+    return result
+
+def _dead_host_result(url):
+    """Return a failed FetchResult if the URL's host is known not to exist or its circuit is open, else None."""
+    host = url_host(url)
+    if host and get_resolver().known_unresolvable(host):
+        error = requests.exceptions.ConnectionError(f"DNS resolution failed for {host} (cached)")
+        return FetchResult(url, error=error)
+    error = get_timeout_policy().breaker.check(url)
+    if error is not None:
+        get_metrics().count("circuit_open")
+        return FetchResult(url, error=error)
+    return None
+
+def _note_failure(url, error):
+    """Count connection failures and timeouts (not HTTP or URL errors) against the URL's host."""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        get_timeout_policy().breaker.record_failure(url, error)
+
+def fetch_head(url, timeout=None):
+    """Send a HEAD request (following redirects) and return a FetchResult without a body.
+
+    Timeouts and failing hosts are handled as in fetch_page.
+    """
+    dead_result = _dead_host_result(url)
+    if dead_result is not None:
+        return dead_result
+
+    scheduler = get_scheduler()
+    policy = get_timeout_policy()
+    if timeout is None:
+        timeout = policy.timeouts()
+    try:
+        with scheduler.slot(url):
+            start = time.monotonic()
+            with get_metrics().timer("head", url_host(url)):
+                response = get_session().head(url, timeout=timeout, allow_redirects=True)
+            policy.observe_response(time.monotonic() - start)
+        scheduler.note_response(url, response.status_code, response.headers)
+    except requests.exceptions.RequestException as e:
+        _note_failure(url, e)
+        return FetchResult(url, error=e)
+    policy.breaker.record_success(url)
+    return FetchResult(
+        url,
+        final_url=response.url,
+        status_code=response.status_code,
+        reason=response.reason,
+        headers=response.headers,
+    )
+
+def _result_from_cache(url, entry):
+    return FetchResult(
+        url,
+        final_url=entry['final_url'],
+        status_code=entry['status_code'],
+        reason=entry['reason'],
+        headers=entry['headers'],
+        text=entry['text'],
+        truncated=entry['truncated'],
+        skipped=entry['skipped'],
+    )
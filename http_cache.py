@@ -0,0 +1,141 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from requests.structures import CaseInsensitiveDict
+from url_utils import normalize_url
+
+# Default location and limits of the on-disk response cache
+DEFAULT_CACHE_FILE = "http_cache.sqlite"
+DEFAULT_TTL = 24 * 60 * 60  # Seconds before a cached response must be revalidated
+DEFAULT_MAX_SIZE = 200 * 1024 * 1024  # Maximum total size of cached bodies in bytes
+
+class HttpCache:
+    """SQLite-backed HTTP response cache keyed by normalized URL.
+
+    Bodies are stored zlib-compressed. Entries older than the TTL are returned
+    as stale so the caller can revalidate them with ETag/Last-Modified, and the
+    least recently used entries are evicted once the size limit is exceeded.
+    Server errors (5xx) are not stored, so a site that was down is fetched
+    again next time.
+    Each entry keeps the truncated/skipped flags of the fetch that stored it,
+    so a partial body is never mistaken for the whole page.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    final_url TEXT,
+                    status_code INTEGER,
+                    reason TEXT,
+                    headers TEXT,
+                    body BLOB,
+                    size INTEGER,
+                    fetched_at REAL,
+                    accessed_at REAL,
+                    truncated INTEGER,
+                    skipped INTEGER
+                )
+            """)
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(responses)")]
+            if 'truncated' not in columns:
+                # Cache files written before the flags existed may hold partial bodies - assume they do
+                self._conn.execute("ALTER TABLE responses ADD COLUMN truncated INTEGER DEFAULT 1")
+                self._conn.execute("ALTER TABLE responses ADD COLUMN skipped INTEGER DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            # Running total of the stored bodies, so a store doesn't have to add up the whole table
+            self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def lookup(self, url):
+        """Return the cached entry for a URL as a dict (with a 'fresh' flag), or None."""
+        key = normalize_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT final_url, status_code, reason, headers, body, fetched_at, truncated, skipped "
+                "FROM responses WHERE url = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), key))
+
+        final_url, status_code, reason, headers, body, fetched_at, truncated, skipped = row
+        return {
+            'final_url': final_url,
+            'status_code': status_code,
+            'reason': reason,
+            'headers': CaseInsensitiveDict(json.loads(headers)),
+            'text': zlib.decompress(body).decode('utf-8'),
+            'fresh': time.time() - fetched_at < self.ttl,
+            'truncated': bool(truncated),
+            'skipped': bool(skipped),
+        }
+
+    def validators(self, entry):
+        """Return the conditional request headers for revalidating a cached entry."""
+        headers = {}
+        etag = entry['headers'].get('ETag')
+        last_modified = entry['headers'].get('Last-Modified')
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def store(self, url, final_url, status_code, reason, headers, text, truncated=False, skipped=False):
+        """Store a response, replacing any previous entry for the URL.
+
+        truncated and skipped say the body is only part of the page, or wasn't downloaded at all.
+        """
+        headers = CaseInsensitiveDict(headers)
+        if 'no-store' in headers.get('Cache-Control', '') or status_code >= 500:
+            return
+        key = normalize_url(url)
+        body = zlib.compress(text.encode('utf-8'))
+        now = time.time()
+        with self._lock, self._conn:
+            replaced = self._conn.execute("SELECT size FROM responses WHERE url = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, final_url, status_code, reason, json.dumps(dict(headers)), body, len(body), now, now,
+                 int(truncated), int(skipped))
+            )
+            self._total += len(body) - (replaced[0] if replaced else 0)
+            if self._total > self.max_size:
+                self._evict()
+
+    def refresh(self, url):
+        """Mark a cached entry as fresh again after a 304 Not Modified."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, normalize_url(url))
+            )
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits in max_size. Caller holds the lock."""
+        # Other processes may share the file, so count again before deleting anything
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_size:
+            rows = self._conn.execute("SELECT url, size FROM responses ORDER BY accessed_at")
+            for url, size in rows.fetchall():
+                if total <= self.max_size:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                total -= size
+        self._total = total
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,61 @@
+import logging
+import sys
+
+# Name of the logger every module logs under
+ROOT_LOGGER = "business_scraper"
+# Child logger for the per-website lines printed in the hot loops
+SITES_LOGGER = f"{ROOT_LOGGER}.sites"
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at the time (like print), unless given a stream of its own."""
+
+    def __init__(self):
+        super().__init__()
+        self._stream = None  # Forget the sys.stderr default StreamHandler set
+
+    @property
+    def stream(self):
+        return self._stream if self._stream is not None else sys.stdout
+
+    @stream.setter
+    def stream(self, stream):
+        self._stream = stream
+
+_handler = None
+
+def _install_handler():
+    """Send log records to stdout as bare messages, so output looks just like the old print() calls."""
+    global _handler
+    root = logging.getLogger(ROOT_LOGGER)
+    if _handler is None:
+        _handler = _StdoutHandler()
+        _handler.setFormatter(logging.Formatter("%(message)s"))
+        root.addHandler(_handler)
+        root.setLevel(logging.INFO)
+        root.propagate = False
+    return root
+
+def get_logger(name=None):
+    """Return the logger for a part of the scraper (the root logger if name is None)."""
+    root = _install_handler()
+    return root.getChild(name) if name else root
+
+def configure_logging(level=logging.INFO, site_level=None, stream=None):
+    """Set how much is logged.
+
+    level applies to everything; site_level (defaults to level) to the
+    per-website lines only, e.g. site_level=logging.WARNING keeps the progress
+    and summary output but silences the line printed for every website.
+    Levels can be given as names ("DEBUG", "WARNING"...). stream replaces
+    stdout as the destination.
+    """
+    root = _install_handler()
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    if isinstance(site_level, str):
+        site_level = logging.getLevelName(site_level.upper())
+    root.setLevel(level)
+    logging.getLogger(SITES_LOGGER).setLevel(site_level if site_level is not None else logging.NOTSET)
+    if stream is not None:
+        _handler.flush()
+        _handler.stream = stream
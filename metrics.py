@@ -0,0 +1,257 @@
+import bisect
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# pyinstrument is optional - cProfile is used for stage profiling otherwise
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+# Histogram bucket upper bounds (Prometheus style, +Inf is implied)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+class Histogram:
+    """Bucketed counts plus the total count and sum of observed values. Not locked - Metrics holds the lock."""
+
+    __slots__ = ('bounds', 'buckets', 'count', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Return (upper bound, observations <= bound) pairs ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.bounds + (float('inf'),), self.buckets):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'buckets': {('+Inf' if bound == float('inf') else str(bound)): count for bound, count in self.cumulative()},
+        }
+
+class _NullTimer:
+    """Stands in for a timer when metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class Metrics:
+    """Per-stage timers, byte counts and counters for a run, overall and per host.
+
+    Stages are names like "search", "dns", "ttfb", "download", "parse",
+    "extract" or "log". timer() records how long a block took; observe_bytes()
+    records a size; count() increments a counter. Every observation goes to the
+    stage's histogram and, if a host is given, to the (stage, host) one too.
+    Profiling can be switched on for chosen stages: each timed block of those
+    stages then also runs under cProfile (or pyinstrument), and the profiles
+    are written out with export().
+    """
+
+    def __init__(self, enabled=True, per_host=True, profile_stages=(), profiler="cprofile"):
+        self.enabled = enabled
+        self.per_host = per_host
+        self.profile_stages = set(profile_stages)
+        self.profiler = profiler
+        self._lock = threading.Lock()
+        self._latency = {}  # (stage, host or None) -> Histogram
+        self._bytes = {}  # (stage, host or None) -> Histogram
+        self._counters = {}  # name -> int
+        self._profiles = {}  # stage -> pstats.Stats or list of pyinstrument text reports
+        self._profiling = threading.local()
+        self.started_at = time.time()
+
+    def _observe(self, table, bounds, stage, host, value):
+        with self._lock:
+            keys = ((stage, None), (stage, host)) if host and self.per_host else ((stage, None),)
+            for key in keys:
+                histogram = table.get(key)
+                if histogram is None:
+                    histogram = table[key] = Histogram(bounds)
+                histogram.observe(value)
+
+    def observe_latency(self, stage, seconds, host=None):
+        if self.enabled:
+            self._observe(self._latency, LATENCY_BUCKETS, stage, host, seconds)
+
+    def observe_bytes(self, stage, size, host=None):
+        if self.enabled:
+            self._observe(self._bytes, BYTES_BUCKETS, stage, host, size)
+
+    def count(self, name, increment=1):
+        if self.enabled:
+            with self._lock:
+                self._counters[name] = self._counters.get(name, 0) + increment
+
+    def timer(self, stage, host=None):
+        """Context manager that records how long its block takes under stage (and host)."""
+        if not self.enabled:
+            return _NULL_TIMER
+        if stage in self.profile_stages:
+            return self._profiled_timer(stage, host)
+        return self._timer(stage, host)
+
+    @contextmanager
+    def _timer(self, stage, host):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_latency(stage, time.perf_counter() - start, host)
+
+    @contextmanager
+    def _profiled_timer(self, stage, host):
+        # Only the outermost profiled block of a thread is profiled
+        if getattr(self._profiling, 'active', False):
+            with self._timer(stage, host):
+                yield
+            return
+        self._profiling.active = True
+        if self.profiler == "pyinstrument" and pyinstrument is not None:
+            profiler = pyinstrument.Profiler()
+            start = profiler.start
+        else:
+            profiler = cProfile.Profile()
+            start = profiler.enable
+        try:
+            start()
+        except (RuntimeError, ValueError):
+            # Another profiler is already running (some Pythons allow only one at a time)
+            profiler = None
+        try:
+            with self._timer(stage, host):
+                yield
+        finally:
+            self._profiling.active = False
+            if profiler is not None:
+                self._save_profile(stage, profiler)
+
+    def _save_profile(self, stage, profiler):
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            with self._lock:
+                stats = self._profiles.get(stage)
+                if stats is None:
+                    self._profiles[stage] = pstats.Stats(profiler)
+                else:
+                    stats.add(profiler)
+        else:
+            profiler.stop()
+            with self._lock:
+                self._profiles.setdefault(stage, []).append(profiler.output_text())
+
+    def snapshot(self):
+        """Return all metrics as a JSON-serializable dict."""
+        def histograms(table):
+            result = {}
+            for (stage, host), histogram in sorted(table.items(), key=lambda item: (item[0][0], item[0][1] or "")):
+                entry = result.setdefault(stage, {'total': None, 'hosts': {}})
+                if host is None:
+                    entry['total'] = histogram.to_dict()
+                else:
+                    entry['hosts'][host] = histogram.to_dict()
+            return result
+
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'elapsed': round(time.time() - self.started_at, 3),
+                'counters': dict(self._counters),
+                'latency_seconds': histograms(self._latency),
+                'bytes': histograms(self._bytes),
+            }
+
+    def to_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def write_histogram(name, table):
+            lines.append(f"# TYPE {name} histogram")
+            for (stage, host), histogram in sorted(table.items(), key=lambda item: (item[0][0], item[0][1] or "")):
+                labels = f'stage="{stage}"' + (f',host="{host}"' if host else "")
+                for bound, count in histogram.cumulative():
+                    le = "+Inf" if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        with self._lock:
+            write_histogram("scraper_stage_latency_seconds", self._latency)
+            write_histogram("scraper_stage_bytes", self._bytes)
+            for name, value in sorted(self._counters.items()):
+                lines.append(f"# TYPE scraper_{name}_total counter")
+                lines.append(f"scraper_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write the metrics to path: JSON if it ends with .json, Prometheus text otherwise.
+
+        Stage profiles are written next to it as <path>.<stage>.prof (cProfile,
+        readable with pstats/snakeviz) or <path>.<stage>.txt (pyinstrument).
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith('.json'):
+                json.dump(self.snapshot(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
+
+        with self._lock:
+            profiles = dict(self._profiles)
+        for stage, profile in profiles.items():
+            if isinstance(profile, pstats.Stats):
+                profile.dump_stats(f"{path}.{stage}.prof")
+            else:
+                with open(f"{path}.{stage}.txt", 'w', encoding='utf-8') as f:
+                    f.write("\n".join(profile))
+
+    def profile_summary(self, stage, limit=20):
+        """Return the top functions of a stage's cProfile profile as text (empty if it wasn't profiled)."""
+        with self._lock:
+            stats = self._profiles.get(stage)
+        if not isinstance(stats, pstats.Stats):
+            return ""
+        output = io.StringIO()
+        stats.stream = output
+        stats.sort_stats('cumulative').print_stats(limit)
+        return output.getvalue()
+
+# Disabled until a run asks for metrics, so timers cost next to nothing by default
+_metrics = Metrics(enabled=False)
+
+def configure_metrics(**kwargs):
+    """Start collecting a fresh set of metrics (see Metrics for the options) and return it."""
+    global _metrics
+    _metrics = Metrics(**kwargs)
+    return _metrics
+
+def get_metrics():
+    """Return the metrics shared by every stage in the process."""
+    return _metrics
+
+def timer(stage, host=None):
+    """Time a block under stage (and host) in the shared metrics."""
+    return _metrics.timer(stage, host)
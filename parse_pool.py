@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from extractor import extract_page_info
+from fetcher import DEFAULT_MAX_BYTES
+from metrics import get_metrics
+
+# Shared memory needs Python 3.8+ - otherwise pages are sent to the parse processes by pickling
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+# Size of each shared memory slot; pages that don't fit (rare, since bodies are capped) are pickled
+DEFAULT_SLOT_SIZE = 2 * DEFAULT_MAX_BYTES
+# Slots per parse process - pages waiting beyond that block their fetcher thread
+SLOTS_PER_PROCESS = 2
+
+# Shared memory blocks this parse process has already attached to, by name
+_attached_slots = {}
+
+def _parse_slot(name, size, url):
+    """Parse a page that the parent process put in a shared memory slot (runs in a parse process)."""
+    slot = _attached_slots.get(name)
+    if slot is None:
+        slot = shared_memory.SharedMemory(name=name)
+        _attached_slots[name] = slot
+    with slot.buf[:size] as view:
+        html = str(view, 'utf-8')
+    return extract_page_info(html, url)
+
+def _parse_bytes(data, url):
+    """Parse a page sent as pickled bytes (runs in a parse process)."""
+    return extract_page_info(data.decode('utf-8'), url)
+
+class ParsePool:
+    """Parses pages in a pool of processes, so parsing isn't serialized with fetching by the GIL.
+
+    Fetcher threads call parse(), which copies the page into a free shared
+    memory slot and waits for a parse process to return the page info, so
+    large bodies are never pickled. There is a fixed number of slots: when
+    they are all in use, further fetcher threads block until one is free,
+    which bounds how many downloaded pages wait in memory for parsing.
+    """
+
+    def __init__(self, processes=None, slots=None, slot_size=DEFAULT_SLOT_SIZE):
+        self.processes = processes or os.cpu_count() or 1
+        # Start parse processes fresh rather than forking a process that is running fetcher threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes, mp_context=multiprocessing.get_context('spawn')
+        )
+        slots = slots or self.processes * SLOTS_PER_PROCESS
+        self._semaphore = threading.BoundedSemaphore(slots)
+        self._free_slots = queue.Queue()
+        self._slots = []
+        if shared_memory is not None:
+            for _ in range(slots):
+                slot = shared_memory.SharedMemory(create=True, size=slot_size)
+                self._slots.append(slot)
+                self._free_slots.put(slot)
+
+    def parse(self, html, url):
+        """Return extract_page_info(html, url), computed in a parse process."""
+        with self._semaphore:  # Backpressure: wait while every slot is in use
+            data = html.encode('utf-8')
+            if not self._slots:
+                return self._executor.submit(_parse_bytes, data, url).result()
+            slot = self._free_slots.get()
+            try:
+                if len(data) > slot.size:
+                    return self._executor.submit(_parse_bytes, data, url).result()
+                slot.buf[:len(data)] = data
+                return self._executor.submit(_parse_slot, slot.name, len(data), url).result()
+            finally:
+                self._free_slots.put(slot)
+
+    def close(self):
+        self._executor.shutdown()
+        for slot in self._slots:
+            slot.close()
+            slot.unlink()
+
+_parse_pool = None
+
+def configure_parse_pool(**kwargs):
+    """Parse pages in a process pool from now on (see ParsePool for the options)."""
+    global _parse_pool
+    close_parse_pool()
+    _parse_pool = ParsePool(**kwargs)
+    return _parse_pool
+
+def close_parse_pool():
+    """Stop the parse processes; pages are parsed in the calling thread again."""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.close()
+        _parse_pool = None
+
+def parse_page(html, url):
+    """Extract the page info of a page, in the parse pool if one is configured."""
+    if _parse_pool is None or not html:
+        return extract_page_info(html, url)
+    # The parse and extract stages are timed in the parse processes, which don't report back,
+    # so here the whole round trip (waiting for a slot included) is timed instead
+    with get_metrics().timer("parse_pool"):
+        return _parse_pool.parse(html, url)
@@ -0,0 +1,82 @@
+import socket
+import time
+from urllib.parse import urlsplit
+from fetcher import FetchResult, fetch_head, fetch_page
+from dns_cache import get_resolver
+from metrics import get_metrics
+from timeout_policy import get_timeout_policy
+from records import Status, BROKEN, WORKING
+
+def broken_status(code, reason):
+    return Status(BROKEN, code, reason)
+
+def status_from_result(result):
+    """Classify a FetchResult with the same Status as check_website_status."""
+    if result.error is not None:
+        # Connection errors, timeouts, etc.
+        return broken_status("Connection Error", str(result.error))
+    
+    # Consider 4xx and 5xx as broken
+    if 400 <= result.status_code < 600:
+        return broken_status(result.status_code, result.reason)
+    return Status(WORKING, result.status_code, result.reason)
+
+def resolve_host(host, port):
+    """Resolve a host name through the shared DNS cache, returning an (address, port) pair or raising OSError."""
+    return get_resolver().resolve(host)[0], port
+
+def probe_website(url, timeout=None, stop_on_contacts=True):
+    """Classify a website as Working or Broken with as little traffic as possible.
+
+    Tries DNS resolution, then a TCP connect, then a HEAD request, and only
+    downloads the page with GET if HEAD fails or returns an error status.
+    Returns (status, result): status is the site's Status and
+    result is the FetchResult for the page (carrying the error if DNS or the
+    connect failed), or None if the site was found to be working without a GET.
+    Timeouts come from the shared TimeoutPolicy unless given; once a step
+    times out or can't connect, the later steps fail at once with that error.
+    """
+    parts = urlsplit(url)
+    host = parts.hostname
+    if not host:
+        error = ValueError(f"Invalid URL: {url}")
+        return broken_status("Connection Error", str(error)), FetchResult(url, error=error)
+    try:
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+    except ValueError as e:
+        return broken_status("Connection Error", str(e)), FetchResult(url, error=e)
+
+    policy = get_timeout_policy()
+    error = policy.breaker.check(url)
+    if error is not None:
+        get_metrics().count("circuit_open")
+        return broken_status("Connection Error", str(error)), FetchResult(url, error=error)
+
+    # 1. DNS
+    try:
+        address = resolve_host(host, port)
+    except OSError as e:
+        return broken_status("Connection Error", str(e)), FetchResult(url, error=e)
+
+    # 2. TCP connect
+    connect_timeout = policy.timeouts()[0]
+    if timeout is not None:
+        connect_timeout = min(connect_timeout, timeout[0] if isinstance(timeout, tuple) else timeout)
+    start = time.monotonic()
+    try:
+        with get_metrics().timer("connect", host):
+            socket.create_connection(address, timeout=connect_timeout).close()
+    except OSError as e:
+        error = OSError(f"Could not connect to {host}:{port}: {e}")
+        policy.breaker.record_failure(url, error)
+        return broken_status("Connection Error", str(error)), FetchResult(url, error=error)
+    policy.observe_connect(time.monotonic() - start)
+
+    # 3. HEAD - a success is enough to call the site working
+    head_result = fetch_head(url, timeout=timeout)
+    if head_result.error is None and head_result.status_code < 400:
+        return status_from_result(head_result), None
+
+    # 4. GET - HEAD failed or returned an error (some servers don't support HEAD properly)
+    result = fetch_page(url, timeout=timeout, stop_on_contacts=stop_on_contacts)
+    return status_from_result(result), result
@@ -0,0 +1,198 @@
+import calendar
+import time
+from array import array
+from url_utils import registrable_domain
+
+# Website statuses
+BROKEN = "Broken"
+WORKING = "Working"
+
+# Kinds of result record
+BUSINESS_CONTACT = "business_contact"
+BROKEN_WEBSITE = "broken_website"
+
+# Fields of a result record, in the order they are stored
+RECORD_FIELDS = (
+    'kind', 'run_id', 'url', 'domain', 'company', 'location',
+    'status_code', 'reason', 'email', 'phone', 'timestamp',
+)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S UTC"
+
+class Record:
+    """Base for the fixed-field records passed between stages.
+
+    The fields are the subclass's __slots__, so a record has no per-instance
+    dict. Fields can be given by position or name and default to None.
+    Records can also be read like the dicts they replace (record['email'],
+    record.get('email')), and are written to JSON as a list of their values
+    (see to_json) and read back with from_json.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *values, **fields):
+        if len(values) > len(self.__slots__):
+            raise TypeError(f"{type(self).__name__} takes at most {len(self.__slots__)} fields")
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+        for name in self.__slots__[len(values):]:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"{type(self).__name__} has no field {next(iter(fields))!r}")
+
+    def as_row(self):
+        """The field values as a tuple, in __slots__ order."""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_json(cls, value):
+        """Rebuild a record from the list (or dict) it was written to JSON as; None stays None."""
+        if value is None or isinstance(value, cls):
+            return value
+        if isinstance(value, dict):
+            return cls(**value)
+        return cls(*value)
+
+    def __getitem__(self, name):
+        if name not in self.__slots__:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def get(self, name, default=None):
+        return getattr(self, name) if name in self.__slots__ else default
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.as_row() == other.as_row()
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+def to_json(value):
+    """`default` hook for json.dumps: records are written as the list of their field values."""
+    if isinstance(value, Record):
+        return value.as_row()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class Status(Record):
+    """A website's status: BROKEN or WORKING, with the status code (or "Connection Error") and reason."""
+
+    __slots__ = ('status', 'code', 'reason')
+
+    @property
+    def broken(self):
+        return self.status == BROKEN
+
+class ContactInfo(Record):
+    """Contact details found for a website; any of them may be None."""
+
+    __slots__ = ('company_name', 'email', 'phone')
+
+    @property
+    def found(self):
+        """True if an email address or phone number was found."""
+        return bool(self.email or self.phone)
+
+class ResultRecord(Record):
+    """One row of output for the result store and sinks (see RECORD_FIELDS)."""
+
+    __slots__ = RECORD_FIELDS
+
+def make_record(kind, run_id, url, timestamp, company=None, location=None, status_code=None, reason=None,
+                email=None, phone=None):
+    """Build a result record for the sinks."""
+    return ResultRecord(
+        kind, run_id, url, registrable_domain(url), company, location,
+        status_code, reason, email, phone, timestamp,
+    )
+
+class RecordBatch:
+    """Column-wise buffer of ResultRecords waiting to be written in bulk.
+
+    Status codes are kept in an array of ints, with the few non-HTTP codes
+    (e.g. "Connection Error") stored once in a label table, and timestamps
+    in an array of epoch seconds. The other fields are kept as one list per
+    column. rows() and column() turn the batch back into the records' values.
+    """
+
+    _STRING_FIELDS = tuple(field for field in RECORD_FIELDS if field not in ('status_code', 'timestamp'))
+
+    def __init__(self):
+        self._strings = {field: [] for field in self._STRING_FIELDS}
+        self._codes = array('i')  # HTTP code, 0 for None, -n for the n-th label
+        self._labels = []
+        self._times = array('q')  # Epoch seconds, -1 for a timestamp in another format
+        self._odd_times = {}  # Row -> timestamp that isn't in TIMESTAMP_FORMAT (or None)
+        # Consecutive records mostly share a timestamp, so remember the last one converted each way
+        self._last_parsed = (None, -1)
+        self._last_formatted = (None, None)
+
+    def __len__(self):
+        return len(self._codes)
+
+    def append(self, record):
+        for field in self._STRING_FIELDS:
+            self._strings[field].append(getattr(record, field))
+        self._codes.append(self._encode_code(record.status_code))
+        seconds = self._parse_time(record.timestamp)
+        if seconds < 0:
+            self._odd_times[len(self._times)] = record.timestamp
+        self._times.append(seconds)
+
+    def _encode_code(self, code):
+        if code is None:
+            return 0
+        if type(code) is int and 0 < code < 1 << 31:
+            return code
+        if code not in self._labels:
+            self._labels.append(code)
+        return -(self._labels.index(code) + 1)
+
+    def _decode_code(self, value, http_only=False):
+        if value > 0:
+            return value
+        if value == 0 or http_only:
+            return None
+        return self._labels[-value - 1]
+
+    def _parse_time(self, timestamp):
+        if timestamp == self._last_parsed[0]:
+            return self._last_parsed[1]
+        try:
+            seconds = calendar.timegm(time.strptime(timestamp, TIMESTAMP_FORMAT))
+        except (TypeError, ValueError):
+            return -1
+        if time.strftime(TIMESTAMP_FORMAT, time.gmtime(seconds)) != timestamp:
+            return -1  # e.g. not zero-padded - keep it exactly as given
+        self._last_parsed = (timestamp, seconds)
+        return seconds
+
+    def _format_time(self, row):
+        seconds = self._times[row]
+        if seconds < 0:
+            return self._odd_times[row]
+        if seconds != self._last_formatted[0]:
+            self._last_formatted = (seconds, time.strftime(TIMESTAMP_FORMAT, time.gmtime(seconds)))
+        return self._last_formatted[1]
+
+    def column(self, field, http_only=False):
+        """Return one field's values as a list; with http_only, non-HTTP status codes become None."""
+        if field == 'status_code':
+            return [self._decode_code(value, http_only) for value in self._codes]
+        if field == 'timestamp':
+            return [self._format_time(row) for row in range(len(self._times))]
+        return list(self._strings[field])
+
+    def rows(self):
+        """Yield each record's values as a tuple in RECORD_FIELDS order."""
+        columns = [
+            self.column(field) if field in ('status_code', 'timestamp') else self._strings[field]
+            for field in RECORD_FIELDS
+        ]
+        return zip(*columns)
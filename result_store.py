@@ -0,0 +1,296 @@
+import json
+import sqlite3
+import threading
+from records import RECORD_FIELDS, RecordBatch, ResultRecord
+from result_writer import ResultWriter
+
+# pyarrow is optional - it is only needed for the Parquet sink
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Default location of the results database shared by both collectors
+DEFAULT_RESULTS_FILE = "results.sqlite"
+
+# Records are inserted/written in batches of this many rows
+DEFAULT_STORE_BATCH_SIZE = 500
+DEFAULT_PARQUET_BATCH_SIZE = 10000
+
+class JsonlSink:
+    """Appends records as JSON lines, written in batches by a background writer."""
+
+    def __init__(self, path):
+        self.path = path
+        self._writer = ResultWriter(path)  # Cuts off a line a crash left half written
+
+    def write(self, record):
+        self._writer.write(json.dumps(record.as_dict()) + "\n")
+
+    def restore(self, records):
+        """Write the records of a resumed run that didn't reach the file before it was interrupted.
+
+        The file is read from the start to find the run's lines, since earlier
+        runs share it; that is one pass over the file, once per resume.
+        """
+        records = list(records)
+        if not records:
+            return
+        self._writer.checkpoint()
+        run_id = records[0].run_id
+        written = set()
+        with open(self.path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(row, dict) and row.get('run_id') == run_id:
+                    written.add((row.get('kind'), row.get('url')))
+        for record in records:
+            if (record.kind, record.url) not in written:
+                self.write(record)
+
+    def flush(self):
+        self._writer.checkpoint()
+
+    def close(self):
+        self._writer.close()
+
+class ParquetSink:
+    """Writes records to a Parquet file, one row group per batch (needs pyarrow).
+
+    A Parquet file can't be appended to once closed, so each run should get its
+    own file (an existing file is replaced); a directory of them can be read as
+    one dataset. A resumed run also starts the file again, with every record
+    the run had already saved. status_code is a string column, so codes like
+    "Connection Error" are kept as they are in the CSV.
+    """
+
+    def __init__(self, path, batch_size=DEFAULT_PARQUET_BATCH_SIZE):
+        if pyarrow is None:
+            raise ImportError("The Parquet sink needs pyarrow (pip install pyarrow)")
+        self.path = path
+        self.batch_size = batch_size
+        self._schema = pyarrow.schema([
+            (field, pyarrow.string()) for field in RECORD_FIELDS
+        ])
+        self._lock = threading.Lock()
+        self._batch = RecordBatch()
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+
+    def write(self, record):
+        with self._lock:
+            self._batch.append(record)
+            if len(self._batch) >= self.batch_size:
+                self._write_batch()
+
+    def _write_batch(self):
+        """Write the buffered records as one row group. Caller holds the lock."""
+        if self._batch:
+            columns = {field: self._batch.column(field) for field in RECORD_FIELDS}
+            columns['status_code'] = [str(code) if code is not None else None for code in columns['status_code']]
+            self._writer.write_table(pyarrow.Table.from_pydict(columns, schema=self._schema))
+            self._batch = RecordBatch()
+
+    def restore(self, records):
+        """Write the records a resumed run had already saved (the file was started again)."""
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        with self._lock:
+            self._write_batch()
+
+    def close(self):
+        with self._lock:
+            self._write_batch()
+            self._writer.close()
+
+class ResultStore:
+    """SQLite table of results from every run, indexed by domain, email and location.
+
+    Records are inserted in batches and keyed by (run_id, kind, url), so
+    writing the same record again (e.g. when an interrupted run is resumed)
+    is ignored instead of adding a duplicate. Queries flush pending records
+    first and read rows in pages, so results never have to fit in memory.
+    """
+
+    def __init__(self, path=DEFAULT_RESULTS_FILE, batch_size=DEFAULT_STORE_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._batch = RecordBatch()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS results (
+                    id INTEGER PRIMARY KEY,
+                    {', '.join(RECORD_FIELDS)},
+                    UNIQUE (run_id, kind, url)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS results_domain ON results (domain)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS results_email ON results (email)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS results_location ON results (location)")
+
+    def write(self, record):
+        with self._lock:
+            self._batch.append(record)
+            if len(self._batch) >= self.batch_size:
+                self._insert_batch()
+
+    def _insert_batch(self):
+        """Insert the buffered records in one transaction. Caller holds the lock."""
+        if self._batch:
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT OR IGNORE INTO results ({', '.join(RECORD_FIELDS)}) "
+                    f"VALUES ({', '.join('?' * len(RECORD_FIELDS))})",
+                    self._batch.rows()
+                )
+            self._batch = RecordBatch()
+
+    def restore(self, records):
+        """Write the records of a resumed run again; the ones already stored are ignored."""
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        with self._lock:
+            self._insert_batch()
+
+    def _where(self, kind, run_id):
+        query = " WHERE kind = ?"
+        params = [kind]
+        if run_id is not None:
+            query += " AND run_id = ?"
+            params.append(run_id)
+        return query, params
+
+    def count(self, kind, run_id=None):
+        """Number of stored records of a kind (in one run, or across all runs)."""
+        where, params = self._where(kind, run_id)
+        with self._lock:
+            self._insert_batch()
+            return self._conn.execute("SELECT COUNT(*) FROM results" + where, params).fetchone()[0]
+
+    def records(self, kind, run_id=None, page_size=1000):
+        """Yield stored records of a kind as ResultRecords, in the order they were first written."""
+        where, params = self._where(kind, run_id)
+        last_id = 0
+        while True:
+            with self._lock:
+                self._insert_batch()
+                rows = self._conn.execute(
+                    f"SELECT id, {', '.join(RECORD_FIELDS)} FROM results{where} AND id > ? ORDER BY id LIMIT ?",
+                    params + [last_id, page_size]
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield ResultRecord(*row[1:])
+            last_id = rows[-1][0]
+
+    def summary(self, kind, run_id=None):
+        """Aggregate a run's records: totals plus the number of records per status."""
+        where, params = self._where(kind, run_id)
+        with self._lock:
+            self._insert_batch()
+            total, with_email, with_phone = self._conn.execute(
+                f"SELECT COUNT(*), COUNT(email), COUNT(phone) FROM results{where}", params
+            ).fetchone()
+            by_status = self._conn.execute(
+                f"SELECT status_code, reason, COUNT(*) FROM results{where} "
+                f"GROUP BY status_code, reason ORDER BY COUNT(*) DESC",
+                params
+            ).fetchall()
+        return {
+            'total': total,
+            'with_email': with_email,
+            'with_phone': with_phone,
+            'by_status': by_status,
+        }
+
+    def close(self):
+        with self._lock:
+            self._insert_batch()
+            self._conn.close()
+
+class StoredResults:
+    """Lazy view of one run's records in a results database: supports len() and iteration, loads nothing up front.
+
+    With path None (see empty()) the view has no records, for a run that stopped before it started.
+    """
+
+    def __init__(self, path, kind, run_id):
+        self.path = path
+        self.kind = kind
+        self.run_id = run_id
+
+    @classmethod
+    def empty(cls, kind):
+        """Return a view with no records, without opening a database."""
+        return cls(None, kind, None)
+
+    def __len__(self):
+        if self.path is None:
+            return 0
+        store = ResultStore(self.path)
+        try:
+            return store.count(self.kind, self.run_id)
+        finally:
+            store.close()
+
+    def __iter__(self):
+        if self.path is None:
+            return
+        store = ResultStore(self.path)
+        try:
+            yield from store.records(self.kind, self.run_id)
+        finally:
+            store.close()
+
+def open_sink(spec):
+    """Return a sink for a path (by extension: .jsonl, .parquet, .sqlite/.db), or the spec itself if it already is one."""
+    if not isinstance(spec, str):
+        return spec
+    if spec.endswith('.jsonl'):
+        return JsonlSink(spec)
+    if spec.endswith('.parquet'):
+        return ParquetSink(spec)
+    if spec.endswith(('.sqlite', '.db')):
+        return ResultStore(spec)
+    raise ValueError(f"Don't know which sink to use for {spec} (expected .jsonl, .parquet, .sqlite or .db)")
+
+class SinkGroup:
+    """Sends every record to several sinks."""
+
+    def __init__(self, sinks):
+        self.sinks = [open_sink(sink) for sink in sinks]
+
+    def write(self, record):
+        for sink in self.sinks:
+            sink.write(record)
+
+    def restore(self, records):
+        """Hand the records a resumed run had already saved to each sink, to write the ones it lost.
+
+        Only sinks with a restore() method get them; any other sink object is
+        left as it is rather than risk writing its records twice.
+        """
+        records = list(records)
+        for sink in self.sinks:
+            restore = getattr(sink, 'restore', None)
+            if restore is not None:
+                restore(records)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
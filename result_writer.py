@@ -0,0 +1,147 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from metrics import get_metrics
+
+# Records are written in batches of up to this many lines, or after this many seconds
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+class ResultWriter:
+    """Appends lines to an output file from a background thread in batches.
+
+    write() can be called from any number of threads and only queues the
+    line. The background thread writes whatever has queued up once the batch
+    is full or flush_interval seconds after the first line of the batch was
+    queued, and fsyncs after every batch, so the file is never more than one
+    batch behind. checkpoint() blocks until everything queued so far is on
+    disk. A last line left half written by a crash is cut off when the file
+    is opened, so every line in the file is complete.
+    """
+
+    def __init__(self, path, header=None, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        drop_partial_line(path)
+        self._file = open(path, 'a', newline='', encoding='utf-8')
+        if header and self._file.tell() == 0:
+            self._file.write(header)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"ResultWriter({path})", daemon=True)
+        self._thread.start()
+
+    def write(self, text):
+        """Queue text (one or more complete lines) to be appended to the file."""
+        if self._closed:
+            raise ValueError(f"ResultWriter for {self.path} is closed")
+        self._queue.put(text)
+
+    def checkpoint(self):
+        """Block until everything written so far has been flushed and fsynced."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        """Write out anything still queued and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def _flush(self, batch):
+        metrics = get_metrics()
+        with metrics.timer("log_flush"):
+            if batch:
+                text = "".join(batch)
+                self._file.write(text)
+                batch.clear()
+                if metrics.enabled:
+                    metrics.observe_bytes("log_flush", len(text.encode('utf-8')))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _run(self):
+        batch = []
+        flush_at = None  # When the pending batch is due, counted from its first line
+        while True:
+            try:
+                timeout = None if flush_at is None else max(0.0, flush_at - time.monotonic())
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                # The batch has waited flush_interval - write out what we have
+                self._flush(batch)
+                flush_at = None
+                continue
+
+            if item is None:
+                self._flush(batch)
+                return
+            if isinstance(item, threading.Event):
+                self._flush(batch)
+                flush_at = None
+                item.set()
+                continue
+
+            batch.append(item)
+            if flush_at is None:
+                flush_at = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size or time.monotonic() >= flush_at:
+                # A steady trickle never lets get() time out, so the interval is checked here too
+                self._flush(batch)
+                flush_at = None
+
+def drop_partial_line(path):
+    """Cut off the last line of a file if a crash left it half written (without its newline)."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as file:
+        end = file.seek(0, os.SEEK_END)
+        # Walk back to the last newline
+        pos = end
+        while pos > 0:
+            step = min(pos, 64 * 1024)
+            file.seek(pos - step)
+            newline = file.read(step).rfind(b"\n")
+            if newline >= 0:
+                pos = pos - step + newline + 1
+                break
+            pos -= step
+        if pos != end:
+            file.truncate(pos)
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def get_writer(path, header=None):
+    """Return the shared writer for a file, creating it on first use."""
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = ResultWriter(path, header=header)
+            _writers[path] = writer
+        return writer
+
+def close_writer(path):
+    """Flush and close the shared writer for a file (e.g. before truncating it)."""
+    with _writers_lock:
+        writer = _writers.pop(path, None)
+    if writer is not None:
+        writer.close()
+
+def close_writers():
+    """Flush and close every shared writer."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+# Make sure queued records reach the disk on a normal exit
+atexit.register(close_writers)
@@ -0,0 +1,192 @@
+import itertools
+import json
+import sqlite3
+import threading
+import time
+from records import to_json
+
+# Task states in the work queue
+QUEUED = "queued"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+
+# URLs queued per transaction, so a long seed list doesn't hold one giant write open
+ENQUEUE_CHUNK_SIZE = 10000
+
+class RunState:
+    """Durable state of a collection run, so a crashed or killed run can pick up where it stopped.
+
+    Keeps the URL work queue (queued / in-flight / done, in processing order),
+    which search steps have completed, the run's counters and the result of
+    each finished URL in SQLite. Every update is committed straight away, so
+    the state on disk is never more than one record behind. It can also hold
+    the run's claimed sites for a SeenIndex (see claim()), so deduping a huge
+    seed list doesn't keep them all in memory.
+    """
+
+    def __init__(self, path, resume=True):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS run (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS steps (name TEXT PRIMARY KEY)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    url TEXT PRIMARY KEY,
+                    seq INTEGER,
+                    location TEXT,
+                    state TEXT,
+                    result TEXT,
+                    updated_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_seq ON tasks (seq)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS claims (key TEXT PRIMARY KEY, url TEXT) WITHOUT ROWID")
+
+            status = self._get("status")
+            self.resumed = resume and status == "running"
+            if self.resumed:
+                # Anything that was in flight when the run died has to be done again
+                self._conn.execute("UPDATE tasks SET state = ? WHERE state = ?", (QUEUED, IN_FLIGHT))
+            else:
+                self._conn.execute("DELETE FROM run")
+                self._conn.execute("DELETE FROM steps")
+                self._conn.execute("DELETE FROM tasks")
+                self._conn.execute("DELETE FROM claims")
+                self._set("status", "running")
+                self._set("started_at", str(time.time()))
+            # Identifies the run's records in the result store; stays the same when resumed
+            self.run_id = self._get("started_at")
+
+    def _get(self, key):
+        row = self._conn.execute("SELECT value FROM run WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO run VALUES (?, ?)", (key, value))
+
+    def load_counters(self, defaults):
+        """Return the saved counters, falling back to the given defaults."""
+        with self._lock:
+            saved = self._get("counters")
+        counters = dict(defaults)
+        if saved:
+            counters.update(json.loads(saved))
+        return counters
+
+    def save_counters(self, counters):
+        with self._lock, self._conn:
+            self._set("counters", json.dumps(counters))
+
+    def step_done(self, name):
+        """True if a step (e.g. a search query) already completed in this run."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM steps WHERE name = ?", (name,)).fetchone() is not None
+
+    def enqueue(self, urls, location=None, step=None, chunk_size=ENQUEUE_CHUNK_SIZE):
+        """Add URLs to the work queue (ignoring ones already queued) and optionally mark a step as done.
+
+        urls can be any iterable; it is consumed lazily and committed
+        chunk_size URLs at a time, so a generator over a huge seed list is
+        queued without holding it (or one huge transaction) in memory. The
+        step is only marked done once every URL is queued; a run interrupted
+        before that queues them again on resume, and the ones already queued
+        are ignored.
+        """
+        urls = iter(urls)
+        now = time.time()
+        while True:
+            chunk = list(itertools.islice(urls, chunk_size))
+            with self._lock, self._conn:
+                seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM tasks").fetchone()[0]
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO tasks VALUES (?, ?, ?, ?, NULL, ?)",
+                    ((url, next_seq, location, QUEUED, now) for next_seq, url in zip(itertools.count(seq + 1), chunk))
+                )
+                if len(chunk) < chunk_size and step is not None:
+                    self._conn.execute("INSERT OR IGNORE INTO steps VALUES (?)", (step,))
+            if len(chunk) < chunk_size:
+                return
+
+    def pending(self, location=None):
+        """Return the URLs that still have to be processed, in queue order."""
+        query = "SELECT url FROM tasks WHERE state != ?"
+        params = [DONE]
+        if location is not None:
+            query += " AND location = ?"
+            params.append(location)
+        with self._lock:
+            return [row[0] for row in self._conn.execute(query + " ORDER BY seq", params)]
+
+    def iter_pending(self, location=None, page_size=1000):
+        """Yield the URLs that still have to be processed, in queue order, reading them in pages."""
+        query = "SELECT seq, url FROM tasks WHERE state != ? AND seq > ?"
+        location_clause = " AND location = ?" if location is not None else ""
+        last_seq = 0
+        while True:
+            params = [DONE, last_seq] + ([location] if location is not None else []) + [page_size]
+            with self._lock:
+                rows = self._conn.execute(query + location_clause + " ORDER BY seq LIMIT ?", params).fetchall()
+            if not rows:
+                return
+            for _, url in rows:
+                yield url
+            last_seq = rows[-1][0]
+
+    def mark_in_flight(self, url):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE tasks SET state = ?, updated_at = ? WHERE url = ?", (IN_FLIGHT, time.time(), url)
+            )
+
+    def mark_done(self, url, result=None, counters=None):
+        """Record a processed URL, its result (if any) and the updated counters in one transaction."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE tasks SET state = ?, result = ?, updated_at = ? WHERE url = ?",
+                (DONE, json.dumps(result, default=to_json) if result is not None else None, time.time(), url)
+            )
+            if counters is not None:
+                self._set("counters", json.dumps(counters))
+
+    def _held_by_other(self, keys, url):
+        placeholders = ", ".join("?" for _ in keys)
+        return self._conn.execute(
+            f"SELECT 1 FROM claims WHERE key IN ({placeholders}) AND url != ? LIMIT 1", list(keys) + [url]
+        ).fetchone() is not None
+
+    def claimed(self, keys, url):
+        """True if any of the keys was claimed in this run by a URL other than url."""
+        with self._lock:
+            return self._held_by_other(keys, url)
+
+    def claim(self, keys, url):
+        """Claim the keys (e.g. a site's host and URL) for url. Returns False if another URL holds any of them.
+
+        A URL can claim its own keys again, so a resumed run still gets the
+        sites it had claimed before it was interrupted.
+        """
+        with self._lock, self._conn:
+            if self._held_by_other(keys, url):
+                return False
+            self._conn.executemany("INSERT OR IGNORE INTO claims VALUES (?, ?)", [(key, url) for key in keys])
+            return True
+
+    def results(self):
+        """Return the saved results of finished URLs, in queue order (records come back as lists, see records.to_json)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result FROM tasks WHERE state = ? AND result IS NOT NULL ORDER BY seq", (DONE,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def finish(self):
+        """Mark the run as complete so the next run starts from scratch."""
+        with self._lock, self._conn:
+            self._set("status", "done")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,148 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+from metrics import get_metrics
+from url_utils import url_host
+
+# Minimum number of seconds between two requests to the same host...
+DEFAULT_MIN_INTERVAL = 1.0
+# ...after a burst of this many, which may start back to back (a HEAD, the page and its contact pages)
+DEFAULT_BURST = 5
+# Maximum number of requests in flight across all hosts
+DEFAULT_MAX_CONCURRENCY = 20
+# Google search endpoint, used as the scheduler key for search queries
+SEARCH_URL = "https://www.google.com/search"
+# Never wait longer than this for a single host (protects against absurd Retry-After values)
+MAX_HOST_DELAY = 300.0
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into a number of seconds, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class HostScheduler:
+    """Spaces out requests to the same host while letting different hosts run at full speed.
+
+    The first `burst` requests to a host may start back to back, so a site's
+    page and its contact pages are fetched together; after that requests are
+    spaced at least min_interval apart (a burst builds up again while the
+    host is idle). A robots.txt Crawl-delay or set_interval() gives a host a
+    fixed interval with no burst, and Retry-After responses hold it back. A
+    semaphore caps the number of requests in flight across all hosts.
+    """
+
+    def __init__(self, min_interval=DEFAULT_MIN_INTERVAL, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 robots_fetcher=None, user_agent="*", burst=DEFAULT_BURST):
+        self.min_interval = min_interval
+        self.burst = burst
+        self.robots_fetcher = robots_fetcher  # Callable(robots_url) -> robots.txt text or None
+        self.user_agent = user_agent
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._next_start = {}  # host -> monotonic time the host's reserved requests are spaced out until
+        self._not_before = {}  # host -> monotonic time before which nothing may be sent (Retry-After)
+        self._rules = {}  # host -> (interval, burst) once known (robots.txt or set_interval)
+        self._robots_locks = {}  # host -> lock held while robots.txt is fetched
+
+    def set_interval(self, host, seconds):
+        """Use a fixed interval (and no burst) for a host instead of the default/robots.txt one."""
+        with self._lock:
+            self._rules[host] = (seconds, 1)
+
+    def defer(self, url, seconds):
+        """Don't send any request to the URL's host for the given number of seconds."""
+        host = url_host(url)
+        seconds = min(seconds, MAX_HOST_DELAY)
+        with self._lock:
+            not_before = time.monotonic() + seconds
+            self._not_before[host] = max(self._not_before.get(host, 0.0), not_before)
+
+    def note_response(self, url, status_code, headers):
+        """Honour Retry-After on throttling responses."""
+        if status_code in (429, 503):
+            retry_after = parse_retry_after(headers.get('Retry-After'))
+            if retry_after:
+                self.defer(url, retry_after)
+
+    def _host_rule(self, url, host):
+        """Return the (interval, burst) for a host, fetching robots.txt the first time it is needed."""
+        with self._lock:
+            if host in self._rules:
+                return self._rules[host]
+            if self.robots_fetcher is None:
+                return self.min_interval, self.burst
+            robots_lock = self._robots_locks.setdefault(host, threading.Lock())
+
+        # Only one thread fetches robots.txt per host; the others wait for its result
+        with robots_lock:
+            with self._lock:
+                if host in self._rules:
+                    return self._rules[host]
+
+            rule = (self.min_interval, self.burst)
+            parts = urlsplit(url)
+            robots_text = self.robots_fetcher(f"{parts.scheme}://{parts.netloc}/robots.txt")
+            if robots_text:
+                parser = RobotFileParser()
+                parser.parse(robots_text.splitlines())
+                crawl_delay = parser.crawl_delay(self.user_agent)
+                if crawl_delay:
+                    rule = (max(self.min_interval, min(float(crawl_delay), MAX_HOST_DELAY)), 1)
+
+            with self._lock:
+                self._rules[host] = rule
+            return rule
+
+    def _start_time(self, host, interval, burst, now):
+        """Earliest time a new request to the host may start. Caller holds the lock."""
+        next_start = self._next_start.get(host, now)
+        return max(now, next_start - (burst - 1) * interval, self._not_before.get(host, 0.0))
+
+    def wait_for_host(self, url):
+        """Reserve the next request slot for the URL's host and sleep until it arrives."""
+        host = url_host(url)
+
+        # robots.txt is only looked up once a host has used up its burst, so dead
+        # hosts and a site's page with its contact pages never cost an extra request
+        with self._lock:
+            rule = self._rules.get(host)
+            lookup_robots = rule is None and self.robots_fetcher is not None and (
+                self._start_time(host, self.min_interval, self.burst, time.monotonic()) > time.monotonic()
+            )
+        if lookup_robots:
+            rule = self._host_rule(url, host)
+
+        with self._lock:
+            interval, burst = rule or self._rules.get(host) or (self.min_interval, self.burst)
+            now = time.monotonic()
+            start = self._start_time(host, interval, burst, now)
+            self._next_start[host] = max(self._next_start.get(host, now), start) + interval
+
+        if start > now:
+            time.sleep(start - now)
+
+    @contextmanager
+    def slot(self, url):
+        """Context manager that waits for the host's turn and holds a global concurrency slot."""
+        # Wait for the host first so a throttled host doesn't hold up a global slot
+        with get_metrics().timer("host_wait"):
+            self.wait_for_host(url)
+            self._semaphore.acquire()
+        try:
+            yield
+        finally:
+            self._semaphore.release()
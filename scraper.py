@@ -1,13 +1,46 @@
-import requests
 from googlesearch import search
 import pytz
 from datetime import datetime
-import re
-from bs4 import BeautifulSoup
 import os
 import random
+import argparse
+from extractor import first_email, first_phone
+from parse_pool import parse_page, configure_parse_pool, close_parse_pool
+from contact_crawler import crawl_contact_pages
+from fetcher import fetch_page, get_scheduler, configure_cache
+from scheduler import SEARCH_URL
+from url_utils import url_host
+from worker_pool import imap_ordered, DEFAULT_WORKERS
+from search_cache import get_search_cache, configure_search_cache
+from seen_index import SeenIndex
+from run_state import RunState
+from dns_cache import configure_resolver, get_resolver, DEFAULT_DNS_CACHE_FILE
+from result_writer import get_writer, close_writer
+from business_hours import BusinessHoursIndex
+from task_queue import Coordinator, open_task_queue
+from result_store import ResultStore, SinkGroup, StoredResults, DEFAULT_RESULTS_FILE
+from records import BUSINESS_CONTACT, ContactInfo, ResultRecord, make_record
+from logger import get_logger
+from metrics import configure_metrics, get_metrics, timer
+from timeout_policy import reset_timeout_policy
+from seed_list import iter_seed_urls
+
+logger = get_logger("scraper")
+# Per-website lines - silence them with configure_logging(site_level="WARNING")
+site_logger = get_logger("sites")
 
 LOG_FILE = "business_contacts_log.txt"
+# Index of domains already checked in earlier runs (used with skip_seen=True)
+SEEN_INDEX_FILE = "business_contacts_seen.sqlite"
+# Work queue and progress of the current run, used to resume after a crash
+RUN_STATE_FILE = "business_contacts_state.sqlite"
+# Name of this collector's queue when websites are checked by worker processes
+TASK_QUEUE_NAME = "business_contacts"
+
+# Minimum seconds between two search queries
+SEARCH_INTERVAL = 2
+# Location logged for websites that come from a seed list instead of a search
+SEED_LOCATION = "Seed list"
 
 # Updated list of primarily English-speaking regions with accurate categorization
 ENGLISH_SPEAKING_REGIONS = [
@@ -60,149 +93,164 @@ ENGLISH_SPEAKING_REGIONS = [
     "Asia/Dubai",        # UAE
 ]
 
+# Mapping of timezones to more readable location names
+TIMEZONE_LOCATIONS = {
+    "Europe/London": "United Kingdom",
+    "Europe/Dublin": "Ireland",
+    "America/New_York": "Eastern USA",
+    "America/Chicago": "Central USA",
+    "America/Denver": "Mountain USA",
+    "America/Los_Angeles": "Western USA",
+    "America/Toronto": "Eastern Canada",
+    "America/Winnipeg": "Central Canada",
+    "America/Edmonton": "Western Canada",
+    "America/Vancouver": "Western Canada",
+    "Australia/Sydney": "Eastern Australia",
+    "Australia/Adelaide": "Central Australia",
+    "Australia/Perth": "Western Australia",
+    "Pacific/Auckland": "New Zealand",
+    "America/Jamaica": "Jamaica",
+    "America/Barbados": "Barbados",
+    "America/Nassau": "Bahamas",
+    "America/Port_of_Spain": "Trinidad and Tobago",
+    "Africa/Johannesburg": "South Africa",
+    "Africa/Lagos": "Nigeria",
+    "Africa/Nairobi": "Kenya",
+    "Africa/Accra": "Ghana",
+    "Asia/Singapore": "Singapore",
+    "Asia/Hong_Kong": "Hong Kong",
+    "Asia/Manila": "Philippines",
+    "Europe/Amsterdam": "Netherlands",
+    "Europe/Stockholm": "Sweden",
+    "Europe/Oslo": "Norway",
+    "Europe/Copenhagen": "Denmark",
+    "Europe/Berlin": "Germany",
+    "Europe/Zurich": "Switzerland",
+    "Asia/Dubai": "UAE",
+}
+
+# Business hours schedules, built once per set of zones and hours
+_business_hours_indexes = {}
+
+def get_business_hours_index(start_hour=7, end_hour=14, english_only=True):
+    """Return the shared schedule of when the English-speaking (or all) time zones are in the given hours."""
+    key = (start_hour, end_hour, english_only)
+    if key not in _business_hours_indexes:
+        time_zones_to_check = ENGLISH_SPEAKING_REGIONS if english_only else pytz.all_timezones
+        _business_hours_indexes[key] = BusinessHoursIndex(time_zones_to_check, start_hour, end_hour)
+    return _business_hours_indexes[key]
+
 def get_time_zones_in_range(start_hour=7, end_hour=14, english_only=True):
     """Returns a list of time zones where the local time is within the given range."""
-    valid_time_zones = []
-    current_utc_time = datetime.utcnow()
-    
-    # Get all time zones or just English speaking ones
-    time_zones_to_check = ENGLISH_SPEAKING_REGIONS if english_only else pytz.all_timezones
-    
-    print(f"Checking time zones between {start_hour}:00 and {end_hour}:00 local time...")
-    
-    for tz in time_zones_to_check:
-        try:
-            # Get current time in this timezone
-            local_time = datetime.now(pytz.timezone(tz))
-            local_hour = local_time.hour
-            
-            if start_hour <= local_hour <= end_hour:
-                valid_time_zones.append(tz)
-                print(f"✓ {tz}: Current time is {local_time.strftime('%H:%M')} - Within business hours")
-            else:
-                print(f"✗ {tz}: Current time is {local_time.strftime('%H:%M')} - Outside business hours")
-        except Exception as e:
-            # Skip any timezone that causes errors
-            print(f"! Error with timezone {tz}: {str(e)}")
-            continue
-    
-    return valid_time_zones
+    logger.info(f"Checking time zones between {start_hour}:00 and {end_hour}:00 local time...")
+    return get_business_hours_index(start_hour, end_hour, english_only).zones_in_hours()
 
 def get_company_websites(query, num_results=10):
-    """Search Google for companies and return their website URLs."""
+    """Search Google for companies and return their website URLs.
+
+    Results come from the search cache when the same query was already searched.
+    """
     websites = []
+    
+    def run_search():
+        # Space out repeat queries to the search engine
+        scheduler = get_scheduler()
+        scheduler.set_interval(url_host(SEARCH_URL), SEARCH_INTERVAL)
+        scheduler.wait_for_host(SEARCH_URL)
+        with timer("search"):
+            for result in search(query, num=num_results, stop=num_results):
+                websites.append(result)
+        return websites
+    
     try:
-        for result in search(query, num=num_results, stop=num_results):
-            websites.append(result)
+        return get_search_cache().search(query, num_results, run_search)
     except Exception as e:
-        print(f"Error fetching Google search results: {e}")
+        logger.warning(f"Error fetching Google search results: {e}")
     return websites
 
-def extract_contact_info(url):
-    """Extract email addresses and phone numbers from a website."""
+def extract_contact_info(url, result=None):
+    """Extract an email address and phone number from a website and its contact/about pages, as ContactInfo.
+
+    If a FetchResult for the URL is passed in, its body is reused instead of fetching again.
+    """
     email = None
     phone = None
     
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, timeout=10, headers=headers)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract text content
-        text = soup.get_text()
+        if result is None:
+            result = fetch_page(url)
+        if result.error is not None:
+            raise result.error
         
-        # Find emails using regex
-        email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        emails = re.findall(email_pattern, text)
-        if emails:
-            # Filter out common false positives
-            filtered_emails = [e for e in emails if not (e.endswith('.png') or e.endswith('.jpg') or e.endswith('.gif'))]
-            if filtered_emails:
-                email = filtered_emails[0]  # Take the first valid email found
+        # Single pass over the page for emails and phone numbers
+        page_info = parse_page(result.text, result.final_url)
+        email = first_email(page_info)  # Take the first valid email found
+        phone = first_phone(page_info)  # Take the first phone found
         
-        # Find phone numbers using regex (improved pattern)
-        phone_pattern = r'(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
-        phones = re.findall(phone_pattern, text)
-        if phones:
-            phone = phones[0]  # Take the first phone found
+        # Fill in whatever is missing from the site's contact/about pages
+        email, phone = crawl_contact_pages(page_info, email, phone)
                 
     except Exception as e:
-        print(f"Error extracting contact info from {url}: {str(e)}")
+        site_logger.warning("Error extracting contact info from %s: %s", url, e)
         
-    return email, phone
+    return ContactInfo(email=email, phone=phone)
 
-def check_website_status(url):
-    """Check website status."""
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, timeout=10, headers=headers)
-        if response.status_code == 200:
-            return "OK"
-        else:
-            return f"Error {response.status_code}"
-    except requests.exceptions.RequestException as e:
-        return f"Connection Failed: {str(e)}"
+def check_website_status(url, result=None):
+    """Check website status.
+
+    If a FetchResult for the URL is passed in, it is used instead of fetching again.
+    """
+    if result is None:
+        result = fetch_page(url)
+    if result.error is not None:
+        return f"Connection Failed: {str(result.error)}"
+    if result.status_code == 200:
+        return "OK"
+    else:
+        return f"Error {result.status_code}"
 
-def log_business_contact(url, location, email=None, phone=None):
-    """Log business contact information to a file."""
-    with open(LOG_FILE, "a") as file:
+def contact_line(url, location, email, phone, timestamp):
+    """Format one line of the contact log."""
+    contact_info = ""
+    if email:
+        contact_info += f" | Email: {email}"
+    if phone:
+        contact_info += f" | Phone: {phone}"
+    return f"{timestamp} - {url} (Location: {location}){contact_info}\n"
+
+def log_business_contact(url, location, email=None, phone=None, timestamp=None):
+    """Log business contact information to a file (written in batches by a background writer)."""
+    if timestamp is None:
         timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
-        contact_info = ""
-        if email:
-            contact_info += f" | Email: {email}"
-        if phone:
-            contact_info += f" | Phone: {phone}"
-        
-        if email or phone:  # Only log if we have either email or phone
-            file.write(f"{timestamp} - {url} (Location: {location}){contact_info}\n")
-            return True
-        return False
+    
+    if email or phone:  # Only log if we have either email or phone
+        with timer("log"):
+            get_writer(LOG_FILE).write(contact_line(url, location, email, phone, timestamp))
+        return True
+    return False
+
+def restore_contact_log(records):
+    """Log the contacts of a resumed run that never reached LOG_FILE before it was interrupted.
+
+    The log is started again by every fresh run, so each line in it belongs
+    to this run; a record whose URL has no line is written again.
+    """
+    writer = get_writer(LOG_FILE)
+    writer.checkpoint()
+    logged = set()
+    with open(LOG_FILE, encoding="utf-8") as file:
+        for line in file:
+            if not line.startswith("#") and " - " in line:
+                logged.add(line.split(" - ", 1)[1].split(" (Location: ", 1)[0])
+    for record in records:
+        if record.url not in logged:
+            writer.write(contact_line(record.url, record.location, record.email, record.phone, record.timestamp))
 
 def get_location_name(timezone):
     """Get a more user-friendly location name from a timezone."""
-    # Mapping of timezones to more readable location names
-    timezone_mapping = {
-        "Europe/London": "United Kingdom",
-        "Europe/Dublin": "Ireland",
-        "America/New_York": "Eastern USA",
-        "America/Chicago": "Central USA",
-        "America/Denver": "Mountain USA",
-        "America/Los_Angeles": "Western USA",
-        "America/Toronto": "Eastern Canada",
-        "America/Winnipeg": "Central Canada",
-        "America/Edmonton": "Western Canada",
-        "America/Vancouver": "Western Canada",
-        "Australia/Sydney": "Eastern Australia",
-        "Australia/Adelaide": "Central Australia",
-        "Australia/Perth": "Western Australia",
-        "Pacific/Auckland": "New Zealand",
-        "America/Jamaica": "Jamaica",
-        "America/Barbados": "Barbados",
-        "America/Nassau": "Bahamas",
-        "America/Port_of_Spain": "Trinidad and Tobago",
-        "Africa/Johannesburg": "South Africa",
-        "Africa/Lagos": "Nigeria",
-        "Africa/Nairobi": "Kenya",
-        "Africa/Accra": "Ghana",
-        "Asia/Singapore": "Singapore",
-        "Asia/Hong_Kong": "Hong Kong",
-        "Asia/Manila": "Philippines",
-        "Europe/Amsterdam": "Netherlands",
-        "Europe/Stockholm": "Sweden",
-        "Europe/Oslo": "Norway",
-        "Europe/Copenhagen": "Denmark",
-        "Europe/Berlin": "Germany",
-        "Europe/Zurich": "Switzerland",
-        "Asia/Dubai": "UAE",
-    }
-    
     # Check if we have a mapping for this timezone
-    if timezone in timezone_mapping:
-        return timezone_mapping[timezone]
+    if timezone in TIMEZONE_LOCATIONS:
+        return TIMEZONE_LOCATIONS[timezone]
     
     # Otherwise, fallback to the old method
     if '/' in timezone:
@@ -215,103 +263,230 @@ def get_location_name(timezone):
     
     return location
 
-def collect_business_contacts(num_results=10, max_contacts=100, english_only=True):
-    """Collect contact information for businesses in time zones where local time is between 7 AM and 2 PM."""
-    valid_time_zones = get_time_zones_in_range(english_only=english_only)
+def check_business_website(website):
+    """Fetch a website once and return its (status, ContactInfo)."""
+    with timer("website", url_host(website)):
+        # Fetch once and reuse the response for both the status check and extraction
+        result = fetch_page(website, stop_on_contacts=True)
+        
+        # Check if website is accessible
+        status = check_website_status(website, result)
+        
+        # Extract contact information
+        contact = extract_contact_info(website, result)
     
-    if not valid_time_zones:
-        print("No valid time zones found in the given range.")
-        return []
+    return status, contact
+
+def decode_business_check(result):
+    """Rebuild a check_business_website result read back from the task queue."""
+    status, contact = result
+    return status, ContactInfo.from_json(contact)
+
+def collect_business_contacts(num_results=10, max_contacts=100, english_only=True, workers=DEFAULT_WORKERS, use_cache=False, skip_seen=False, resume=True, sinks=(), task_queue=None, parse_processes=0, metrics_file=None, profile_stages=(), seeds=None, seed_column=None):
+    """Collect contact information for businesses in time zones where local time is between 7 AM and 2 PM.
+
+    Websites are checked concurrently by up to `workers` threads; results are
+    processed in search order, so the output is the same as a sequential run.
+    With use_cache=True, responses, search results and DNS lookups are kept on disk between runs.
+    A website whose domain was already checked is skipped; with skip_seen=True
+    this also covers domains checked in earlier runs.
+    Progress is checkpointed to RUN_STATE_FILE after every website; with resume=True
+    an interrupted run continues where it stopped instead of searching again.
+    Contacts are streamed to the result store (DEFAULT_RESULTS_FILE) and to any
+    extra sinks (paths ending in .jsonl, .parquet, .sqlite or sink objects); the
+    returned contacts are read back from the store as ResultRecords.
+    With task_queue (a SQLite queue file or redis:// URL), websites are checked
+    by worker processes (see worker.py) instead of local threads; this process
+    coordinates them, logs every result once and stops them at max_contacts.
+    With parse_processes > 0, pages are parsed in that many processes instead
+    of in the fetching threads.
+    With metrics_file, per-stage latency and byte histograms (overall and per
+    host) are written to it at the end, as JSON if it ends with .json and in
+    the Prometheus text format otherwise; stages in profile_stages (e.g.
+    "parse") are also profiled with cProfile next to it.
+    With seeds (a seed file path or a list of them: .txt, .csv, .jsonl, any
+    of them gzipped), websites are streamed from the files instead of searched
+    for, whatever the time of day; seed_column names the CSV column or JSON
+    key holding the URL. See seed_list.iter_seed_urls.
+    """
+    if metrics_file:
+        configure_metrics(profile_stages=profile_stages)
+    # Timeouts adapt to this run's latencies and failing domains are remembered for this run only
+    reset_timeout_policy()
     
-    businesses_with_contacts = []
-    total_companies_checked = 0
+    if use_cache:
+        configure_cache()
+        configure_search_cache()
+        configure_resolver(path=DEFAULT_DNS_CACHE_FILE)
     
-    print(f"\nChecking websites in {'English-speaking regions' if english_only else 'all regions'} where it's between 7 AM and 2 PM...")
-    print(f"Will continue searching until collecting contact info for {max_contacts} businesses...")
-    print(f"Found {len(valid_time_zones)} time zones in business hours: {', '.join(valid_time_zones)}")
+    valid_time_zones = get_time_zones_in_range(english_only=english_only) if seeds is None else []
     
-    # Clear previous log file
-    with open(LOG_FILE, "w") as file:
-        file.write(f"# Business Contact Information - Generated {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}\n")
-        file.write(f"# Format: Timestamp - Website URL (Location) | Email: email@example.com | Phone: phone_number\n\n")
+    if seeds is None and not valid_time_zones:
+        logger.info("No valid time zones found in the given range.")
+        return StoredResults.empty(BUSINESS_CONTACT)
     
-    # Start by explicitly searching in UK first
-    print(f"\nSearching for companies in the United Kingdom...")
-    uk_search_query = "companies in United Kingdom"
-    uk_websites = get_company_websites(uk_search_query, num_results*3)  # Get more results for UK
+    if parse_processes:
+        configure_parse_pool(processes=parse_processes)
     
-    for website in uk_websites:
-        total_companies_checked += 1
-        
-        # Check if website is accessible
-        status = check_website_status(website)
-        
-        # Extract contact information
-        email, phone = extract_contact_info(website)
-        
-        if email or phone:
-            print(f"✅ Contact found: {website} | Email: {email} | Phone: {phone}")
-            if log_business_contact(website, "United Kingdom", email, phone):
-                businesses_with_contacts.append((website, "United Kingdom", email, phone))
-                print(f"Progress: Collected {len(businesses_with_contacts)} of {max_contacts} business contacts")
+    run_state = RunState(RUN_STATE_FILE, resume=resume)
+    counters = run_state.load_counters({'total_companies_checked': 0, 'contacts_collected': 0})
+    # A seed list can be any length, so its claimed sites are kept in the state file rather than in memory
+    seen_index = SeenIndex(SEEN_INDEX_FILE if skip_seen else None, claims=run_state if seeds is not None else None)
+    store = ResultStore(DEFAULT_RESULTS_FILE)
+    output = SinkGroup([store] + list(sinks))
+    coordinator = None
+    if task_queue is not None:
+        coordinator = Coordinator(open_task_queue(task_queue, TASK_QUEUE_NAME))
+        # A fresh run empties the queue; a resumed one keeps its tasks and results
+        coordinator.start(run_state.run_id)
+    
+    if seeds is not None:
+        logger.info(f"\nChecking websites from the seed list until collecting contact info for {max_contacts} businesses...")
+    else:
+        logger.info(f"\nChecking websites in {'English-speaking regions' if english_only else 'all regions'} where it's between 7 AM and 2 PM...")
+        logger.info(f"Will continue searching until collecting contact info for {max_contacts} businesses...")
+        logger.info(f"Found {len(valid_time_zones)} time zones in business hours: {', '.join(valid_time_zones)}")
+    
+    if run_state.resumed:
+        logger.info(f"Resuming interrupted run: {counters['total_companies_checked']} companies already checked, "
+              f"{counters['contacts_collected']} contacts collected.")
+        # Records and log lines are written in batches, so restore any that were lost with the interrupted run
+        records = [ResultRecord.from_json(record) for record in run_state.results()]
+        output.restore(records)
+        restore_contact_log(records)
+    else:
+        # Clear previous log file
+        close_writer(LOG_FILE)
+        with open(LOG_FILE, "w", encoding="utf-8") as file:
+            file.write(f"# Business Contact Information - Generated {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}\n")
+            file.write(f"# Format: Timestamp - Website URL (Location) | Email: email@example.com | Phone: phone_number\n\n")
+    
+    def get_location_websites(search_query, location, count):
+        """Return the websites still to check for a location, searching only if this run hasn't yet."""
+        if not run_state.step_done(location):
+            websites = get_company_websites(search_query, count)
+            run_state.enqueue(websites, location=location, step=location)
+        websites = run_state.pending(location=location)
+        get_resolver().prefetch(url_host(website) for website in websites)  # Resolve all hosts in parallel
+        return websites
+    
+    def check_queued_website(website):
+        run_state.mark_in_flight(website)
+        return check_business_website(website)
+    
+    def check_location_websites(websites, location):
+        """Check websites for one location until max_contacts contacts have been collected."""
+        if coordinator is not None:
+            # Keep no more websites queued than there are contacts still wanted
+            results = coordinator.imap(
+                seen_index.filter_new(websites), location, decode=decode_business_check,
+                budget=lambda: max_contacts - counters['contacts_collected'],
+            )
         else:
-            print(f"❌ No contact info: {website} ({status})")
-        
-        if len(businesses_with_contacts) >= max_contacts:
-            break
+            results = imap_ordered(check_queued_website, seen_index.filter_new(websites), workers)
+        for website, (status, contact) in results:
+            counters['total_companies_checked'] += 1
+            seen_index.mark(website)
+            record = None
+            
+            if contact.found:
+                site_logger.info("✅ Contact found: %s | Email: %s | Phone: %s", website, contact.email, contact.phone)
+                timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+                if log_business_contact(website, location, contact.email, contact.phone, timestamp):
+                    record = make_record(
+                        BUSINESS_CONTACT, run_state.run_id, website, timestamp=timestamp,
+                        location=location, email=contact.email, phone=contact.phone,
+                    )
+                    output.write(record)
+                    counters['contacts_collected'] += 1
+                    logger.info("Progress: Collected %d of %d business contacts", counters['contacts_collected'], max_contacts)
+            else:
+                site_logger.info("❌ No contact info: %s (%s)", website, status)
+            
+            # Checkpoint the website, its contact and the counters together
+            # (a log line still waiting in its batch is rebuilt from the contact on resume)
+            run_state.mark_done(website, record, counters=counters)
+            
+            if counters['contacts_collected'] >= max_contacts:
+                break
+    
+    if seeds is not None and counters['contacts_collected'] < max_contacts:
+        # Stream the seed list into the work queue (deduped there) and check it page by page
+        if not run_state.step_done(SEED_LOCATION):
+            run_state.enqueue(iter_seed_urls(seeds, column=seed_column), location=SEED_LOCATION, step=SEED_LOCATION)
+        check_location_websites(run_state.iter_pending(location=SEED_LOCATION), SEED_LOCATION)
+    
+    # Start by explicitly searching in UK first
+    if seeds is None and counters['contacts_collected'] < max_contacts:
+        logger.info(f"\nSearching for companies in the United Kingdom...")
+        uk_search_query = "companies in United Kingdom"
+        uk_websites = get_location_websites(uk_search_query, "United Kingdom", num_results*3)  # Get more results for UK
+        check_location_websites(uk_websites, "United Kingdom")
+    
+    # Several time zones map to the same location (e.g. Edmonton and Vancouver),
+    # so remember which locations were already searched
+    searched_locations = {"United Kingdom"}
     
     # If we still need more contacts, continue with other regions
-    if len(businesses_with_contacts) < max_contacts:
+    if counters['contacts_collected'] < max_contacts:
         # Then search through time zones
         for tz in valid_time_zones:
-            if len(businesses_with_contacts) >= max_contacts:
-                print(f"\nReached maximum of {max_contacts} business contacts collected. Stopping.")
+            if counters['contacts_collected'] >= max_contacts:
+                logger.info(f"\nReached maximum of {max_contacts} business contacts collected. Stopping.")
                 break
                 
             location = get_location_name(tz)
-            # Skip UK as we already searched there
-            if location == "United Kingdom":
+            # Skip UK and any other location we already searched
+            if location in searched_locations:
                 continue
+            searched_locations.add(location)
                 
             search_query = f"companies in {location}"
             
-            print(f"\nSearching for companies in {location}...")
-            websites = get_company_websites(search_query, num_results)
-            
-            for website in websites:
-                total_companies_checked += 1
-                
-                # Check if website is accessible
-                status = check_website_status(website)
-                
-                # Extract contact information
-                email, phone = extract_contact_info(website)
-                
-                if email or phone:
-                    print(f"✅ Contact found: {website} | Email: {email} | Phone: {phone}")
-                    if log_business_contact(website, location, email, phone):
-                        businesses_with_contacts.append((website, location, email, phone))
-                        print(f"Progress: Collected {len(businesses_with_contacts)} of {max_contacts} business contacts")
-                else:
-                    print(f"❌ No contact info: {website} ({status})")
-                
-                if len(businesses_with_contacts) >= max_contacts:
-                    break
+            logger.info(f"\nSearching for companies in {location}...")
+            websites = get_location_websites(search_query, location, num_results)
+            check_location_websites(websites, location)
 
-    print(f"\nTotal companies checked: {total_companies_checked}")
-    print(f"Total business contacts collected: {len(businesses_with_contacts)}")
+    # Everything logged has to be on disk before the run counts as finished
+    close_writer(LOG_FILE)
+    output.flush()
+    if coordinator is not None:
+        coordinator.stop()
+        coordinator.task_queue.close()
+    run_state.finish()
+    run_id = run_state.run_id
+    run_state.close()
+    seen_index.close()
+    output.close()
+    if parse_processes:
+        close_parse_pool()
+    if metrics_file:
+        get_metrics().export(metrics_file)
+    
+    businesses_with_contacts = StoredResults(DEFAULT_RESULTS_FILE, BUSINESS_CONTACT, run_id)
+    
+    logger.info(f"\nTotal companies checked: {counters['total_companies_checked']}")
+    logger.info(f"Total business contacts collected: {counters['contacts_collected']}")
     
-    if businesses_with_contacts:
-        print("\nBusiness Contacts Collected:")
-        for site, loc, email, phone in businesses_with_contacts:
-            email_info = f" | Email: {email}" if email else ""
-            phone_info = f" | Phone: {phone}" if phone else ""
-            print(f"{site} (Location: {loc}){email_info}{phone_info}")
-        print(f"\nResults have been logged to {LOG_FILE}")
+    if counters['contacts_collected']:
+        logger.info("\nBusiness Contacts Collected:")
+        for record in businesses_with_contacts:
+            email_info = f" | Email: {record.email}" if record.email else ""
+            phone_info = f" | Phone: {record.phone}" if record.phone else ""
+            logger.info(f"{record.url} (Location: {record.location}){email_info}{phone_info}")
+        logger.info(f"\nResults have been logged to {LOG_FILE}")
     else:
-        print("\nNo business contacts found.")
+        logger.info("\nNo business contacts found.")
+    if metrics_file:
+        logger.info(f"Run metrics have been written to {metrics_file}")
     
     return businesses_with_contacts
 
 if __name__ == "__main__":
-    collect_business_contacts(num_results=10, max_contacts=100, english_only=True) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Collect business contacts from regions in business hours.")
+    parser.add_argument("--use-cache", action="store_true", help="keep responses, search results and DNS lookups on disk")
+    parser.add_argument("--skip-seen", action="store_true", help="skip sites checked in earlier runs")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run instead of starting over")
+    args = parser.parse_args()
+    collect_business_contacts(num_results=10, max_contacts=100, english_only=True, workers=DEFAULT_WORKERS,
+                              use_cache=args.use_cache, skip_seen=args.skip_seen, resume=args.resume) 
\ No newline at end of file
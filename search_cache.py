@@ -0,0 +1,112 @@
+import json
+import sqlite3
+import threading
+import time
+
+# Default location and lifetime of the persistent search cache
+DEFAULT_SEARCH_CACHE_FILE = "search_cache.sqlite"
+DEFAULT_SEARCH_TTL = 7 * 24 * 60 * 60  # Seconds before a cached query is searched again
+
+def normalize_query(query):
+    """Normalize a search query so trivially different spellings share a cache entry."""
+    return " ".join(query.lower().split())
+
+class SearchCache:
+    """Caches search results per query and coalesces identical queries.
+
+    Within a run each query is only searched once, even if several callers ask
+    for it at the same time. If a path is given, results are also persisted to
+    SQLite and reused by later runs until they are older than the TTL.
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_SEARCH_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memory = {}  # query -> (num_results, results) for this run
+        self._query_locks = {}  # query -> lock held while the query is being searched
+        self._conn = None
+        if path is not None:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._lock, self._conn:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS searches (
+                        query TEXT PRIMARY KEY,
+                        num_results INTEGER,
+                        results TEXT,
+                        searched_at REAL
+                    )
+                """)
+
+    def _lookup(self, query, num_results):
+        """Return cached results for a query if at least num_results were requested last time."""
+        with self._lock:
+            cached = self._memory.get(query)
+            if cached is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT num_results, results, searched_at FROM searches WHERE query = ?", (query,)
+                ).fetchone()
+                if row is not None and time.time() - row[2] < self.ttl:
+                    cached = (row[0], json.loads(row[1]))
+                    self._memory[query] = cached
+        if cached is not None and cached[0] >= num_results:
+            return cached[1][:num_results]
+        return None
+
+    def _store(self, query, num_results, results):
+        with self._lock:
+            self._memory[query] = (num_results, list(results))
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?)",
+                        (query, num_results, json.dumps(list(results)), time.time())
+                    )
+
+    def search(self, query, num_results, run_search):
+        """Return results for a query, calling run_search() only on a cache miss.
+
+        run_search must return the list of result URLs; if it raises, nothing is cached.
+        """
+        key = normalize_query(query)
+        results = self._lookup(key, num_results)
+        if results is not None:
+            return results
+
+        with self._lock:
+            query_lock = self._query_locks.setdefault(key, threading.Lock())
+
+        # If another caller is already searching the same query, wait for its results
+        with query_lock:
+            results = self._lookup(key, num_results)
+            if results is not None:
+                return results
+            results = run_search()
+            self._store(key, num_results, results)
+            return results
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+def configure_search_cache(path=DEFAULT_SEARCH_CACHE_FILE, ttl=DEFAULT_SEARCH_TTL):
+    """Persist search results to disk (pass path=None to keep them in memory only)."""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is not None:
+            _search_cache.close()
+        _search_cache = SearchCache(path, ttl)
+    return _search_cache
+
+def get_search_cache():
+    """Return the search cache shared by both collectors (in-memory only until configured)."""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchCache()
+    return _search_cache
@@ -0,0 +1,150 @@
+import csv
+import gzip
+import io
+import json
+from collections import OrderedDict
+from url_utils import normalize_url
+
+# Column/key names tried (in order) when a CSV or JSONL seed file doesn't say which one holds the URL
+URL_COLUMNS = ('url', 'website', 'domain', 'site', 'homepage', 'URL', 'Website', 'Domain')
+
+# How many recent URLs are remembered to drop repeats within a seed file (exact dedupe happens in the run's queue)
+RECENT_URLS = 100000
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+def open_seed_file(path):
+    """Open a seed file for reading text, decompressing it on the fly if it is gzipped."""
+    with open(path, 'rb') as f:
+        magic = f.read(2)
+    if magic == GZIP_MAGIC:
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8', errors='replace', newline='')
+    return open(path, encoding='utf-8', errors='replace', newline='')
+
+def _seed_format(path):
+    name = path.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    if name.endswith(('.csv', '.tsv')):
+        return 'tsv' if name.endswith('.tsv') else 'csv'
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return 'txt'
+
+def _csv_header(path, delimiter):
+    with open_seed_file(path) as lines:
+        first = next(csv.reader(lines, delimiter=delimiter), None)
+    return [name.strip() for name in first] if first is not None else []
+
+def check_seed_files(paths, column=None):
+    """Raise ValueError if a CSV/TSV seed file has no column named column, before anything is read."""
+    if column is None:
+        return
+    for path in paths:
+        seed_format = _seed_format(path)
+        if seed_format not in ('csv', 'tsv'):
+            continue
+        names = _csv_header(path, '\t' if seed_format == 'tsv' else ',')
+        if column not in names:
+            raise ValueError(f"Seed file {path} has no column named {column!r} (its header is {', '.join(names)})")
+
+def _csv_values(lines, column, delimiter):
+    reader = csv.reader(lines, delimiter=delimiter)
+    first = next(reader, None)
+    if first is None:
+        return
+    names = [name.strip() for name in first]
+    if column is not None:
+        index = names.index(column)  # Checked by check_seed_files
+    else:
+        index = next((names.index(name) for name in URL_COLUMNS if name in names), None)
+        if index is None:
+            # No header - the URL is in the first column, and the first row is data
+            index = 0
+            yield first[0] if first else ""
+    for row in reader:
+        if len(row) > index:
+            yield row[index]
+
+def _jsonl_values(lines, column):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(value, str):
+            yield value
+        elif isinstance(value, dict):
+            key = column or next((name for name in URL_COLUMNS if name in value), None)
+            if key is not None and isinstance(value.get(key), str):
+                yield value[key]
+
+def _text_values(lines):
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line.split()[0]
+
+def read_seed_values(path, column=None):
+    """Yield the raw URL/domain values of a seed file one at a time.
+
+    The format comes from the extension (after an optional .gz): .csv/.tsv
+    (the column named column, else the first of URL_COLUMNS in the header, else
+    the first column), .jsonl/.ndjson (the key named column, else the first of
+    URL_COLUMNS, or the line itself if it is a JSON string) and anything else
+    as plain text with one URL or domain per line (# starts a comment line).
+    """
+    seed_format = _seed_format(path)
+    with open_seed_file(path) as lines:
+        if seed_format in ('csv', 'tsv'):
+            yield from _csv_values(lines, column, '\t' if seed_format == 'tsv' else ',')
+        elif seed_format == 'jsonl':
+            yield from _jsonl_values(lines, column)
+        else:
+            yield from _text_values(lines)
+
+def normalize_seed(value):
+    """Turn a URL or bare domain into a normalized http(s) URL, or None if it isn't one."""
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        url = normalize_url(value)
+    except ValueError:
+        return None
+    if not url.startswith(('http://', 'https://')):
+        return None
+    host = url.split('://', 1)[1].split('/', 1)[0].split(':', 1)[0]
+    if '.' not in host or ' ' in host:
+        return None
+    return url
+
+def iter_seed_urls(paths, column=None, recent=RECENT_URLS):
+    """Stream normalized seed URLs from a seed file or a list of them.
+
+    Works in constant memory: values are read, normalized and yielded one at
+    a time, and repeats are dropped while they are among the last `recent`
+    distinct URLs (sorted lists and lists with nearby duplicates are fully
+    deduped). The run's work queue drops any remaining repeats on disk.
+    A CSV/TSV file without the column is reported here, with a ValueError,
+    rather than partway through the list.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    check_seed_files(paths, column)
+    return _iter_seed_urls(paths, column, recent)
+
+def _iter_seed_urls(paths, column, recent):
+    seen = OrderedDict()
+    for path in paths:
+        for value in read_seed_values(path, column):
+            url = normalize_seed(value)
+            if url is None or url in seen:
+                continue
+            seen[url] = None
+            if len(seen) > recent:
+                seen.popitem(last=False)
+            yield url
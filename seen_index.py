@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+import time
+from url_utils import normalize_url, registrable_domain
+
+class SeenIndex:
+    """Index of sites that were already processed, keyed by registrable domain and normalized URL.
+
+    www.acme.com, acme.com and shop.acme.com are one company. Businesses on
+    shared hosting (joe.github.io, shop.myshopify.com...) are still separate
+    sites, as the public suffix list's private section makes each of them
+    its own registrable domain.
+
+    claim() dedupes within a run; mark() records a site once it has been fully
+    processed. If a path is given, marked sites are persisted to SQLite so later
+    runs skip them before any fetch. Claims are kept in memory, or with
+    claims (a RunState) in the run's state file, which keeps memory flat
+    for a seed list of any length.
+    """
+
+    def __init__(self, path=None, claims=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._claims = claims
+        self._claimed = set()  # Domains and URLs handed out during this run, unless claims is given
+        self._conn = None
+        if path is not None:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._lock, self._conn:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS seen (
+                        key TEXT PRIMARY KEY,
+                        seen_at REAL
+                    ) WITHOUT ROWID
+                """)
+
+    @staticmethod
+    def _keys(url):
+        return ("domain:" + registrable_domain(url), "url:" + normalize_url(url))
+
+    def _persisted(self, keys):
+        if self._conn is None:
+            return False
+        placeholders = ", ".join("?" for _ in keys)
+        row = self._conn.execute(f"SELECT 1 FROM seen WHERE key IN ({placeholders}) LIMIT 1", keys).fetchone()
+        return row is not None
+
+    def is_seen(self, url):
+        """True if the URL or its domain was claimed this run or processed in an earlier one."""
+        keys = self._keys(url)
+        with self._lock:
+            if self._claims is not None:
+                return self._claims.claimed(keys, url) or self._persisted(keys)
+            return any(key in self._claimed for key in keys) or self._persisted(keys)
+
+    def claim(self, url):
+        """Claim a URL for processing. Returns False if it (or its domain) was already seen."""
+        keys = self._keys(url)
+        with self._lock:
+            if self._persisted(keys):
+                return False
+            if self._claims is not None:
+                return self._claims.claim(keys, url)
+            if any(key in self._claimed for key in keys):
+                return False
+            self._claimed.update(keys)
+            return True
+
+    def mark(self, url):
+        """Record that a URL has been processed so later runs skip it."""
+        keys = self._keys(url)
+        with self._lock:
+            if self._claims is None:
+                self._claimed.update(keys)
+            if self._conn is not None:
+                now = time.time()
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO seen VALUES (?, ?)", [(key, now) for key in keys]
+                    )
+
+    def filter_new(self, urls):
+        """Yield only the URLs that haven't been seen, claiming each one as it goes."""
+        for url in urls:
+            if self.claim(url):
+                yield url
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
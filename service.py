@@ -0,0 +1,188 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from collections import deque
+from fetcher import configure_cache
+from url_utils import url_host
+from worker_pool import DEFAULT_WORKERS
+from search_cache import configure_search_cache
+from seen_index import SeenIndex
+from dns_cache import configure_resolver, get_resolver, DEFAULT_DNS_CACHE_FILE
+from result_writer import get_writer, close_writer
+from timeout_policy import reset_timeout_policy
+from result_store import ResultStore, SinkGroup, DEFAULT_RESULTS_FILE
+from records import BUSINESS_CONTACT, make_record
+from logger import get_logger
+from scraper import (
+    LOG_FILE, SEEN_INDEX_FILE, get_business_hours_index, get_location_name, get_company_websites,
+    check_business_website, log_business_contact,
+)
+
+logger = get_logger("service")
+site_logger = get_logger("sites")
+
+# Longest time to sleep before checking the time zone window again
+MAX_IDLE_WAIT = 60
+# Seconds between flushes of the result store while the service is running
+STORE_FLUSH_INTERVAL = 5
+
+class ContactService:
+    """Long-running version of collect_business_contacts.
+
+    Keeps one worker pool, the caches and the output files open for as long as
+    it runs. The business hours window is re-checked as time passes: a location
+    whose time zone enters business hours is searched and its websites are
+    queued; when it leaves, its queued websites are dropped and the ones in
+    flight are allowed to finish. Contacts are written out as they are found.
+    Websites are claimed when they are dispatched, so the ones dropped with a
+    location can be checked when it is back in business hours. Domains are
+    never checked twice, including across restarts.
+    """
+
+    def __init__(self, num_results=10, english_only=True, workers=DEFAULT_WORKERS, sinks=()):
+        self.num_results = num_results
+        self.workers = workers
+        self.index = get_business_hours_index(english_only=english_only)
+        self.seen_index = SeenIndex(SEEN_INDEX_FILE)
+        self.output = SinkGroup([ResultStore(DEFAULT_RESULTS_FILE)] + list(sinks))
+        self.run_id = str(time.time())
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.active_locations = set()
+        self.queues = {}  # location -> deque of websites still to check
+        self.in_flight = {}  # future -> (kind, location, website)
+        self.counters = {'total_companies_checked': 0, 'contacts_collected': 0}
+
+    def update_locations(self, now):
+        """Start locations that entered business hours and drain the ones that left."""
+        locations = set()
+        for tz in self.index.zones_in_hours(now):
+            locations.add(get_location_name(tz))
+
+        entered = locations - self.active_locations
+        if entered:
+            # A new window: the latencies and failing hosts of the last one don't carry over
+            reset_timeout_policy()
+        for location in entered:
+            logger.info(f"\n{location} entered business hours - searching for companies...")
+            self.queues[location] = deque()
+            self.submit('search', location, f"companies in {location}")
+
+        for location in self.active_locations - locations:
+            dropped = len(self.queues.pop(location, ()))
+            logger.info(f"\n{location} left business hours - dropping {dropped} queued websites.")
+
+        self.active_locations = locations
+
+    def submit(self, kind, location, item):
+        if kind == 'search':
+            future = self.executor.submit(get_company_websites, item, self.num_results)
+        else:
+            future = self.executor.submit(check_business_website, item)
+        self.in_flight[future] = (kind, location, item)
+
+    def fill_pool(self):
+        """Queue website checks from the active locations in turn until every worker is busy."""
+        while len(self.in_flight) < self.workers:
+            queues = [(location, queue) for location, queue in self.queues.items() if queue]
+            if not queues:
+                return
+            for location, queue in queues:
+                if len(self.in_flight) >= self.workers:
+                    return
+                website = queue.popleft()
+                # Claimed only now, so a website dropped with its location isn't lost for good
+                if self.seen_index.claim(website):
+                    self.submit('check', location, website)
+
+    def handle(self, future):
+        kind, location, item = self.in_flight.pop(future)
+        try:
+            result = future.result()
+        except Exception as e:
+            site_logger.warning("Error in %s for %s: %s", kind, item, e)
+            return
+
+        if kind == 'search':
+            if location not in self.queues:
+                return  # Left business hours while searching
+            websites = [website for website in result if not self.seen_index.is_seen(website)]
+            get_resolver().prefetch(url_host(website) for website in websites)
+            self.queues[location].extend(websites)
+            logger.info(f"Queued {len(websites)} new websites for {location}")
+            return
+
+        status, contact = result
+        self.counters['total_companies_checked'] += 1
+        self.seen_index.mark(item)
+        if contact.found:
+            site_logger.info("✅ Contact found: %s | Email: %s | Phone: %s", item, contact.email, contact.phone)
+            if log_business_contact(item, location, contact.email, contact.phone):
+                self.output.write(make_record(
+                    BUSINESS_CONTACT, self.run_id, item,
+                    timestamp=datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
+                    location=location, email=contact.email, phone=contact.phone,
+                ))
+                self.counters['contacts_collected'] += 1
+        else:
+            site_logger.info("❌ No contact info: %s (%s)", item, status)
+
+    def run(self, run_for=None):
+        """Run until interrupted (Ctrl+C) or for run_for seconds, then finish the work in flight."""
+        stop_at = time.time() + run_for if run_for is not None else None
+        last_flush = time.time()
+        try:
+            while stop_at is None or time.time() < stop_at:
+                now = time.time()
+                self.update_locations(now)
+                self.fill_pool()
+
+                # Sleep until some work finishes or the window next changes
+                timeout = MAX_IDLE_WAIT
+                next_event = self.index.next_event(now)
+                if next_event is not None:
+                    timeout = min(timeout, max(next_event - now, 0) + 1)
+                if stop_at is not None:
+                    timeout = min(timeout, max(stop_at - now, 0))
+                if self.in_flight:
+                    done, _ = wait(list(self.in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.handle(future)
+                else:
+                    time.sleep(timeout)
+
+                if time.time() - last_flush >= STORE_FLUSH_INTERVAL:
+                    self.output.flush()
+                    get_writer(LOG_FILE).checkpoint()
+                    last_flush = time.time()
+        except KeyboardInterrupt:
+            logger.info("\nStopping - finishing websites in flight...")
+        finally:
+            self.queues.clear()
+            for future in list(self.in_flight):
+                future.cancel()
+            for future in wait(list(self.in_flight)).done:
+                if not future.cancelled():
+                    self.handle(future)
+            self.executor.shutdown()
+            close_writer(LOG_FILE)
+            self.output.close()
+            self.seen_index.close()
+            logger.info(f"\nTotal companies checked: {self.counters['total_companies_checked']}")
+            logger.info(f"Total business contacts collected: {self.counters['contacts_collected']}")
+        return self.counters
+
+def serve_business_contacts(num_results=10, english_only=True, workers=DEFAULT_WORKERS, sinks=(), run_for=None):
+    """Collect business contacts continuously, following business hours around the world.
+
+    Responses, search results and DNS lookups are cached on disk, and domains
+    checked before (by this service or collect_business_contacts with
+    skip_seen=True) are skipped. Contacts are appended to LOG_FILE and the
+    result store as they are found.
+    """
+    configure_cache()
+    configure_search_cache()
+    configure_resolver(path=DEFAULT_DNS_CACHE_FILE)
+    return ContactService(num_results, english_only, workers, sinks).run(run_for)
+
+if __name__ == "__main__":
+    serve_business_contacts(num_results=10, english_only=True, workers=DEFAULT_WORKERS)
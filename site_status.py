@@ -0,0 +1,96 @@
+import sqlite3
+import threading
+from url_utils import registrable_domain
+from records import Record, BROKEN
+from result_store import DEFAULT_RESULTS_FILE, DEFAULT_STORE_BATCH_SIZE
+
+# How a site's status changed between two checks
+NEWLY_BROKEN = "newly broken"
+STILL_BROKEN = "still broken"
+RECOVERED = "recovered"
+STILL_WORKING = "still working"
+
+SITE_FIELDS = ('url', 'domain', 'status', 'status_code', 'reason', 'company', 'email', 'phone', 'checked_at')
+
+class Site(Record):
+    """A tracked site and the outcome of its last check (see SITE_FIELDS)."""
+
+    __slots__ = SITE_FIELDS
+
+def status_change(previous, current):
+    """Name the change from one status (BROKEN/WORKING) to the next."""
+    if current == BROKEN:
+        return STILL_BROKEN if previous == BROKEN else NEWLY_BROKEN
+    return RECOVERED if previous == BROKEN else STILL_WORKING
+
+class SiteStatusStore:
+    """The current status of every known site, one row per URL, updated in place by each re-check.
+
+    Kept in the results database by default. Contact details stay with a
+    site when it recovers, so they can be reused if it breaks again. Updates
+    are committed in batches; flush() commits the pending ones.
+    """
+
+    def __init__(self, path=DEFAULT_RESULTS_FILE, batch_size=DEFAULT_STORE_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending = 0  # Updates not committed yet
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS site_status (
+                    {', '.join(SITE_FIELDS)},
+                    PRIMARY KEY (url)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS site_status_status ON site_status (status)")
+
+    def add(self, sites):
+        """Start tracking sites (Site records). Sites already tracked keep their current row."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO site_status ({', '.join(SITE_FIELDS)}) "
+                f"VALUES ({', '.join('?' * len(SITE_FIELDS))})",
+                (
+                    tuple(registrable_domain(site.url) if field == 'domain' else getattr(site, field)
+                          for field in SITE_FIELDS)
+                    for site in sites
+                )
+            )
+
+    def sites(self, status=None):
+        """Return the tracked sites (optionally only those with a status) as Site records, oldest check first."""
+        query = f"SELECT {', '.join(SITE_FIELDS)} FROM site_status"
+        params = []
+        if status is not None:
+            query += " WHERE status = ?"
+            params.append(status)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY checked_at, url", params).fetchall()
+        return [Site(*row) for row in rows]
+
+    def update(self, url, status, status_code, reason, checked_at, company=None, email=None, phone=None):
+        """Record the result of checking a site; contact details are only replaced by ones that were found."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE site_status SET status = ?, status_code = ?, reason = ?, checked_at = ?, "
+                "company = COALESCE(?, company), email = COALESCE(?, email), phone = COALESCE(?, phone) "
+                "WHERE url = ?",
+                (status, status_code, reason, checked_at, company, email, phone, url)
+            )
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self._conn.commit()
+                self._pending = 0
+
+    def flush(self):
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,371 @@
+import itertools
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from records import to_json
+
+# redis is optional - it is only needed for a queue on a Redis-compatible server
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Default location of the shared SQLite queue
+DEFAULT_QUEUE_FILE = "tasks.sqlite"
+
+# Seconds a worker may hold a task before it is handed to another worker
+DEFAULT_LEASE = 120
+# Times a task is handed out before it is given up on (e.g. it keeps crashing its worker)
+MAX_ATTEMPTS = 3
+# Seconds between polls while waiting for tasks or results
+POLL_INTERVAL = 0.5
+# Most tasks a coordinator keeps queued for the workers at once
+DEFAULT_WINDOW = 1000
+
+class SqliteTaskQueue:
+    """Shared URL work queue in a SQLite file, for worker processes on one machine (or a shared disk).
+
+    Each queue name is its own queue, so both collectors can use one file.
+    Tasks are leased to one worker at a time; a lease that isn't completed in
+    time (a worker crashed or hung) goes back to the queue. Only the first
+    completion of a task is kept, so every result is recorded exactly once.
+    Finished tasks get an increasing done_seq that results() pages through.
+    The queue belongs to one run at a time (see start()); leased tasks carry
+    the run's id, and a completion from an earlier run is ignored.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_FILE, name="tasks", lease=DEFAULT_LEASE):
+        self.path = path
+        self.name = name
+        self.lease_seconds = lease
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id INTEGER PRIMARY KEY,
+                    queue TEXT,
+                    url TEXT,
+                    location TEXT,
+                    state TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    lease_until REAL,
+                    done_seq INTEGER,
+                    result TEXT,
+                    UNIQUE (queue, url)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_state ON tasks (queue, state, id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_done ON tasks (queue, done_seq)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS runs (queue TEXT PRIMARY KEY, run_id TEXT, stopped INTEGER)")
+
+    def _transaction(self, work):
+        """Run work(conn) in a write transaction that other processes can't interleave with."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def put(self, urls, location=None):
+        """Add URLs to the queue; URLs that were queued before (in any state) are ignored."""
+        rows = [(self.name, url, location, "queued") for url in urls]
+        self._transaction(lambda conn: conn.executemany(
+            "INSERT OR IGNORE INTO tasks (queue, url, location, state) VALUES (?, ?, ?, ?)", rows
+        ))
+
+    def _run_id(self, conn):
+        row = conn.execute("SELECT run_id FROM runs WHERE queue = ?", (self.name,)).fetchone()
+        return row[0] if row else None
+
+    def lease(self):
+        """Hand out the next queued task as a dict (id, url, location, run), or None if there is none."""
+        def work(conn):
+            now = time.time()
+            # Expired leases go back to the queue (or are given up on after MAX_ATTEMPTS)
+            conn.execute(
+                "UPDATE tasks SET state = 'queued' WHERE queue = ? AND state = 'leased' AND lease_until < ? AND attempts < ?",
+                (self.name, now, MAX_ATTEMPTS)
+            )
+            self._give_up_expired(conn, now)
+            row = conn.execute(
+                "SELECT id, url, location FROM tasks WHERE queue = ? AND state = 'queued' ORDER BY id LIMIT 1",
+                (self.name,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE tasks SET state = 'leased', attempts = attempts + 1, lease_until = ? WHERE id = ?",
+                (now + self.lease_seconds, row[0])
+            )
+            return {'id': row[0], 'url': row[1], 'location': row[2], 'run': self._run_id(conn)}
+        return self._transaction(work)
+
+    def _give_up_expired(self, conn, now):
+        rows = conn.execute(
+            "SELECT id FROM tasks WHERE queue = ? AND state = 'leased' AND lease_until < ? AND attempts >= ?",
+            (self.name, now, MAX_ATTEMPTS)
+        ).fetchall()
+        for (task_id,) in rows:
+            self._finish(conn, task_id, None)
+
+    def _finish(self, conn, task_id, result):
+        done_seq = conn.execute(
+            "SELECT COALESCE(MAX(done_seq), 0) + 1 FROM tasks WHERE queue = ?", (self.name,)
+        ).fetchone()[0]
+        updated = conn.execute(
+            "UPDATE tasks SET state = 'done', done_seq = ?, result = ? WHERE id = ? AND state = 'leased'",
+            (done_seq, json.dumps(result, default=to_json) if result is not None else None, task_id)
+        )
+        return updated.rowcount == 1
+
+    def complete(self, task, result):
+        """Record the result of a leased task. Returns False if it was already completed by another worker,
+        or was leased in an earlier run."""
+        def work(conn):
+            if task.get('run') != self._run_id(conn):
+                return False
+            return self._finish(conn, task['id'], result)
+        return self._transaction(work)
+
+    def fail(self, task):
+        """Hand a leased task whose check raised back to the queue, or give up on it after MAX_ATTEMPTS."""
+        def work(conn):
+            if task.get('run') != self._run_id(conn):
+                return
+            row = conn.execute(
+                "SELECT attempts FROM tasks WHERE id = ? AND state = 'leased'", (task['id'],)
+            ).fetchone()
+            if row is None:
+                return  # Completed (or requeued) after its lease expired
+            if row[0] >= MAX_ATTEMPTS:
+                self._finish(conn, task['id'], None)
+            else:
+                conn.execute("UPDATE tasks SET state = 'queued' WHERE id = ?", (task['id'],))
+        self._transaction(work)
+
+    def results(self, after=0):
+        """Return (done_seq, url, location, result) for tasks finished after done_seq `after`, in order.
+
+        result is None for tasks that were given up on.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT done_seq, url, location, result FROM tasks WHERE queue = ? AND done_seq > ? ORDER BY done_seq",
+                (self.name, after)
+            ).fetchall()
+        return [(seq, url, location, json.loads(result) if result is not None else None)
+                for seq, url, location, result in rows]
+
+    def start(self, run_id):
+        """Hand the queue to a run. A new run_id empties the queue; the same one (a resumed run) keeps its tasks."""
+        def work(conn):
+            if self._run_id(conn) != run_id:
+                conn.execute("DELETE FROM tasks WHERE queue = ?", (self.name,))
+            conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, 0)", (self.name, run_id))
+        self._transaction(work)
+
+    def stop(self):
+        """Tell the workers the current run is over."""
+        self._transaction(lambda conn: conn.execute("UPDATE runs SET stopped = 1 WHERE queue = ?", (self.name,)))
+
+    def current_run(self):
+        """Return (run_id, stopped) for the run the queue belongs to; run_id is None before the first run."""
+        with self._lock:
+            row = self._conn.execute("SELECT run_id, stopped FROM runs WHERE queue = ?", (self.name,)).fetchone()
+        return (row[0], bool(row[1])) if row else (None, False)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class RedisTaskQueue:
+    """The same queue on a Redis-compatible server, for worker processes on several machines (needs redis).
+
+    Completion is decided by removing the task from the lease set, which only
+    one worker can do, so results are still recorded exactly once. Moving a
+    task between the queue and the lease set happens in one MULTI/EXEC.
+    """
+
+    _KEYS = ("urls", "tasks", "queued", "leases", "done")
+
+    def __init__(self, url, name="tasks", lease=DEFAULT_LEASE):
+        if redis is None:
+            raise ImportError("A Redis task queue needs the redis package (pip install redis)")
+        self.name = name
+        self.lease_seconds = lease
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+
+    def _key(self, part):
+        return f"{self.name}:{part}"
+
+    def put(self, urls, location=None):
+        for url in urls:
+            task_id = str(uuid.uuid4())
+            if self._redis.hsetnx(self._key("urls"), url, task_id):
+                task = {'id': task_id, 'url': url, 'location': location, 'attempts': 0}
+                self._redis.hset(self._key("tasks"), task_id, json.dumps(task))
+                self._redis.rpush(self._key("queued"), task_id)
+
+    def _release(self, task_id, expired_only):
+        """Take a task off the lease set and queue it again, or give up on it after MAX_ATTEMPTS.
+
+        Both happen in one MULTI/EXEC, and only if the task is still leased
+        (and, with expired_only, its lease has run out), so a task is never
+        lost or queued twice.
+        """
+        def release(pipe):
+            lease_until = pipe.zscore(self._key("leases"), task_id)
+            if lease_until is None or (expired_only and lease_until > time.time()):
+                pipe.multi()
+                return
+            task = json.loads(pipe.hget(self._key("tasks"), task_id))
+            pipe.multi()
+            pipe.zrem(self._key("leases"), task_id)
+            if task['attempts'] >= MAX_ATTEMPTS:
+                pipe.rpush(self._key("done"), json.dumps([task['url'], task['location'], None]))
+            else:
+                pipe.rpush(self._key("queued"), task_id)
+        self._redis.transaction(release, self._key("leases"))
+
+    def _requeue_expired(self):
+        for task_id in self._redis.zrangebyscore(self._key("leases"), "-inf", time.time()):
+            self._release(task_id, expired_only=True)
+
+    def lease(self):
+        self._requeue_expired()
+
+        # Taking the task off the queue and adding its lease happen in one MULTI/EXEC,
+        # so a worker that dies in between can't lose it; the WATCH makes two workers
+        # leasing at once retry rather than take the same task
+        def take(pipe):
+            task_id = pipe.lindex(self._key("queued"), 0)
+            if task_id is None:
+                pipe.multi()
+                return None
+            task = json.loads(pipe.hget(self._key("tasks"), task_id))
+            task['attempts'] += 1
+            pipe.multi()
+            pipe.lpop(self._key("queued"))
+            pipe.hset(self._key("tasks"), task_id, json.dumps(task))
+            pipe.zadd(self._key("leases"), {task_id: time.time() + self.lease_seconds})
+            return task
+        task = self._redis.transaction(take, self._key("queued"), value_from_callable=True)
+        if task is None:
+            return None
+        return {'id': task['id'], 'url': task['url'], 'location': task['location'], 'run': self._redis.hget(self._key("run"), "id")}
+
+    def complete(self, task, result):
+        if task.get('run') != self._redis.hget(self._key("run"), "id"):
+            return False
+        if not self._redis.zrem(self._key("leases"), task['id']):
+            return False
+        self._redis.rpush(self._key("done"), json.dumps([task['url'], task['location'], result], default=to_json))
+        return True
+
+    def fail(self, task):
+        if task.get('run') != self._redis.hget(self._key("run"), "id"):
+            return
+        self._release(task['id'], expired_only=False)
+
+    def results(self, after=0):
+        entries = self._redis.lrange(self._key("done"), after, -1)
+        return [(after + i + 1,) + tuple(json.loads(entry)) for i, entry in enumerate(entries)]
+
+    def start(self, run_id):
+        if self._redis.hget(self._key("run"), "id") != run_id:
+            self._redis.delete(*(self._key(part) for part in self._KEYS))
+        self._redis.hset(self._key("run"), mapping={"id": run_id, "stopped": 0})
+
+    def stop(self):
+        self._redis.hset(self._key("run"), "stopped", 1)
+
+    def current_run(self):
+        run_id, stopped = self._redis.hmget(self._key("run"), "id", "stopped")
+        return run_id, stopped == "1"
+
+    def close(self):
+        self._redis.close()
+
+def open_task_queue(spec, name):
+    """Open a shared queue: a redis:// URL for a Redis-compatible server, anything else is a SQLite file path."""
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisTaskQueue(spec, name)
+    return SqliteTaskQueue(spec, name)
+
+class Coordinator:
+    """Hands URL checks to worker processes through a shared queue and collects their results.
+
+    Workers (see worker.py) lease tasks, run the check and complete them with
+    the result. The coordinator is the only process that logs results, so the
+    log, the result store and max_contacts are handled in one place however
+    many workers there are.
+    """
+
+    def __init__(self, task_queue, poll_interval=POLL_INTERVAL):
+        self.task_queue = task_queue
+        self.poll_interval = poll_interval
+        self._cursor = 0
+        self._finished = {}  # url -> result of tasks finished but not yet asked for
+
+    def _collect(self):
+        for seq, url, location, result in self.task_queue.results(self._cursor):
+            self._finished[url] = result
+            self._cursor = seq
+
+    def imap(self, urls, location=None, window=DEFAULT_WINDOW, decode=None, budget=None):
+        """Queue urls for the workers and yield (url, result) as they finish.
+
+        urls is consumed lazily: at most `window` tasks are queued and not yet
+        yielded at any time, and the queue is topped up as results come in.
+        budget, if given, is called before each top-up and returns how many
+        more results the caller can use (e.g. contacts still wanted); no more
+        tasks than that are kept queued, so the workers don't check a window
+        of websites past the end of the run.
+        Tasks that were given up on are skipped. Breaking out of the loop stops
+        waiting, but tasks already queued are still processed by the workers.
+        Results travel through the queue as JSON, records as lists of their
+        values (see records.to_json); decode, if given, turns each result back
+        into what the check returned.
+        """
+        urls = iter(urls)
+        waiting = set()
+        exhausted = False
+        while True:
+            # Top up once half the window has finished, so workers never run dry
+            if not exhausted and len(waiting) <= window // 2:
+                wanted = window - len(waiting)
+                if budget is not None:
+                    wanted = min(wanted, max(0, budget() - len(waiting)))
+                batch = list(itertools.islice(urls, wanted))
+                exhausted = len(batch) < wanted
+                if batch:
+                    self.task_queue.put(batch, location)
+                    waiting.update(batch)
+            if not waiting:
+                return
+            self._collect()
+            ready = [url for url in self._finished if url in waiting]
+            if not ready:
+                time.sleep(self.poll_interval)
+                continue
+            for url in ready:
+                waiting.discard(url)
+                result = self._finished.pop(url)
+                if result is not None:
+                    yield url, decode(result) if decode is not None else result
+
+    def start(self, run_id):
+        """Hand the queue to a run (see SqliteTaskQueue.start); workers pick it up without restarting."""
+        self.task_queue.start(run_id)
+
+    def stop(self):
+        """Tell the workers this run is over."""
+        self.task_queue.stop()
@@ -8,5 +8,6 @@ if __name__ == "__main__":
     scraper.collect_business_contacts(
         num_results=2,     # Only 2 search results per region to speed up testing
         max_contacts=5,    # Only collect 5 contacts in total
-        english_only=True  # Still limit to English-speaking regions
+        english_only=True,  # Still limit to English-speaking regions
+        use_cache=True     # Reuse cached responses so repeated test runs are fast
     ) 
\ No newline at end of file
@@ -0,0 +1,65 @@
+import csv
+import pytest
+import broken_website_collector
+from records import BROKEN, BROKEN_WEBSITE, ContactInfo, Status, make_record
+from run_state import RunState
+
+URLS = [f"http://127.0.0.{i}/" for i in range(2, 6)]
+
+@pytest.fixture
+def collector(tmp_path, monkeypatch):
+    """The collector working in a temporary directory, with the checks stubbed out."""
+    monkeypatch.chdir(tmp_path)
+    checked = []
+
+    def check(url):
+        checked.append(url)
+        return Status(BROKEN, 500, "Internal Server Error"), ContactInfo("Co", f"info@{url[7:-1]}.example", None)
+
+    monkeypatch.setattr(broken_website_collector, "check_broken_website", check)
+    return checked
+
+def test_resume_after_an_interrupted_search_searches_again(collector, monkeypatch):
+    def killed_search(num_results=20):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(broken_website_collector, "get_company_websites", killed_search)
+    with pytest.raises(KeyboardInterrupt):
+        broken_website_collector.find_broken_websites_with_contacts(max_websites=10, max_contacts=10)
+    assert collector == []
+
+    monkeypatch.setattr(broken_website_collector, "get_company_websites", lambda num_results=20: list(URLS))
+    result = broken_website_collector.find_broken_websites_with_contacts(max_websites=10, max_contacts=10)
+    assert sorted(collector) == URLS
+    assert result['total_checked'] == len(URLS)
+    assert sorted(record.url for record in result['websites']) == URLS
+
+def test_resume_restores_csv_rows_lost_with_the_interrupted_run(collector):
+    # The interrupted run checked URLS[0] and URLS[1], but only the first row reached the CSV,
+    # and the crash cut the second one off half way
+    state = RunState(broken_website_collector.RUN_STATE_FILE, resume=False)
+    state.enqueue(URLS, step="search")
+    records = [
+        make_record(BROKEN_WEBSITE, state.run_id, url, "2026-01-01 00:00:00 UTC", company="Co",
+                    status_code="Connection Error", reason="refused", email=f"info@{i}.example")
+        for i, url in enumerate(URLS[:2])
+    ]
+    for record in records:
+        state.mark_done(record.url, record, counters={'total_checked': 2, 'total_broken': 2, 'with_contact': 2})
+    state.close()
+    with open(broken_website_collector.BROKEN_WEBSITES_LOG, 'w', newline='', encoding='utf-8') as csvfile:
+        csvfile.write(broken_website_collector.csv_line())
+        csvfile.write(broken_website_collector.broken_website_line(
+            URLS[0], "Co", "Connection Error", "refused", "info@0.example", None, "2026-01-01 00:00:00 UTC"
+        ))
+        csvfile.write(URLS[1] + ",Co,Conn")
+
+    result = broken_website_collector.find_broken_websites_with_contacts(max_websites=10, max_contacts=10)
+    assert sorted(collector) == URLS[2:]
+    assert result['total_checked'] == len(URLS)
+    with open(broken_website_collector.BROKEN_WEBSITES_LOG, newline='', encoding='utf-8') as csvfile:
+        rows = list(csv.DictReader(csvfile))
+    assert sorted(row['URL'] for row in rows) == URLS
+    assert rows[1] == {
+        'URL': URLS[1], 'Company': "Co", 'Status Code': "Connection Error", 'Reason': "refused",
+        'Email': "info@1.example", 'Phone': "Not found", 'Timestamp': "2026-01-01 00:00:00 UTC",
+    }
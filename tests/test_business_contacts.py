@@ -0,0 +1,30 @@
+import scraper
+from records import BUSINESS_CONTACT, make_record
+from result_store import StoredResults
+from result_writer import close_writer
+
+def test_restore_contact_log_writes_only_the_missing_lines(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    records = [
+        make_record(BUSINESS_CONTACT, "run1", url, "2026-01-01 00:00:00 UTC", location="England",
+                    email="info@example.com", phone=None)
+        for url in ("https://a.example/", "https://b.example/")
+    ]
+    with open(scraper.LOG_FILE, "w", encoding="utf-8") as file:
+        file.write("# Business Contact Information\n\n")
+        file.write(scraper.contact_line(records[0].url, "England", "info@example.com", None, records[0].timestamp))
+    scraper.restore_contact_log(records)
+    close_writer(scraper.LOG_FILE)
+    with open(scraper.LOG_FILE, encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    assert lines[2:] == [
+        "2026-01-01 00:00:00 UTC - https://a.example/ (Location: England) | Email: info@example.com",
+        "2026-01-01 00:00:00 UTC - https://b.example/ (Location: England) | Email: info@example.com",
+    ]
+
+def test_no_zones_in_business_hours_returns_empty_results(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(scraper, "get_time_zones_in_range", lambda english_only=True: [])
+    results = scraper.collect_business_contacts()
+    assert isinstance(results, StoredResults)
+    assert len(results) == 0 and list(results) == []
@@ -0,0 +1,32 @@
+from datetime import datetime
+import pytest
+import pytz
+from business_hours import BusinessHoursIndex, is_business_hours
+from scraper import ENGLISH_SPEAKING_REGIONS
+
+ZONES = ENGLISH_SPEAKING_REGIONS + ["UTC", "Etc/GMT-8", "Asia/Kolkata", "Australia/Lord_Howe"]
+
+# Two days around DST changes: US and Canada, Europe, Australia and New Zealand (end and start)
+TRANSITIONS = ["2026-03-08", "2026-03-29", "2026-04-05", "2026-09-27", "2026-10-04", "2026-11-01"]
+
+def brute_force(when, start_hour=7, end_hour=14):
+    """The check the schedule replaces: each zone's local hour right now."""
+    return [zone for zone in ZONES if start_hour <= datetime.fromtimestamp(when, pytz.timezone(zone)).hour <= end_hour]
+
+@pytest.mark.parametrize("day", TRANSITIONS)
+def test_schedule_matches_the_clock_across_dst_changes(day):
+    start = pytz.utc.localize(datetime.strptime(day, "%Y-%m-%d")).timestamp() - 24 * 60 * 60
+    index = BusinessHoursIndex(ZONES)
+    for step in range(0, 2 * 24 * 60 * 60, 15 * 60):
+        when = start + step
+        assert index.zones_in_hours(when) == brute_force(when), datetime.utcfromtimestamp(when)
+
+def test_next_change_lands_on_the_edge_of_the_window():
+    index = BusinessHoursIndex(["America/New_York", "Etc/GMT-8"])
+    when = pytz.utc.localize(datetime(2026, 3, 7, 12)).timestamp()  # 07:00 in New York, the day before DST starts
+    in_hours, change = index.next_change("America/New_York", when)
+    assert in_hours
+    assert datetime.fromtimestamp(change, pytz.timezone("America/New_York")).strftime("%H:%M") == "15:00"
+    in_hours, check = index.next_change("Etc/GMT-8", when)  # 20:00 there; checked again by the clock
+    assert not in_hours and when < check <= when + 15 * 60
+    assert not is_business_hours(pytz.timezone("Etc/GMT-8"), 7, 14, when)
@@ -0,0 +1,115 @@
+import socket
+import threading
+import pytest
+import dns_cache
+from dns_cache import Resolver, ResolutionError
+
+class StubLookup:
+    """Stub for Resolver's lookup function: answers from a dict and counts the queries per host."""
+
+    def __init__(self, answers, gate=None):
+        self.answers = answers
+        self.gate = gate  # If set, every lookup waits for it
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, host):
+        with self._lock:
+            self.calls[host] = self.calls.get(host, 0) + 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        answer = self.answers[host]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(dns_cache.time, "time", clock)
+    return clock
+
+def nonexistent():
+    return socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+def test_answers_are_cached():
+    lookup = StubLookup({"example.com": ["192.0.2.1"]})
+    resolver = Resolver(lookup=lookup)
+    assert resolver.resolve("example.com") == ["192.0.2.1"]
+    assert resolver.resolve("EXAMPLE.com.") == ["192.0.2.1"]
+    assert lookup.calls == {"example.com": 1}
+
+def test_nonexistent_domains_are_cached():
+    lookup = StubLookup({"gone.example": nonexistent()})
+    resolver = Resolver(lookup=lookup)
+    with pytest.raises(ResolutionError):
+        resolver.resolve("gone.example")
+    assert resolver.known_unresolvable("gone.example")
+    with pytest.raises(ResolutionError, match="cached"):
+        resolver.resolve("gone.example")
+    assert lookup.calls == {"gone.example": 1}
+
+def test_temporary_failures_are_not_cached():
+    lookup = StubLookup({"flaky.example": socket.gaierror(socket.EAI_AGAIN, "Temporary failure in name resolution")})
+    resolver = Resolver(lookup=lookup)
+    for _ in range(2):
+        with pytest.raises(ResolutionError):
+            resolver.resolve("flaky.example")
+    assert not resolver.known_unresolvable("flaky.example")
+    assert lookup.calls == {"flaky.example": 2}
+
+    lookup.answers["flaky.example"] = ["192.0.2.2"]
+    assert resolver.resolve("flaky.example") == ["192.0.2.2"]
+
+def test_entries_expire_after_their_ttl(clock):
+    lookup = StubLookup({"example.com": ["192.0.2.1"], "gone.example": nonexistent()})
+    resolver = Resolver(lookup=lookup, positive_ttl=60, negative_ttl=600)
+    resolver.resolve("example.com")
+    with pytest.raises(ResolutionError):
+        resolver.resolve("gone.example")
+
+    clock.now += 59
+    resolver.resolve("example.com")
+    assert lookup.calls["example.com"] == 1
+    clock.now += 2
+    resolver.resolve("example.com")
+    assert lookup.calls["example.com"] == 2
+
+    assert resolver.known_unresolvable("gone.example")
+    clock.now += 600
+    assert not resolver.known_unresolvable("gone.example")
+    lookup.answers["gone.example"] = ["192.0.2.3"]
+    assert resolver.resolve("gone.example") == ["192.0.2.3"]
+
+def test_cache_survives_on_disk(tmp_path):
+    path = str(tmp_path / "dns.sqlite")
+    lookup = StubLookup({"example.com": ["192.0.2.1", "192.0.2.9"], "gone.example": nonexistent()})
+    resolver = Resolver(path=path, lookup=lookup)
+    resolver.resolve("example.com")
+    with pytest.raises(ResolutionError):
+        resolver.resolve("gone.example")
+    resolver.close()
+
+    fresh_lookup = StubLookup({})
+    resolver = Resolver(path=path, lookup=fresh_lookup)
+    assert resolver.resolve("example.com") == ["192.0.2.1", "192.0.2.9"]
+    assert resolver.known_unresolvable("gone.example")
+    assert fresh_lookup.calls == {}
+    resolver.close()
+
+def test_concurrent_lookups_of_a_host_share_one_query():
+    gate = threading.Event()
+    lookup = StubLookup({"example.com": ["192.0.2.1"]}, gate=gate)
+    resolver = Resolver(lookup=lookup)
+    futures = [resolver.resolve_async("example.com") for _ in range(10)]
+    assert len({id(future) for future in futures}) == 1
+    gate.set()
+    assert [future.result(5) for future in futures] == [["192.0.2.1"]] * 10
+    assert lookup.calls == {"example.com": 1}
@@ -0,0 +1,24 @@
+from extractor import ContactScanner
+
+def scan(*chunks):
+    scanner = ContactScanner()
+    done = [scanner.feed(chunk) for chunk in chunks]
+    return scanner, done
+
+def test_contacts_split_across_chunks_are_found():
+    scanner, done = scan(b"<p>Write to info@ac", b"me.com or call 555 12", b"3 4567</p>")
+    assert scanner.found_email and scanner.found_phone
+    assert done == [False, False, True]
+
+def test_tag_cut_off_at_a_chunk_boundary_is_not_scanned_as_text():
+    # The tel: link's number only appears inside the tag; the page shows no phone number
+    scanner, done = scan(b'<p>info@acme.com</p><a href="tel:+1 555 123 4567', b'">Call us</a>')
+    assert scanner.found_email and not scanner.found_phone
+    assert done == [False, False]
+
+def test_character_split_across_chunks_is_decoded_whole():
+    separator = "。".encode("utf-8")  # An ideographic full stop, three bytes
+    scanner, _ = scan(b"Order 12345" + separator[:1], separator[1:] + b"67890")
+    assert not scanner.found_phone  # Dropping the pieces would join the numbers into one
+    scanner, _ = scan("Café ".encode("utf-8")[:4], "é ".encode("utf-8")[1:] + b"hello@cafe.fr")
+    assert scanner.found_email
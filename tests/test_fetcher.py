@@ -0,0 +1,52 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from fetcher import DeadlineExceeded, fetch_page
+from timeout_policy import configure_timeout_policy
+
+class TrickleHandler(BaseHTTPRequestHandler):
+    """Sends the headers at once, then one byte of body every 0.2 seconds for 20 seconds."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        if self.path == '/length':
+            self.send_header('Content-Length', '1000')
+        else:
+            self.send_header('Connection', 'close')  # Body ends when the connection does
+        self.end_headers()
+        try:
+            for _ in range(100):
+                self.wfile.write(b"x")
+                self.wfile.flush()
+                time.sleep(0.2)
+        except OSError:
+            pass
+
+@pytest.fixture
+def trickle_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TrickleHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def short_deadline():
+    configure_timeout_policy(connect_timeout=1, read_timeout=1, total_timeout=1)
+    yield
+    configure_timeout_policy()
+
+@pytest.mark.parametrize("path", ["/length", "/close"])
+def test_trickling_body_is_cut_off_at_the_total_timeout(trickle_server, short_deadline, path):
+    start = time.monotonic()
+    result = fetch_page(trickle_server + path)
+    assert isinstance(result.error, DeadlineExceeded)
+    assert time.monotonic() - start < 3
@@ -0,0 +1,55 @@
+import zlib
+import pytest
+import http_cache
+from http_cache import HttpCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(http_cache.time, "time", lambda: now[0])
+    return now
+
+def store(cache, url, text="<html>hello</html>", status_code=200, headers=None):
+    cache.store(url, url, status_code, "OK", headers or {'ETag': '"v1"'}, text)
+
+def test_entry_goes_stale_after_the_ttl_and_is_fresh_again_after_a_refresh(tmp_path, clock):
+    cache = HttpCache(str(tmp_path / "cache.sqlite"), ttl=60)
+    store(cache, "http://a.com/")
+    entry = cache.lookup("http://A.com/")
+    assert entry['fresh'] and entry['text'] == "<html>hello</html>"
+
+    clock[0] += 61
+    entry = cache.lookup("http://a.com/")
+    assert not entry['fresh']
+    assert cache.validators(entry) == {'If-None-Match': '"v1"'}
+    cache.refresh("http://a.com/")
+    assert cache.lookup("http://a.com/")['fresh']
+    cache.close()
+
+def test_least_recently_used_entries_are_evicted_past_max_size(tmp_path, clock):
+    text = "".join(chr(0x4e00 + i * 7 % 2000) for i in range(2000))
+    size = len(zlib.compress(text.encode('utf-8')))  # Bodies are counted compressed
+    cache = HttpCache(str(tmp_path / "cache.sqlite"), max_size=int(size * 2.5))
+    for url in ("http://a.com/", "http://b.com/"):
+        store(cache, url, text)
+        clock[0] += 1
+    cache.lookup("http://a.com/")  # b.com is now the least recently used
+    clock[0] += 1
+    store(cache, "http://c.com/", text)
+    assert cache.lookup("http://b.com/") is None
+    assert cache.lookup("http://a.com/") is not None and cache.lookup("http://c.com/") is not None
+
+    # Replacing an entry doesn't count its old body twice
+    store(cache, "http://c.com/", text)
+    assert cache.lookup("http://a.com/") is not None
+    cache.close()
+
+def test_server_errors_and_no_store_responses_are_not_cached(tmp_path):
+    cache = HttpCache(str(tmp_path / "cache.sqlite"))
+    store(cache, "http://down.com/", status_code=503)
+    store(cache, "http://private.com/", headers={'Cache-Control': 'private, no-store'})
+    store(cache, "http://missing.com/", status_code=404)
+    assert cache.lookup("http://down.com/") is None
+    assert cache.lookup("http://private.com/") is None
+    assert cache.lookup("http://missing.com/")['status_code'] == 404
+    cache.close()
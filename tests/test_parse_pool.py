@@ -0,0 +1,31 @@
+import pytest
+import parse_pool
+from extractor import extract_page_info
+from parse_pool import ParsePool, configure_parse_pool, close_parse_pool, parse_page
+
+PAGE = """<html><body><p>Email info@acme.com or call 555 123 4567.</p>
+<a href="/contact-us">Contact us</a> <a href="https://other.com/about">About</a> Café</body></html>"""
+URL = "https://acme.com/"
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ParsePool(processes=2, slot_size=len(PAGE.encode('utf-8')) + 10)
+    yield pool
+    pool.close()
+
+def test_pages_parse_the_same_as_in_process(pool):
+    assert pool.parse(PAGE, URL) == extract_page_info(PAGE, URL)
+
+def test_page_too_big_for_a_slot_is_sent_pickled(pool):
+    big = PAGE.replace("Café", "Café " * 100)
+    assert pool.parse(big, URL) == extract_page_info(big, URL)
+
+def test_parse_page_uses_the_configured_pool():
+    configure_parse_pool(processes=1)
+    try:
+        assert parse_pool._parse_pool is not None
+        assert parse_page(PAGE, URL) == extract_page_info(PAGE, URL)
+    finally:
+        close_parse_pool()
+    assert parse_pool._parse_pool is None
+    assert parse_page(PAGE, URL) == extract_page_info(PAGE, URL)
@@ -0,0 +1,57 @@
+import json
+import pytest
+from records import RECORD_FIELDS, ContactInfo, RecordBatch, ResultRecord, Status, make_record, to_json
+
+RECORDS = [
+    make_record("broken_website", "run1", "https://www.acme.co.uk/", "2026-01-02 03:04:05 UTC",
+                company="Acme", status_code=500, reason="Internal Server Error", email="info@acme.co.uk"),
+    make_record("broken_website", "run1", "http://dead.example/", "2026-01-02 03:04:05 UTC",
+                status_code="Connection Error", reason="refused"),
+    make_record("business_contact", "run1", "http://shop.example/", "2026-1-2 3:04:05 UTC",
+                location="England", phone="+44 20 7946 0000"),
+    make_record("business_contact", "run1", "http://none.example/", None, status_code=None),
+    make_record("broken_website", "run1", "http://timeout.example/", "not a time",
+                status_code="Connection Error", reason="timed out"),
+]
+
+def test_rows_round_trip():
+    batch = RecordBatch()
+    for record in RECORDS:
+        batch.append(record)
+    assert len(batch) == len(RECORDS)
+    assert [ResultRecord(*row) for row in batch.rows()] == RECORDS
+
+def test_columns_and_http_only_codes():
+    batch = RecordBatch()
+    for record in RECORDS:
+        batch.append(record)
+    for field in RECORD_FIELDS:
+        assert batch.column(field) == [record[field] for record in RECORDS]
+    assert batch.column('status_code', http_only=True) == [500, None, None, None, None]
+    assert batch.column('timestamp')[2:] == ["2026-1-2 3:04:05 UTC", None, "not a time"]
+
+def test_make_record_fills_in_the_domain():
+    assert RECORDS[0].domain == "acme.co.uk"
+
+@pytest.mark.parametrize("record", [
+    RECORDS[1],
+    Status("Broken", "Connection Error", "refused"),
+    ContactInfo(None, "info@acme.co.uk", None),
+])
+def test_json_round_trip(record):
+    value = json.loads(json.dumps(record, default=to_json))
+    assert value == list(record.as_row())
+    assert type(record).from_json(value) == record
+    assert type(record).from_json(record.as_dict()) == record
+    assert type(record).from_json(None) is None
+
+def test_record_reads_like_a_dict_and_rejects_unknown_fields():
+    status = Status("Broken", 404, "Not Found")
+    assert status['code'] == 404 and status.get('missing', 'x') == 'x' and status.broken
+    assert not ContactInfo().found
+    with pytest.raises(KeyError):
+        status['missing']
+    with pytest.raises(TypeError):
+        Status(colour="red")
+    with pytest.raises(TypeError):
+        Status(1, 2, 3, 4)
@@ -0,0 +1,69 @@
+import json
+import pytest
+from records import BROKEN_WEBSITE, make_record
+from result_store import JsonlSink, ParquetSink, ResultStore, SinkGroup
+
+def record(url, run_id="run1"):
+    return make_record(BROKEN_WEBSITE, run_id, url, "2026-01-01 00:00:00 UTC", status_code=500, email="info@x.com")
+
+def read_urls(path):
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line)['url'] for line in file]
+
+def test_jsonl_restore_writes_only_the_lost_records(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    sink = JsonlSink(path)
+    sink.write(record("http://old.com/", run_id="run0"))
+    sink.write(record("http://a.com/"))
+    sink.close()  # b.com was saved in the run state but never reached the file
+
+    sink = JsonlSink(path)
+    sink.restore([record("http://a.com/"), record("http://b.com/")])
+    sink.close()
+    assert read_urls(path) == ["http://old.com/", "http://a.com/", "http://b.com/"]
+
+def test_jsonl_drops_a_half_written_line(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(json.dumps(record("http://a.com/").as_dict()) + "\n" + '{"kind": "broken_we')
+
+    sink = JsonlSink(path)
+    sink.restore([record("http://a.com/"), record("http://b.com/")])
+    sink.close()
+    assert read_urls(path) == ["http://a.com/", "http://b.com/"]
+
+class PlainSink:
+    """A sink object without restore()."""
+
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+def test_sink_group_restore_skips_sinks_that_cannot_dedupe(tmp_path):
+    store = ResultStore(str(tmp_path / "results.sqlite"))
+    plain = PlainSink()
+    group = SinkGroup([store, plain])
+    group.write(record("http://a.com/"))
+    group.restore([record("http://a.com/"), record("http://b.com/")])
+    assert store.count(BROKEN_WEBSITE, "run1") == 2
+    assert [r.url for r in plain.records] == ["http://a.com/"]
+    group.close()
+
+def test_parquet_keeps_non_http_status_codes(tmp_path):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "results.parquet")
+    sink = ParquetSink(path)
+    sink.write(make_record(BROKEN_WEBSITE, "run1", "http://a.com/", "2026-01-01 00:00:00 UTC", status_code=500))
+    sink.write(make_record(BROKEN_WEBSITE, "run1", "http://b.com/", "2026-01-01 00:00:00 UTC",
+                           status_code="Connection Error"))
+    sink.write(make_record(BROKEN_WEBSITE, "run1", "http://c.com/", "2026-01-01 00:00:00 UTC"))
+    sink.close()
+    assert pyarrow_parquet.read_table(path).column('status_code').to_pylist() == ["500", "Connection Error", None]
@@ -0,0 +1,46 @@
+import time
+from result_writer import ResultWriter
+
+def read(path):
+    with open(path, encoding='utf-8') as file:
+        return file.read()
+
+def test_steady_trickle_is_flushed_on_time(tmp_path):
+    path = str(tmp_path / "log.txt")
+    writer = ResultWriter(path, batch_size=1000, flush_interval=0.3)
+    start = time.monotonic()
+    # A line every 0.05s never leaves the queue idle for a whole flush interval
+    while time.monotonic() - start < 1.0:
+        writer.write("line\n")
+        time.sleep(0.05)
+        if read(path):
+            break
+    assert read(path), "nothing was flushed while lines kept arriving"
+    assert time.monotonic() - start < 0.8
+    writer.close()
+
+def test_full_batch_and_checkpoint_flush_at_once(tmp_path):
+    path = str(tmp_path / "log.txt")
+    writer = ResultWriter(path, batch_size=2, flush_interval=60)
+    writer.write("a\n")
+    writer.write("b\n")
+    deadline = time.monotonic() + 2
+    while read(path) != "a\nb\n" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert read(path) == "a\nb\n"
+    writer.write("c\n")
+    writer.checkpoint()
+    assert read(path) == "a\nb\nc\n"
+    writer.close()
+
+def test_header_and_half_written_last_line(tmp_path):
+    path = str(tmp_path / "log.csv")
+    writer = ResultWriter(path, header="h\n")
+    writer.write("a\n")
+    writer.close()
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write("b,cut o")  # A crash in the middle of a batch
+    writer = ResultWriter(path, header="h\n")
+    writer.write("c\n")
+    writer.close()
+    assert read(path) == "h\na\nc\n"
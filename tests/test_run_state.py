@@ -0,0 +1,120 @@
+import pytest
+from records import ResultRecord, make_record
+from run_state import RunState
+from seen_index import SeenIndex
+
+def reopen(path, resume=True):
+    """Open a RunState on the same file, as a restarted run would."""
+    return RunState(str(path), resume=resume)
+
+def test_resume_requeues_in_flight_urls(tmp_path):
+    path = tmp_path / "state.sqlite"
+    state = reopen(path, resume=False)
+    state.enqueue(["http://a.com/", "http://b.com/", "http://c.com/"], location="England", step="England")
+    state.mark_in_flight("http://a.com/")
+    state.mark_done("http://a.com/")
+    state.mark_in_flight("http://b.com/")
+    state.close()  # Killed while b.com was being checked
+
+    state = reopen(path)
+    assert state.resumed
+    assert state.step_done("England")
+    assert state.pending(location="England") == ["http://b.com/", "http://c.com/"]
+    assert state.pending(location="Wales") == []
+    state.close()
+
+def test_resume_keeps_run_id_counters_and_results(tmp_path):
+    path = tmp_path / "state.sqlite"
+    state = reopen(path, resume=False)
+    run_id = state.run_id
+    state.enqueue(["http://a.com/", "http://b.com/"])
+    record = make_record("broken_website", run_id, "http://a.com/", "2026-01-01 00:00:00 UTC",
+                         status_code="Connection Error", email="info@a.com")
+    state.mark_done("http://a.com/", record, counters={'checked': 1})
+    state.mark_done("http://b.com/", counters={'checked': 2})
+    state.close()
+
+    state = reopen(path)
+    assert state.run_id == run_id
+    assert state.load_counters({'checked': 0, 'found': 0}) == {'checked': 2, 'found': 0}
+    assert [ResultRecord.from_json(result) for result in state.results()] == [record]
+    state.close()
+
+def test_finished_or_fresh_run_starts_over(tmp_path):
+    path = tmp_path / "state.sqlite"
+    state = reopen(path, resume=False)
+    state.enqueue(["http://a.com/"], step="search")
+    state.save_counters({'checked': 5})
+    state.finish()
+    state.close()
+
+    state = reopen(path)
+    assert not state.resumed
+    assert state.pending() == []
+    assert not state.step_done("search")
+    assert state.load_counters({'checked': 0}) == {'checked': 0}
+    state.enqueue(["http://b.com/"])
+    state.close()
+
+    state = reopen(path, resume=False)
+    assert not state.resumed
+    assert state.pending() == []
+    state.close()
+
+def test_enqueue_ignores_duplicates_and_keeps_order(tmp_path):
+    state = reopen(tmp_path / "state.sqlite", resume=False)
+    state.enqueue(["http://b.com/", "http://a.com/"])
+    state.enqueue(iter(["http://a.com/", "http://c.com/"]))
+    assert state.pending() == ["http://b.com/", "http://a.com/", "http://c.com/"]
+    state.close()
+
+def test_iter_pending_pages_through_the_queue(tmp_path):
+    state = reopen(tmp_path / "state.sqlite", resume=False)
+    urls = [f"http://site{i}.com/" for i in range(25)]
+    state.enqueue(urls, location="seeds")
+    state.enqueue(["http://other.com/"], location="England")
+    for url in urls[:5]:
+        state.mark_done(url)
+    assert list(state.iter_pending(location="seeds", page_size=7)) == urls[5:]
+    assert list(state.iter_pending(page_size=4)) == urls[5:] + ["http://other.com/"]
+    state.close()
+
+def test_seed_claims_live_in_the_state_file_and_survive_a_resume(tmp_path):
+    path = tmp_path / "state.sqlite"
+    state = reopen(path, resume=False)
+    seen = SeenIndex(claims=state)
+    urls = ["http://a.com/", "http://www.a.com/contact", "http://b.com/", "http://c.com/"]
+    assert list(seen.filter_new(urls[:3])) == ["http://a.com/", "http://b.com/"]
+    assert not seen._claimed
+    state.close()  # Killed while b.com was being checked
+
+    state = reopen(path)
+    seen = SeenIndex(claims=state)
+    # The queue hands out the URLs that weren't done: b.com claimed them before, www.a.com lost to a.com
+    assert list(seen.filter_new(urls[1:])) == ["http://b.com/", "http://c.com/"]
+    assert seen.is_seen("http://a.com/about")
+    state.close()
+
+    state = reopen(path, resume=False)
+    assert list(SeenIndex(claims=state).filter_new(urls[:1])) == ["http://a.com/"]
+    state.close()
+
+def test_enqueue_commits_in_chunks_and_marks_the_step_at_the_end(tmp_path):
+    path = tmp_path / "state.sqlite"
+    state = reopen(path, resume=False)
+
+    def seeds():
+        for i in range(7):
+            yield f"http://site{i}.com/"
+        raise KeyboardInterrupt  # Killed while reading the seed list
+    with pytest.raises(KeyboardInterrupt):
+        state.enqueue(seeds(), step="seeds", chunk_size=3)
+    state.close()
+
+    state = reopen(path)
+    assert not state.step_done("seeds")
+    assert state.pending() == [f"http://site{i}.com/" for i in range(6)]  # The chunks committed so far
+    state.enqueue((f"http://site{i}.com/" for i in range(9)), step="seeds", chunk_size=3)
+    assert state.step_done("seeds")
+    assert state.pending() == [f"http://site{i}.com/" for i in range(9)]
+    state.close()
@@ -0,0 +1,66 @@
+import pytest
+import scheduler
+from scheduler import HostScheduler, parse_retry_after
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A fake monotonic clock that sleep() moves forward; returns the list of sleeps."""
+    now = [100.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(round(seconds, 6))
+        now[0] += seconds
+    monkeypatch.setattr(scheduler.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(scheduler.time, "sleep", sleep)
+    return sleeps
+
+def test_burst_starts_together_then_requests_are_spaced(clock):
+    hosts = HostScheduler(min_interval=1.0, burst=3)
+    for _ in range(5):
+        hosts.wait_for_host("http://a.com/page")
+    hosts.wait_for_host("http://b.com/")  # Another host isn't held up
+    assert clock == [1.0, 1.0]
+
+def test_burst_builds_up_again_while_the_host_is_idle(clock):
+    hosts = HostScheduler(min_interval=1.0, burst=3)
+    for _ in range(3):
+        hosts.wait_for_host("http://a.com/")
+    scheduler.time.sleep(10)  # Idle
+    clock.clear()
+    for _ in range(3):
+        hosts.wait_for_host("http://a.com/")
+    assert clock == []
+
+def test_crawl_delay_gives_a_fixed_interval_without_a_burst(clock):
+    fetched = []
+
+    def robots(url):
+        fetched.append(url)
+        return "User-agent: *\nCrawl-delay: 4\n"
+    hosts = HostScheduler(min_interval=1.0, burst=2, robots_fetcher=robots)
+    for _ in range(5):
+        hosts.wait_for_host("https://a.com/about")
+    # robots.txt is only fetched once the burst is used up, and only once; the request that
+    # looked it up keeps the slot it reserved, and every one after it waits the Crawl-delay
+    assert fetched == ["https://a.com/robots.txt"]
+    assert clock == [2.0, 4.0, 4.0]
+
+def test_retry_after_holds_the_host_back(clock):
+    hosts = HostScheduler(min_interval=1.0, burst=5)
+    hosts.wait_for_host("http://a.com/")
+    hosts.note_response("http://a.com/", 429, {'Retry-After': "30"})
+    hosts.note_response("http://b.com/", 500, {'Retry-After': "30"})  # Only throttling responses count
+    hosts.wait_for_host("http://a.com/")
+    hosts.wait_for_host("http://b.com/")
+    assert clock == [30.0]
+
+    hosts.note_response("http://a.com/", 503, {'Retry-After': "86400"})
+    hosts.wait_for_host("http://a.com/")
+    assert clock[-1] == scheduler.MAX_HOST_DELAY
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0  # In the past
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
@@ -0,0 +1,56 @@
+import threading
+import time
+import pytest
+import search_cache
+from search_cache import SearchCache
+
+def test_identical_queries_are_searched_once():
+    cache = SearchCache()
+    calls = []
+
+    def run_search():
+        calls.append(1)
+        time.sleep(0.05)  # The other callers arrive while this search is running
+        return ["http://a.com/", "http://b.com/"]
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.search("Companies  in England", 2, run_search)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [["http://a.com/", "http://b.com/"]] * 4
+    assert cache.search("companies in england", 1, run_search) == ["http://a.com/"]
+    assert len(calls) == 1
+
+def test_more_results_than_cached_search_again():
+    cache = SearchCache()
+    cache.search("q", 1, lambda: ["http://a.com/"])
+    assert cache.search("q", 2, lambda: ["http://a.com/", "http://b.com/"]) == ["http://a.com/", "http://b.com/"]
+
+def test_failed_search_is_not_cached():
+    cache = SearchCache()
+
+    def blocked():
+        raise RuntimeError("429 Too Many Requests")
+    with pytest.raises(RuntimeError):
+        cache.search("q", 1, blocked)
+    assert cache.search("q", 1, lambda: ["http://a.com/"]) == ["http://a.com/"]
+
+def test_results_persist_until_the_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(search_cache.time, "time", lambda: now[0])
+    path = str(tmp_path / "search.sqlite")
+    cache = SearchCache(path, ttl=60)
+    cache.search("q", 1, lambda: ["http://a.com/"])
+    cache.close()
+
+    cache = SearchCache(path, ttl=60)  # A later run
+    assert cache.search("q", 1, lambda: ["http://new.com/"]) == ["http://a.com/"]
+    cache.close()
+
+    now[0] += 61
+    cache = SearchCache(path, ttl=60)
+    assert cache.search("q", 1, lambda: ["http://new.com/"]) == ["http://new.com/"]
+    cache.close()
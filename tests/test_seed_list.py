@@ -0,0 +1,44 @@
+import gzip
+import json
+import pytest
+from seed_list import iter_seed_urls, normalize_seed
+
+def write(path, text, compress=False):
+    data = text.encode('utf-8')
+    path.write_bytes(gzip.compress(data) if compress else data)
+    return str(path)
+
+def test_csv_tsv_jsonl_and_text_formats(tmp_path):
+    csv_path = write(tmp_path / "seeds.csv", "name,Website\nAcme,acme.com\nBeta,https://beta.co.uk/about\n")
+    tsv_path = write(tmp_path / "seeds.tsv", "gamma.com\tGamma\ndelta.com\tDelta\n")  # No header
+    jsonl_path = write(tmp_path / "seeds.jsonl", "\n".join([
+        json.dumps({'domain': "epsilon.com"}), json.dumps("zeta.com"), "not json", json.dumps({'other': 1}),
+    ]))
+    text_path = write(tmp_path / "seeds.txt", "# comment\neta.com  extra\n\n")
+    assert list(iter_seed_urls([csv_path, tsv_path, jsonl_path, text_path])) == [
+        "http://acme.com/", "https://beta.co.uk/about", "http://gamma.com/", "http://delta.com/",
+        "http://epsilon.com/", "http://zeta.com/", "http://eta.com/",
+    ]
+
+def test_gzip_is_detected_by_content_not_name(tmp_path):
+    named = write(tmp_path / "seeds.csv.gz", "url\nacme.com\n", compress=True)
+    unnamed = write(tmp_path / "seeds.csv", "url\nbeta.com\n", compress=True)
+    assert list(iter_seed_urls([named, unnamed])) == ["http://acme.com/", "http://beta.com/"]
+
+def test_repeats_are_dropped_while_recent(tmp_path):
+    path = write(tmp_path / "seeds.txt", "a.com\nA.com/\nb.com\nc.com\na.com\n")
+    assert list(iter_seed_urls(path)) == ["http://a.com/", "http://b.com/", "http://c.com/"]
+    # Only the last `recent` distinct URLs are remembered; the run's queue drops the rest
+    assert list(iter_seed_urls(path, recent=2)) == ["http://a.com/", "http://b.com/", "http://c.com/", "http://a.com/"]
+
+def test_missing_column_is_reported_before_anything_is_read(tmp_path):
+    good = write(tmp_path / "good.csv", "site\nacme.com\n")
+    bad = write(tmp_path / "bad.csv", "name,homepage\nBeta,beta.com\n")
+    with pytest.raises(ValueError, match="bad.csv has no column named 'site'"):
+        iter_seed_urls([good, bad], column="site")
+
+def test_normalize_seed_rejects_non_urls():
+    assert normalize_seed(" Acme.com ") == "http://acme.com/"
+    assert normalize_seed("localhost") is None
+    assert normalize_seed("ftp://acme.com/") is None
+    assert normalize_seed("") is None
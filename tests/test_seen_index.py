@@ -0,0 +1,18 @@
+from seen_index import SeenIndex
+
+def test_www_apex_and_subdomains_are_one_site(tmp_path):
+    seen = SeenIndex(str(tmp_path / "seen.sqlite"))
+    urls = ["https://www.acme.com/", "https://acme.com/contact", "https://shop.acme.com/", "https://acme.co.uk/"]
+    assert list(seen.filter_new(urls)) == ["https://www.acme.com/", "https://acme.co.uk/"]
+    seen.mark("https://www.acme.com/")
+    seen.close()
+
+    seen = SeenIndex(str(tmp_path / "seen.sqlite"))  # A later run
+    assert seen.is_seen("http://shop.acme.com/about")
+    assert not seen.is_seen("https://acme.co.uk/")  # Claimed, but never marked
+    seen.close()
+
+def test_sites_on_shared_hosting_are_kept_apart():
+    seen = SeenIndex()
+    urls = ["https://joe.github.io/", "https://ann.github.io/", "https://joe.github.io/about"]
+    assert list(seen.filter_new(urls)) == urls[:2]
@@ -0,0 +1,56 @@
+from concurrent.futures import wait
+import service
+from records import WORKING, ContactInfo, Status
+
+URLS = [f"http://127.0.0.{i}/" for i in range(2, 5)]
+
+class Hours:
+    """Stands in for the business hours index; zones is what is in hours right now."""
+
+    def __init__(self, zones):
+        self.zones = zones
+
+    def zones_in_hours(self, now):
+        return self.zones
+
+    def next_event(self, now):
+        return None
+
+def settle(contact_service):
+    """Handle the work in flight until the pool has nothing left to do."""
+    while contact_service.in_flight:
+        for future in wait(list(contact_service.in_flight)).done:
+            contact_service.handle(future)
+        contact_service.fill_pool()
+
+def test_location_that_leaves_and_reenters_business_hours_checks_its_dropped_websites(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    checked, windows = [], []
+    monkeypatch.setattr(service, "get_company_websites", lambda query, num_results: list(URLS))
+    monkeypatch.setattr(service, "check_business_website",
+                        lambda url: checked.append(url) or (Status(WORKING, 200, "OK"), ContactInfo(None, None, None)))
+    monkeypatch.setattr(service, "reset_timeout_policy", lambda: windows.append(True))
+
+    contact_service = service.ContactService(workers=1)
+    hours = contact_service.index = Hours(["Europe/London"])
+    try:
+        contact_service.update_locations(0)
+        for future in wait(list(contact_service.in_flight)).done:
+            contact_service.handle(future)  # The search queues every website
+        contact_service.fill_pool()
+        assert [item for _, _, item in contact_service.in_flight.values()] == URLS[:1]
+
+        hours.zones = []
+        contact_service.update_locations(1)  # The other two are dropped
+        settle(contact_service)
+        assert checked == URLS[:1]
+
+        hours.zones = ["Europe/London"]
+        contact_service.update_locations(2)
+        settle(contact_service)
+        assert checked == URLS
+        assert len(windows) == 2
+    finally:
+        contact_service.executor.shutdown()
+        contact_service.output.close()
+        contact_service.seen_index.close()
@@ -0,0 +1,218 @@
+import threading
+import pytest
+import task_queue
+from task_queue import MAX_ATTEMPTS, Coordinator, RedisTaskQueue, SqliteTaskQueue
+from worker import run_worker
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = SqliteTaskQueue(str(tmp_path / "tasks.sqlite"), name="test", lease=60)
+    queue.start("run1")
+    yield queue
+    queue.close()
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(task_queue.time, "time", lambda: now[0])
+    return now
+
+def test_each_task_is_leased_once_and_completed_once(queue):
+    queue.put(["http://a.com/", "http://b.com/", "http://a.com/"], location="England")
+    first, second = queue.lease(), queue.lease()
+    assert (first['url'], second['url']) == ("http://a.com/", "http://b.com/")
+    assert queue.lease() is None
+
+    assert queue.complete(first, {'ok': True})
+    assert not queue.complete(first, {'ok': False})  # A second worker finishing late
+    assert queue.results() == [(1, "http://a.com/", "England", {'ok': True})]
+    assert queue.results(after=1) == []
+
+def test_expired_lease_goes_back_to_the_queue(queue, clock):
+    queue.put(["http://a.com/"])
+    task = queue.lease()
+    clock[0] += 30
+    assert queue.lease() is None
+    clock[0] += 31
+    retry = queue.lease()
+    assert retry['url'] == "http://a.com/"
+
+    assert queue.complete(retry, "second worker")
+    assert not queue.complete(task, "crashed worker came back")
+    assert [result for _, _, _, result in queue.results()] == ["second worker"]
+
+def test_task_is_given_up_after_max_attempts(queue, clock):
+    queue.put(["http://a.com/"])
+    for _ in range(MAX_ATTEMPTS):
+        assert queue.lease() is not None
+        clock[0] += 61
+    assert queue.lease() is None
+    assert queue.results() == [(1, "http://a.com/", None, None)]
+
+def test_new_run_empties_the_queue_and_resumed_run_keeps_it(queue):
+    queue.put(["http://a.com/", "http://b.com/"])
+    task = queue.lease()
+    queue.complete(task, "done")
+    queue.stop()
+    assert queue.current_run() == ("run1", True)
+
+    queue.start("run1")  # Resumed
+    assert queue.current_run() == ("run1", False)
+    assert queue.lease()['url'] == "http://b.com/"
+    assert len(queue.results()) == 1
+
+    queue.start("run2")
+    assert queue.current_run() == ("run2", False)
+    assert queue.results() == []
+    assert queue.lease() is None
+
+def test_completion_from_an_earlier_run_is_ignored(queue):
+    queue.put(["http://a.com/"])
+    stale = queue.lease()
+    queue.start("run2")
+    queue.put(["http://a.com/"])
+    task = queue.lease()  # Same url, and the row id may well be reused too
+    assert not queue.complete(stale, "old")
+    assert queue.complete(task, "new")
+    assert [result for _, _, _, result in queue.results()] == ["new"]
+
+def test_worker_waits_through_an_old_stop_and_exits_with_its_run(tmp_path, monkeypatch):
+    monkeypatch.setattr("worker.POLL_INTERVAL", 0.01)
+    path = str(tmp_path / "tasks.sqlite")
+    collector = SqliteTaskQueue(path, name="test")
+    collector.start("run1")
+    collector.stop()  # Left over from the previous run
+
+    checked = []
+    worker = threading.Thread(target=run_worker, args=(SqliteTaskQueue(path, name="test"), checked.append),
+                              kwargs={'threads': 2, 'idle_exit': 10})
+    worker.start()
+    worker.join(0.2)
+    assert worker.is_alive()
+
+    collector.start("run2")
+    collector.put(["http://a.com/", "http://b.com/"])
+    while len(collector.results()) < 2:
+        worker.join(0.01)
+    collector.stop()
+    worker.join(5)
+    assert not worker.is_alive()
+    assert sorted(checked) == ["http://a.com/", "http://b.com/"]
+    collector.close()
+
+def test_failed_task_is_retried_then_given_up(queue):
+    queue.put(["http://a.com/"])
+    for _ in range(MAX_ATTEMPTS):
+        task = queue.lease()
+        assert task['url'] == "http://a.com/"
+        queue.fail(task)
+    assert queue.lease() is None
+    assert queue.results() == [(1, "http://a.com/", None, None)]
+
+def test_worker_hands_back_a_task_whose_check_raises(tmp_path, monkeypatch):
+    monkeypatch.setattr("worker.POLL_INTERVAL", 0.01)
+    path = str(tmp_path / "tasks.sqlite")
+    collector = SqliteTaskQueue(path, name="test")
+    collector.start("run1")
+    collector.put(["http://a.com/"])
+    calls = []
+
+    def flaky_check(url):
+        calls.append(url)
+        if len(calls) == 1:
+            raise ValueError("parser bug")
+        return "ok"
+
+    run_worker(SqliteTaskQueue(path, name="test"), flaky_check, threads=1, idle_exit=0.1)
+    assert calls == ["http://a.com/", "http://a.com/"]  # Retried at once, not after the lease
+    assert collector.results() == [(1, "http://a.com/", None, "ok")]
+    collector.close()
+
+def test_coordinator_queues_no_more_tasks_than_the_budget(queue, monkeypatch):
+    monkeypatch.setattr(task_queue.time, "sleep", lambda seconds: None)
+    urls = [f"http://site{i}.com/" for i in range(10)]
+    found = []
+
+    def finish_queued_tasks():
+        # Stands in for the workers: every task queued so far is checked
+        while (task := queue.lease()) is not None:
+            queue.complete(task, task['url'])
+
+    coordinator = Coordinator(queue)
+    results = coordinator.imap(urls, window=100, budget=lambda: 3 - len(found))
+    monkeypatch.setattr(queue, "results", lambda after=0, results=queue.results: (finish_queued_tasks(), results(after))[1])
+    for url, result in results:
+        found.append(url)
+        if len(found) == 3:
+            break
+    with queue._lock:
+        queued = queue._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+    assert found == urls[:3]
+    assert queued == 3
+
+class TestRedisTaskQueue:
+    @pytest.fixture
+    def queue(self, monkeypatch):
+        fakeredis = pytest.importorskip("fakeredis")
+        server = fakeredis.FakeServer()
+        monkeypatch.setattr(task_queue.redis.Redis, "from_url",
+                            lambda url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs))
+        queue = RedisTaskQueue("redis://localhost", name="test", lease=60)
+        queue.start("run1")
+        yield queue
+        queue.close()
+
+    def test_each_task_is_leased_once_and_completed_once(self, queue):
+        queue.put(["http://a.com/", "http://b.com/", "http://a.com/"], location="England")
+        first, second = queue.lease(), queue.lease()
+        assert (first['url'], second['url']) == ("http://a.com/", "http://b.com/")
+        assert queue.lease() is None
+        assert queue.complete(first, {'ok': True})
+        assert not queue.complete(first, {'ok': False})
+        assert queue.results() == [(1, "http://a.com/", "England", {'ok': True})]
+
+    def test_lease_that_dies_before_exec_leaves_the_task_queued(self, queue, monkeypatch):
+        queue.put(["http://a.com/"])
+        pipeline = type(queue._redis.pipeline())
+
+        def connection_lost(self, *args, **kwargs):
+            raise task_queue.redis.ConnectionError("connection lost")
+        with monkeypatch.context() as patched:
+            patched.setattr(pipeline, "execute", connection_lost)
+            with pytest.raises(task_queue.redis.ConnectionError):
+                queue.lease()
+        task = queue.lease()
+        assert task['url'] == "http://a.com/"
+        assert queue.complete(task, "done")
+
+    def test_concurrent_leases_hand_out_each_task_once(self, queue):
+        urls = [f"http://site{i}.com/" for i in range(50)]
+        queue.put(urls)
+        leased, lock = [], threading.Lock()
+
+        def lease_all():
+            while (task := queue.lease()) is not None:
+                with lock:
+                    leased.append(task['url'])
+        threads = [threading.Thread(target=lease_all) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(leased) == sorted(urls)
+
+    def test_failed_and_expired_tasks_go_back_to_the_queue(self, queue, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(task_queue.time, "time", lambda: now[0])
+        queue.put(["http://a.com/", "http://b.com/"])
+        failed, expired = queue.lease(), queue.lease()
+        queue.fail(failed)
+        retry = queue.lease()
+        assert retry['url'] == "http://a.com/"
+        assert queue.complete(retry, "retried")
+        now[0] += 61
+        retry = queue.lease()
+        assert retry['url'] == "http://b.com/"
+        assert queue.complete(retry, "second worker")
+        assert not queue.complete(expired, "crashed worker came back")
+        assert [result for _, url, _, result in queue.results() if url == "http://b.com/"] == ["second worker"]
@@ -0,0 +1,39 @@
+import requests
+from timeout_policy import (
+    DEFAULT_FAILURE_THRESHOLD, MIN_READ_TIMEOUT, MIN_SAMPLES, CircuitBreaker, HostUnavailableError, TimeoutPolicy,
+)
+
+def test_circuit_is_per_host_not_per_shared_suffix():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+    timeout = requests.exceptions.ReadTimeout("read timed out")
+    breaker.record_failure("https://slow.github.io/", timeout)
+
+    error = breaker.check("https://slow.github.io/contact")
+    assert isinstance(error, HostUnavailableError)
+    assert error.host == "slow.github.io" and error.error is timeout
+    assert breaker.check("https://fast.github.io/") is None
+
+    breaker.record_success("https://slow.github.io/")
+    assert breaker.check("https://slow.github.io/") is None
+
+def test_circuit_opens_after_failures_in_a_row():
+    breaker = CircuitBreaker(cooldown=60)
+    error = ConnectionError("refused")
+    for _ in range(DEFAULT_FAILURE_THRESHOLD - 1):
+        breaker.record_failure("http://flaky.example/", error)
+        assert breaker.check("http://flaky.example/") is None
+    breaker.record_failure("http://flaky.example/", error)
+    assert isinstance(breaker.check("http://flaky.example/"), HostUnavailableError)
+
+def test_connect_and_read_timeouts_adapt_to_their_own_samples():
+    policy = TimeoutPolicy(connect_timeout=5, read_timeout=10)
+    for _ in range(MIN_SAMPLES - 1):
+        policy.observe_response(0.5)
+    # Connects must not use up the count of response times, nor the other way round
+    for _ in range(MIN_SAMPLES - 1):
+        policy.observe_connect(0.5)
+    assert policy.timeouts() == (5, 10)
+    policy.observe_response(0.5)
+    assert policy.timeouts() == (5, MIN_READ_TIMEOUT)
+    policy.observe_connect(0.5)
+    assert policy.timeouts() == (1.5, MIN_READ_TIMEOUT)
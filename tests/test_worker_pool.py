@@ -0,0 +1,15 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from worker_pool import imap_ordered
+
+def test_results_come_in_input_order_on_a_shared_executor():
+    executor = ThreadPoolExecutor(max_workers=4)
+
+    def slow_first(n):
+        time.sleep(0.05 if n == 0 else 0)
+        return n * n
+    assert list(imap_ordered(slow_first, range(5), workers=3, executor=executor)) == [(n, n * n) for n in range(5)]
+    for _, _ in imap_ordered(slow_first, range(5), workers=3, executor=executor):
+        break
+    assert executor.submit(slow_first, 3).result() == 9  # Still running for the next site
+    executor.shutdown()
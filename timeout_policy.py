@@ -0,0 +1,172 @@
+import math
+import threading
+import time
+from collections import deque
+from url_utils import url_host
+
+# Upper bounds for the connect and read timeouts, and for a whole fetch (connect, headers and body)
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_TOTAL_TIMEOUT = 20
+# Adaptive timeouts never go below these
+MIN_CONNECT_TIMEOUT = 1
+MIN_READ_TIMEOUT = 2
+# Adaptive timeouts are LATENCY_MULTIPLIER times this percentile of the recent latencies...
+LATENCY_PERCENTILE = 0.95
+LATENCY_MULTIPLIER = 3
+# ...once there are at least MIN_SAMPLES of the last LATENCY_WINDOW of them
+MIN_SAMPLES = 20
+LATENCY_WINDOW = 500
+
+# Connection failures or timeouts in a row before a host fails fast, and for how long
+DEFAULT_FAILURE_THRESHOLD = 2
+DEFAULT_COOLDOWN = 5 * 60
+
+class HostUnavailableError(OSError):
+    """Raised instead of contacting a host whose circuit is open; carries the failure that opened it."""
+
+    def __init__(self, host, error):
+        super().__init__(f"{error} (failing fast: {host} failed earlier in this run)")
+        self.host = host
+        self.error = error
+
+class CircuitBreaker:
+    """Per-host circuit breaker for connection failures and timeouts.
+
+    After failure_threshold failures in a row a host's circuit opens: for
+    the next cooldown seconds every request to it fails at once with the
+    failure that opened it, so later stages (GET after HEAD, contact pages
+    after the home page) reuse the outcome instead of waiting out another
+    timeout. After the cooldown one request is let through; a success closes
+    the circuit, a failure opens it again. Circuits are per host, not per
+    registrable domain, so one slow site on shared hosting (a github.io or
+    business.site page) doesn't fail its neighbours.
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown=DEFAULT_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = {}  # host -> (failures in a row, last error, open until or None)
+
+    def check(self, url):
+        """Return a HostUnavailableError if the URL's host is failing fast, else None."""
+        host = url_host(url)
+        with self._lock:
+            state = self._failures.get(host)
+            if state is None or state[2] is None:
+                return None
+            count, error, open_until = state
+            if time.monotonic() < open_until:
+                return HostUnavailableError(host, error)
+            # Half-open: let this request through, and fail fast again until it reports back
+            self._failures[host] = (count, error, time.monotonic() + self.cooldown)
+            return None
+
+    def record_failure(self, url, error):
+        host = url_host(url)
+        with self._lock:
+            count = self._failures.get(host, (0, None, None))[0] + 1
+            open_until = time.monotonic() + self.cooldown if count >= self.failure_threshold else None
+            self._failures[host] = (count, error, open_until)
+
+    def record_success(self, url):
+        host = url_host(url)
+        with self._lock:
+            self._failures.pop(host, None)
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(math.ceil(fraction * len(values))) - 1)]
+
+class TimeoutPolicy:
+    """Connect, read and total deadlines for the fetches of a run, tightened as latencies are observed.
+
+    The read timeout adapts to the times to first byte of the fetches so far:
+    it becomes LATENCY_MULTIPLIER times the LATENCY_PERCENTILE of recent
+    successful requests, between MIN_READ_TIMEOUT and the configured maximum,
+    so a run of fast sites stops waiting the full default on the few that
+    hang. The connect timeout adapts the same way, but only to the TCP
+    connects timed by probe.probe_website (requests doesn't report them), so
+    a run that only fetches pages keeps the configured maximum. total_timeout caps a whole fetch,
+    including a body that trickles in too slowly for the read timeout to fire.
+    The breaker makes failing hosts fail fast (see CircuitBreaker).
+    """
+
+    def __init__(self, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 total_timeout=DEFAULT_TOTAL_TIMEOUT, adaptive=True, breaker=None):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.total_timeout = total_timeout
+        self.adaptive = adaptive
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self._lock = threading.Lock()
+        self._connect_latencies = deque(maxlen=LATENCY_WINDOW)
+        self._response_latencies = deque(maxlen=LATENCY_WINDOW)
+        self._current = (connect_timeout, read_timeout)
+        # Latencies of each kind recorded since its timeout was last recomputed
+        self._connects_observed = 0
+        self._responses_observed = 0
+
+    def observe_connect(self, seconds):
+        """Record how long a successful TCP connect took."""
+        if not self.adaptive:
+            return
+        with self._lock:
+            self._connect_latencies.append(seconds)
+            self._connects_observed += 1
+            # Recomputing sorts the whole window, so only do it every MIN_SAMPLES observations
+            if self._connects_observed >= MIN_SAMPLES:
+                self._connects_observed = 0
+                connect = self._adapt(self._connect_latencies, MIN_CONNECT_TIMEOUT, self.connect_timeout)
+                self._current = (connect, self._current[1])
+
+    def observe_response(self, seconds):
+        """Record how long a successful request took to return its headers."""
+        if not self.adaptive:
+            return
+        with self._lock:
+            self._response_latencies.append(seconds)
+            self._responses_observed += 1
+            if self._responses_observed >= MIN_SAMPLES:
+                self._responses_observed = 0
+                read = self._adapt(self._response_latencies, MIN_READ_TIMEOUT, self.read_timeout)
+                self._current = (self._current[0], read)
+
+    @staticmethod
+    def _adapt(latencies, floor, ceiling):
+        if len(latencies) < MIN_SAMPLES:
+            return ceiling
+        return min(ceiling, max(floor, _percentile(latencies, LATENCY_PERCENTILE) * LATENCY_MULTIPLIER))
+
+    def timeouts(self, read_limit=None):
+        """Return the current (connect, read) timeouts, in the form requests accepts, with read at most read_limit."""
+        connect, read = self._current
+        if read_limit is not None:
+            read = min(read, read_limit)
+        return connect, min(read, self.total_timeout)
+
+_timeout_policy = TimeoutPolicy()
+_timeout_policy_lock = threading.Lock()
+
+def configure_timeout_policy(**kwargs):
+    """Start a fresh timeout policy and circuit breaker (see TimeoutPolicy for the options)."""
+    global _timeout_policy
+    with _timeout_policy_lock:
+        _timeout_policy = TimeoutPolicy(**kwargs)
+    return _timeout_policy
+
+def get_timeout_policy():
+    """Return the timeout policy shared by every fetch in the process."""
+    return _timeout_policy
+
+def reset_timeout_policy():
+    """Forget the latencies and failing hosts seen so far, keeping the configured limits."""
+    current = _timeout_policy
+    return configure_timeout_policy(
+        connect_timeout=current.connect_timeout,
+        read_timeout=current.read_timeout,
+        total_timeout=current.total_timeout,
+        adaptive=current.adaptive,
+        breaker=CircuitBreaker(current.breaker.failure_threshold, current.breaker.cooldown),
+    )
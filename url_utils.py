@@ -0,0 +1,50 @@
+import functools
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import tldextract
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def normalize_url(url):
+    """Normalize a URL so equivalent spellings map to the same key.
+
+    Lower-cases the scheme and host, drops default ports, fragments and
+    user info, sorts query parameters and makes sure there is a path.
+    """
+    url = url.strip()
+    if '://' not in url:
+        url = 'http://' + url
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower().rstrip('.')
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port is None or DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+    path = parts.path or '/'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+# The public suffix list (including its private section, e.g. github.io and myshopify.com),
+# from the snapshot bundled with tldextract - nothing is downloaded at run time
+_extract = tldextract.TLDExtract(suffix_list_urls=(), include_psl_private_domains=True, cache_dir=None)
+
+def url_host(url):
+    """Return the lower-cased host of a URL (or bare domain)."""
+    if '://' not in url:
+        url = 'http://' + url
+    return (urlsplit(url.strip()).hostname or '').lower().rstrip('.')
+
+@functools.lru_cache(maxsize=65536)
+def _registrable_domain(host):
+    parts = _extract(host)
+    if not parts.suffix or not parts.domain:
+        return host  # IP addresses, localhost and unknown suffixes
+    return f"{parts.domain}.{parts.suffix}"
+
+def registrable_domain(url):
+    """Return the registrable domain of a URL by the public suffix list.
+
+    e.g. shop.acme.com.sg -> acme.com.sg, but joe.github.io stays joe.github.io.
+    """
+    return _registrable_domain(url_host(url))
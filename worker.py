@@ -0,0 +1,87 @@
+import argparse
+import threading
+import time
+from fetcher import configure_cache
+from search_cache import configure_search_cache
+from dns_cache import configure_resolver, DEFAULT_DNS_CACHE_FILE
+from task_queue import open_task_queue, DEFAULT_QUEUE_FILE, POLL_INTERVAL
+from worker_pool import DEFAULT_WORKERS
+import scraper
+import broken_website_collector
+from logger import get_logger
+
+logger = get_logger("worker")
+site_logger = get_logger("sites")
+
+# Which check each kind of worker runs, and the queue it takes tasks from
+CHECKS = {
+    'business': (scraper.check_business_website, scraper.TASK_QUEUE_NAME),
+    'broken': (broken_website_collector.check_broken_website, broken_website_collector.TASK_QUEUE_NAME),
+}
+
+def run_worker(task_queue, check, threads=DEFAULT_WORKERS, idle_exit=None):
+    """Take tasks from a shared queue and complete them with the check's result until the run is stopped.
+
+    The worker follows the queue's current run (see SqliteTaskQueue.start), so
+    it can be started before or after the collector. It exits once the run
+    it has worked for is stopped; a stop left over from an earlier run only
+    makes it wait for the next one. `threads` tasks are worked on at once. A
+    task whose check raises goes straight back to the queue (see
+    SqliteTaskQueue.fail) and is given up on after MAX_ATTEMPTS. With
+    idle_exit, the worker also stops after that many seconds without tasks.
+    """
+    counters = {'completed': 0}
+    counters_lock = threading.Lock()
+
+    def work():
+        idle_since = time.time()
+        joined = None  # The run this thread has worked for
+        while True:
+            run_id, stopped = task_queue.current_run()
+            if stopped and run_id == joined:
+                return
+            task = None if stopped else task_queue.lease()
+            if not stopped:
+                joined = run_id
+            if task is None:
+                if idle_exit is not None and time.time() - idle_since >= idle_exit:
+                    return
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            try:
+                result = check(task['url'])
+            except Exception as e:
+                site_logger.warning("Error checking %s: %s", task['url'], e)
+                task_queue.fail(task)
+                continue
+
+            if task_queue.complete(task, result):
+                with counters_lock:
+                    counters['completed'] += 1
+            idle_since = time.time()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    logger.info(f"Worker finished: {counters['completed']} tasks completed")
+    return counters['completed']
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check websites from a shared task queue.")
+    parser.add_argument("kind", choices=sorted(CHECKS), help="which collector's checks to run")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_FILE, help="SQLite queue file or redis:// URL")
+    parser.add_argument("--threads", type=int, default=DEFAULT_WORKERS, help="tasks worked on at once")
+    parser.add_argument("--use-cache", action="store_true", help="keep responses and DNS lookups on disk")
+    args = parser.parse_args()
+
+    if args.use_cache:
+        configure_cache()
+        configure_search_cache()
+        configure_resolver(path=DEFAULT_DNS_CACHE_FILE)
+
+    check, queue_name = CHECKS[args.kind]
+    run_worker(open_task_queue(args.queue, queue_name), check, threads=args.threads)
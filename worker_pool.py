@@ -0,0 +1,45 @@
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Default number of concurrent website checks
+DEFAULT_WORKERS = 10
+
+def imap_ordered(func, items, workers=DEFAULT_WORKERS, executor=None):
+    """Run func over items on a thread pool, yielding (item, result) pairs in input order.
+
+    At most `workers` items are in flight at once and new work is only queued after
+    the caller has consumed a result, so breaking out of the loop (e.g. once enough
+    contacts have been collected) stops any further work from being scheduled.
+    With executor, the work runs on that shared pool (which is left running)
+    instead of a pool of its own.
+    """
+    items = iter(items)
+
+    # Sequential mode - no thread pool at all
+    if workers <= 1:
+        for item in items:
+            yield item, func(item)
+        return
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for item in itertools.islice(items, workers):
+            pending.append((item, executor.submit(func, item)))
+
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+
+            # Only queue the next item once the caller asked for more
+            for next_item in itertools.islice(items, 1):
+                pending.append((next_item, executor.submit(func, next_item)))
+    finally:
+        # Drop anything that has not started yet and don't wait on in-flight requests
+        for _, future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=False)